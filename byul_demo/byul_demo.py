@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 
 from PySide6.QtWidgets import QApplication
 
@@ -7,6 +8,9 @@ from world.world import World
 from gui.grid_viewer import GridViewer
 
 if __name__ == "__main__":
+    # 블럭 생성 워커 프로세스용 (cx_Freeze 등으로 빌드된 실행 파일 대응)
+    multiprocessing.freeze_support()
+
     # config 로딩용 로딩을 해야 필요한 디렉토리가 추가된다 sys.path에...
     print(f'BYUL_DEMO_ENV_PATH : {BYUL_DEMO_ENV_PATH}')
     print(f'BYUL_DEMO_PATH : {BYUL_DEMO_PATH}')
@@ -0,0 +1,216 @@
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from PySide6.QtCore import QObject, Qt, QThread, Signal
+
+from grid.cell_columns import CellColumns
+from grid.block_generator import generate_block_columns
+from grid.grid_block import GridBlock
+from grid.region_file import read_region_columns
+
+from utils.log_to_panel import g_logger
+
+def make_block_columns(x0: int, y0: int, block_size: int,
+                       world_seed: int = 0,
+                       region: tuple | None = None) -> CellColumns:
+    """
+    블럭 저장소를 만든다. (워커 프로세스에서도 호출되므로 모듈 최상위 함수)
+    region = (리전 폴더, region_blocks)가 주어지고 저장된 블럭이 있으면
+    읽어오고, 없으면 시드로 새로 생성한다.
+    """
+    if region is not None:
+        folder, region_blocks = region
+        cols = read_region_columns(folder, x0, y0, block_size, region_blocks)
+        if cols is not None:
+            return cols
+    return generate_block_columns(x0, y0, block_size, world_seed=world_seed)
+
+class BlockTaskThread(QThread):
+    """make_block_columns()를 실행하는 1회용 쓰레드"""
+    succeeded = Signal(tuple, object)
+    failed = Signal(tuple)
+
+    def __init__(self, key: tuple, block_size: int, world_seed: int = 0,
+                 region: tuple | None = None):
+        super().__init__()
+        self.key = key
+        self.block_size = block_size
+        self.world_seed = world_seed
+        self.region = region
+
+    def run(self):
+        x0, y0 = self.key
+        try:
+            cols = make_block_columns(x0, y0, self.block_size,
+                                      self.world_seed, self.region)
+            block = GridBlock(x0, y0, self.block_size, columns=cols)
+            self.succeeded.emit(self.key, block)
+        except Exception as e:
+            g_logger.log_debug_threadsafe(
+                f"[❌ BlockTaskThread 실패] {self.key}: {e}")
+            self.failed.emit(self.key)
+
+class BlockExecutor(QObject):
+    """
+    블럭 생성 실행기의 공통 인터페이스.
+    GridBlockManager는 submit()으로 블럭 생성을 맡기고,
+    결과는 항상 메인 쓰레드에서 block_ready / block_failed 시그널로 받는다.
+    """
+    block_ready = Signal(tuple, object)
+    block_failed = Signal(tuple)
+
+    def __init__(self, max_parallel: int = 2):
+        super().__init__()
+        self.max_parallel = max(1, max_parallel)
+
+    def active_count(self) -> int:
+        raise NotImplementedError
+
+    def has_capacity(self) -> bool:
+        return self.active_count() < self.max_parallel
+
+    def is_active(self, key: tuple) -> bool:
+        raise NotImplementedError
+
+    def submit(self, key: tuple, block_size: int, world_seed: int = 0,
+               region: tuple | None = None):
+        """region = (리전 폴더, region_blocks) : 저장된 블럭을 먼저 찾는다."""
+        raise NotImplementedError
+
+    def cancel_all(self):
+        """진행 중인 작업의 결과를 버린다. 시그널도 보내지 않는다."""
+        raise NotImplementedError
+
+    def shutdown(self):
+        self.cancel_all()
+
+class ThreadBlockExecutor(BlockExecutor):
+    """블럭 하나당 쓰레드 하나를 띄우는 기존 방식"""
+
+    def __init__(self, max_parallel: int = 2):
+        super().__init__(max_parallel)
+        self._threads: dict[tuple, BlockTaskThread] = {}
+        # succeeded/failed 이후 finished 까지 살아 있어야 하는 쓰레드
+        self._finishing: set[BlockTaskThread] = set()
+
+    def active_count(self) -> int:
+        return len(self._threads)
+
+    def is_active(self, key: tuple) -> bool:
+        return key in self._threads
+
+    def submit(self, key: tuple, block_size: int, world_seed: int = 0,
+               region: tuple | None = None):
+        thread = BlockTaskThread(key, block_size, world_seed, region)
+        thread.succeeded.connect(self._on_succeeded)
+        thread.failed.connect(self._on_failed)
+        thread.finished.connect(
+            lambda thread=thread: self._finalize_thread(thread))
+
+        self._threads[key] = thread
+        thread.start()
+
+    def _release(self, key: tuple) -> bool:
+        thread = self._threads.pop(key, None)
+        if thread is None:
+            return False  # 취소되었거나 중복 시그널
+        self._finishing.add(thread)
+        return True
+
+    def _on_succeeded(self, key: tuple, block: GridBlock):
+        if self._release(key):
+            self.block_ready.emit(key, block)
+
+    def _on_failed(self, key: tuple):
+        if self._release(key):
+            self.block_failed.emit(key)
+
+    def _finalize_thread(self, thread: BlockTaskThread):
+        self._finishing.discard(thread)
+        thread.deleteLater()  # ❗ 메모리 안전 정리만
+
+    def cancel_all(self):
+        for thread in self._threads.values():
+            thread.requestInterruption()
+            self._finishing.add(thread)
+        self._threads.clear()
+
+    def shutdown(self):
+        self.cancel_all()
+        for thread in list(self._finishing):
+            thread.wait()
+
+class ProcessBlockExecutor(BlockExecutor):
+    """
+    상주 워커 프로세스 풀에서 블럭을 생성한다.
+    워커는 CellColumns(NumPy 배열 + 희소 테이블)만 만들어 pickle로 돌려주고,
+    GridBlock 조립은 메인 쓰레드에서 한다. GIL을 나눠 쓰지 않으므로
+    코어 수만큼 블럭 생성 처리량이 늘어난다.
+
+    워커는 기본으로 spawn 방식으로 띄운다. Qt와 여러 쓰레드가 이미 돌고 있는
+    프로세스를 fork하면 잠긴 락이 자식에 그대로 복사될 수 있다.
+    """
+    # 풀 내부 쓰레드 -> 메인 쓰레드 전달용 (key, future, columns, error)
+    _done = Signal(tuple, object, object, object)
+
+    def __init__(self, max_workers: int | None = None, queue_depth: int = 2,
+                 start_method: str = "spawn"):
+        workers = max_workers or os.cpu_count() or 2
+        # 워커가 놀지 않도록 워커당 queue_depth개까지 미리 넣어둔다.
+        super().__init__(workers * max(1, queue_depth))
+        self.max_workers = workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method))
+        self._futures: dict[tuple, Future] = {}
+        # _done은 풀 내부 쓰레드에서 emit되므로 항상 큐를 거쳐 메인 쓰레드로
+        self._done.connect(self._on_done, Qt.QueuedConnection)
+
+    def active_count(self) -> int:
+        return len(self._futures)
+
+    def is_active(self, key: tuple) -> bool:
+        return key in self._futures
+
+    def submit(self, key: tuple, block_size: int, world_seed: int = 0,
+               region: tuple | None = None):
+        future = self._pool.submit(
+            make_block_columns, key[0], key[1], block_size,
+            world_seed, region)
+        self._futures[key] = future
+        future.add_done_callback(
+            lambda f, key=key: self._emit_done(key, f))
+
+    def _emit_done(self, key: tuple, future: Future):
+        # 풀 내부 쓰레드에서 호출된다. 시그널로 메인 쓰레드에 넘긴다.
+        if future.cancelled():
+            return
+        error = future.exception()
+        columns = None if error else future.result()
+        self._done.emit(key, future, columns, error)
+
+    def _on_done(self, key: tuple, future: Future, columns, error):
+        if self._futures.get(key) is not future:
+            # 취소된 작업이거나, 취소 뒤 같은 key로 다시 넣은 작업의
+            # 이전 결과이다. (새 작업의 결과는 따로 온다)
+            return
+        del self._futures[key]
+
+        if error is not None:
+            g_logger.log_debug(
+                f"[❌ ProcessBlockExecutor 실패] {key}: {error}")
+            self.block_failed.emit(key)
+            return
+
+        block = GridBlock(key[0], key[1], columns.size, columns=columns)
+        self.block_ready.emit(key, block)
+
+    def cancel_all(self):
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
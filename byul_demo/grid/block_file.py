@@ -0,0 +1,175 @@
+"""
+블럭 바이너리 파일 포맷 (.byb)
+
+JSON(block_{x0}_{y0}.json)은 셀마다 딕셔너리를 쓰므로 크고 느리다.
+.byb는 CellColumns를 그대로 디스크에 옮긴 형식이다.
+
+    [header]        <4sHHiiIQQ  magic, version, column_count,
+                                x0, y0, block_size, var_offset, var_length
+    [column table]  column_count * <Q   각 고정 폭 열의 파일 내 오프셋
+    [columns]       8바이트 정렬된 고정 폭 열들 (little-endian)
+    [var section]   UTF-8 JSON : 문자열 테이블과 희소 테이블
+
+고정 폭 열은 np.memmap으로 바로 매핑하므로 파싱 없이 필요한 페이지만
+읽힌다. (copy-on-write 매핑이라 셀을 고쳐도 파일은 바뀌지 않는다)
+"""
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from grid.cell_columns import CellColumns
+
+BLOCK_FILE_MAGIC = b"BYBL"
+BLOCK_FILE_VERSION = 1
+BLOCK_FILE_SUFFIX = ".byb"
+
+_HEADER = struct.Struct("<4sHHiiIQQ")
+_OFFSET = struct.Struct("<Q")
+_ALIGN = 8
+
+# (열 이름, 디스크 dtype) - 순서가 곧 파일 내 순서이다. 바꾸면 버전을 올려라.
+BLOCK_FILE_COLUMNS: list[tuple[str, str]] = [
+    ("terrain", "u1"),
+    ("flags", "u1"),
+    ("status", "u1"),
+    ("light_level", "<f4"),
+    ("timestamp", "<f8"),
+    ("zone_code", "<i2"),
+    ("effect_code", "<i2"),
+    ("event_code", "<i2"),
+]
+
+# 실행 중에만 의미 있는 열(경로/시작/목표 표시). 형식은 그대로 두고 0으로 쓴다.
+RUNTIME_COLUMNS = frozenset({"flags"})
+
+class BlockFileError(ValueError):
+    pass
+
+def block_file_path(folder, x0: int, y0: int) -> Path:
+    return Path(folder) / f"block_{x0}_{y0}{BLOCK_FILE_SUFFIX}"
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def _pack_var_section(cols: CellColumns) -> bytes:
+    data = {
+        "strings": cols.strings,
+        "npc_ids": [[i, v] for i, v in cols.npc_ids.items()],
+        "items": [[i, v] for i, v in cols.items.items()],
+        "owner_npc_id": [[i, v] for i, v in cols.owner_npc_id.items()],
+        "custom_data": [[i, v] for i, v in cols.custom_data.items()],
+    }
+    return json.dumps(data, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+def _unpack_var_section(cols: CellColumns, raw: bytes):
+    data = json.loads(raw.decode("utf-8")) if raw else {}
+    cols.set_strings(data.get("strings", []))
+    cols.npc_ids = {i: v for i, v in data.get("npc_ids", [])}
+    cols.items = {i: v for i, v in data.get("items", [])}
+    cols.owner_npc_id = {i: v for i, v in data.get("owner_npc_id", [])}
+    cols.custom_data = {i: v for i, v in data.get("custom_data", [])}
+
+def columns_to_bytes(cols: CellColumns) -> bytes:
+    """블럭 저장소를 .byb 바이트열로 직렬화한다. (RUNTIME_COLUMNS는 0)"""
+    column_count = len(BLOCK_FILE_COLUMNS)
+
+    offset = _align(_HEADER.size + _OFFSET.size * column_count)
+    offsets = []
+    payloads = []
+    for name, dtype in BLOCK_FILE_COLUMNS:
+        column = getattr(cols, name)
+        if name in RUNTIME_COLUMNS:
+            data = bytes(np.dtype(dtype).itemsize * len(column))
+        else:
+            data = np.ascontiguousarray(column, dtype=dtype).tobytes()
+        offsets.append(offset)
+        payloads.append(data)
+        offset = _align(offset + len(data))
+
+    var = _pack_var_section(cols)
+    header = _HEADER.pack(BLOCK_FILE_MAGIC, BLOCK_FILE_VERSION, column_count,
+                          cols.x0, cols.y0, cols.size,
+                          offset, len(var))
+
+    out = bytearray(offset + len(var))
+    out[:_HEADER.size] = header
+    for i, column_offset in enumerate(offsets):
+        _OFFSET.pack_into(out, _HEADER.size + i * _OFFSET.size, column_offset)
+        out[column_offset:column_offset + len(payloads[i])] = payloads[i]
+    out[offset:] = var
+    return bytes(out)
+
+def _read_header(buf: bytes, source) -> tuple:
+    if len(buf) < _HEADER.size:
+        raise BlockFileError(f"{source}: 헤더가 잘렸다")
+    (magic, version, column_count,
+     x0, y0, block_size, var_offset, var_length) = _HEADER.unpack_from(buf)
+    if magic != BLOCK_FILE_MAGIC:
+        raise BlockFileError(f"{source}: 블럭 파일이 아니다 (magic={magic!r})")
+    if version != BLOCK_FILE_VERSION:
+        raise BlockFileError(
+            f"{source}: 지원하지 않는 버전 {version} "
+            f"(지원: {BLOCK_FILE_VERSION})")
+    if column_count != len(BLOCK_FILE_COLUMNS):
+        raise BlockFileError(f"{source}: 열 개수 불일치 {column_count}")
+    offsets = [
+        _OFFSET.unpack_from(buf, _HEADER.size + i * _OFFSET.size)[0]
+        for i in range(column_count)
+    ]
+    return x0, y0, block_size, var_offset, var_length, offsets
+
+def columns_from_bytes(buf: bytes, source="<bytes>") -> CellColumns:
+    """.byb 바이트열에서 블럭 저장소를 만든다. (열은 복사된다)"""
+    x0, y0, block_size, var_offset, var_length, offsets = \
+        _read_header(buf, source)
+    cols = CellColumns(x0, y0, block_size)
+    n = len(cols)
+    for (name, dtype), offset in zip(BLOCK_FILE_COLUMNS, offsets):
+        column = np.frombuffer(buf, dtype=dtype, count=n, offset=offset)
+        getattr(cols, name)[:] = column
+    _unpack_var_section(cols, buf[var_offset:var_offset + var_length])
+    return cols
+
+def write_columns_file(cols: CellColumns, path) -> Path:
+    """블럭 저장소를 .byb 파일로 저장한다. 임시 파일에 쓴 뒤 교체한다."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(columns_to_bytes(cols))
+    os.replace(tmp, path)
+    return path
+
+def read_columns_file(path, mmap: bool = True) -> CellColumns:
+    """
+    .byb 파일을 읽어 블럭 저장소를 만든다.
+    mmap=True면 고정 폭 열을 np.memmap(copy-on-write)으로 매핑해서
+    실제로 접근한 페이지만 디스크에서 읽는다.
+    """
+    path = Path(path)
+    if not mmap:
+        return columns_from_bytes(path.read_bytes(), path)
+
+    with open(path, "rb") as f:
+        head = f.read(_HEADER.size + _OFFSET.size * len(BLOCK_FILE_COLUMNS))
+        x0, y0, block_size, var_offset, var_length, offsets = \
+            _read_header(head, path)
+        f.seek(var_offset)
+        var = f.read(var_length)
+
+    cols = CellColumns.__new__(CellColumns)
+    cols.x0 = x0
+    cols.y0 = y0
+    cols.size = block_size
+    n = block_size * block_size
+    for (name, dtype), offset in zip(BLOCK_FILE_COLUMNS, offsets):
+        setattr(cols, name, np.memmap(
+            path, dtype=dtype, mode="c", offset=offset, shape=(n,)))
+    _unpack_var_section(cols, var)
+    cols.dirty_cells = set()
+    cols.dirty_all = False
+    return cols
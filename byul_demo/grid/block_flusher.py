@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+
+from grid.cell_columns import CellColumns
+from grid.region_file import RegionStore
+
+from utils.log_to_panel import g_logger
+
+class BlockFlusher:
+    """
+    변경된(dirty) 블럭을 백그라운드 쓰레드에서 리전 저장소에 기록한다.
+    (write-behind)
+
+    - enqueue()는 기록할 CellColumns를 넘기고 바로 반환한다.
+      같은 블럭이 아직 대기 중이면 최신 것으로 교체된다.
+    - close_after=True면 기록 후 저장소를 해제한다. (축출된 블럭용)
+    - 대기 중이거나 기록 중인 블럭은 reclaim()으로 디스크를 거치지 않고
+      바로 되찾을 수 있다. (기다리지 않는다)
+    - 기록에 실패하면 retry_delay_sec부터 두 배씩 늘려 가며 max_retries번
+      다시 시도한다. 그래도 실패한 블럭은 버리지 않고 dirty 상태로 들고
+      있다가 reclaim()이나 다음 enqueue()로 넘겨준다.
+    """
+
+    def __init__(self, store: RegionStore, max_retries: int = 5,
+                 retry_delay_sec: float = 0.2, max_retry_delay_sec: float = 5.0):
+        self.store = store
+        self.max_retries = max_retries
+        self.retry_delay_sec = retry_delay_sec
+        self.max_retry_delay_sec = max_retry_delay_sec
+
+        # key -> (저장소, close_after, 실패 횟수, 다시 시도할 시각)
+        self._pending: OrderedDict[tuple, tuple[CellColumns, bool, int, float]] = OrderedDict()
+        # 기록 중인 key -> 저장소
+        self._writing: dict[tuple, CellColumns] = {}
+        # 기록 중에 reclaim()이 가져간 블럭. 기록이 끝나도 닫거나 clean으로
+        # 표시하지 않는다. (이미 호출한 쪽의 것이다)
+        self._reclaimed: set[tuple] = set()
+        # 재시도를 다 쓰고도 기록하지 못한 블럭
+        self._failed: dict[tuple, tuple[CellColumns, bool]] = {}
+        self._cond = threading.Condition()
+        self._running = True
+
+        self.written_count = 0
+        self.failed_count = 0
+        self.retry_count = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def enqueue(self, key: tuple, cols: CellColumns, close_after: bool = False):
+        with self._cond:
+            for old in (self._pending.pop(key, None), self._failed.pop(key, None)):
+                if old is not None and old[0] is not cols and old[1]:
+                    old[0].close()  # 더 새로운 스냅샷이 들어왔다.
+            self._pending[key] = (cols, close_after, 0, 0.0)
+            self._cond.notify_all()
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending) + len(self._writing)
+
+    def failed_keys(self) -> list[tuple]:
+        """기록하지 못하고 들고 있는 블럭 키"""
+        with self._cond:
+            return list(self._failed)
+
+    def reclaim(self, key: tuple) -> CellColumns | None:
+        """
+        대기 중이거나 기록에 실패한 블럭을 빼서 돌려준다.
+        기록 중이면 기다리지 않고 그 저장소를 넘겨준다. 그 기록은 끝까지
+        하지만 결과로 저장소를 닫거나 clean으로 표시하지 않는다.
+        되찾은 저장소는 여전히 dirty 상태이므로 다음 축출 때 다시 기록된다.
+        """
+        with self._cond:
+            item = self._pending.pop(key, None)
+            if item is None:
+                item = self._failed.pop(key, None)
+            if item is not None:
+                return item[0]
+            cols = self._writing.get(key)
+            if cols is not None:
+                self._reclaimed.add(key)
+            return cols
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        대기 중인 블럭이 모두 기록(또는 재시도 끝에 실패)될 때까지 기다린다.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._writing, timeout)
+
+    def stop(self, flush: bool = True):
+        if flush:
+            self.flush()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _next_ready(self) -> tuple[tuple | None, float | None]:
+        """
+        (지금 기록할 수 있는 첫 블럭의 키, 기다릴 시간)
+        없으면 키는 None이고, 기다릴 시간은 가장 가까운 재시도까지 남은
+        시간이다. (재시도할 블럭도 없으면 None)
+        """
+        now = time.monotonic()
+        wait_sec = None
+        for key, (_, _, _, not_before) in self._pending.items():
+            if not_before <= now:
+                return key, None
+            wait = not_before - now
+            if wait_sec is None or wait < wait_sec:
+                wait_sec = wait
+        return None, wait_sec
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    key, wait_sec = self._next_ready()
+                    if key is not None:
+                        break
+                    self._cond.wait(wait_sec)
+                if not self._running:
+                    return
+                cols, close_after, attempts, _ = self._pending.pop(key)
+                self._writing[key] = cols
+
+            error = None
+            try:
+                self.store.save_columns(cols)
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                del self._writing[key]
+                if error is None:
+                    self.written_count += 1
+                if key in self._reclaimed:
+                    # 기록하는 동안 reclaim()이 가져갔다. dirty인 채로 둔다.
+                    self._reclaimed.discard(key)
+                elif error is None:
+                    if close_after:
+                        cols.close()
+                    else:
+                        cols.clear_dirty()
+                else:
+                    self._on_failed(key, cols, close_after, attempts + 1, error)
+                self._cond.notify_all()
+
+    def _on_failed(self, key: tuple, cols: CellColumns, close_after: bool,
+                   attempts: int, error: Exception):
+        """_cond를 잡은 채로 부른다."""
+        if key in self._pending:
+            # 기록하는 동안 더 새로운 스냅샷이 들어왔다.
+            if close_after:
+                cols.close()
+            return
+        if attempts <= self.max_retries:
+            self.retry_count += 1
+            delay = min(self.max_retry_delay_sec,
+                        self.retry_delay_sec * (2 ** (attempts - 1)))
+            self._pending[key] = (cols, close_after, attempts,
+                                  time.monotonic() + delay)
+            g_logger.log_debug_threadsafe(
+                f"[⚠️ BlockFlusher 저장 실패] {key}: {error} "
+                f"({attempts}/{self.max_retries}, {delay:.1f}초 뒤 재시도)")
+            return
+        self.failed_count += 1
+        self._failed[key] = (cols, close_after)
+        g_logger.log_debug_threadsafe(
+            f"[❌ BlockFlusher 저장 실패] {key}: {error} "
+            f"(재시도 {self.max_retries}번 실패, 메모리에 보관)")
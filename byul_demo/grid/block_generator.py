@@ -0,0 +1,94 @@
+import string
+
+import numpy as np
+
+from grid.cell_columns import CellColumns
+from grid.grid_cell import CellStatus, TerrainType
+
+ZONE_NAMES = list(string.ascii_uppercase)
+ITEM_NAMES = ["item_apple", "item_gem", "item_scroll"]
+EFFECT_ID = "heal_zone"
+EVENT_ID = "trigger_lever"
+
+def block_seed(x0: int, y0: int, world_seed: int = 0) -> np.random.SeedSequence:
+    """
+    블럭 원점 (x0, y0)과 월드 시드로 블럭 전용 시드를 만든다.
+    같은 좌표는 항상 같은 블럭을 만든다. (음수 좌표는 64비트로 감싼다)
+    """
+    mask = (1 << 64) - 1
+    return np.random.SeedSequence(
+        [world_seed & mask, x0 & mask, y0 & mask])
+
+def generate_block_columns(
+    x0: int, y0: int, block_size: int = 100,
+    world_seed: int = 0,
+    npc_chance: float = 0.05,
+    terrain_ratio_normal: float = 0.5,
+    terrain_ratio_water: float = 0.2,
+    terrain_ratio_forest: float = 0.1,
+    terrain_ratio_mountain: float = 0.1,
+    terrain_ratio_forbidden: float = 0.1,
+    item_chance: float = 0.2,
+    effect_chance: float = 0.1,
+    event_chance: float = 0.05
+) -> CellColumns:
+    """
+    GridCell.random()과 같은 분포로 블럭 전체를 한 번에 생성한다.
+    셀마다 파이썬 루프를 돌지 않고 열 단위 NumPy 연산만 사용한다.
+    (0, 0) 셀에는 FORBIDDEN 지형과 NPC를 두지 않는다.
+    """
+    rng = np.random.default_rng(block_seed(x0, y0, world_seed))
+    cols = CellColumns(x0, y0, block_size)
+    n = len(cols)
+
+    # 지형 (비율 기반)
+    terrain_values = np.array([
+        TerrainType.NORMAL.value,
+        TerrainType.WATER.value,
+        TerrainType.FOREST.value,
+        TerrainType.MOUNTAIN.value,
+        TerrainType.FORBIDDEN.value,
+    ], dtype=np.uint8)
+    weights = np.array([
+        terrain_ratio_normal,
+        terrain_ratio_water,
+        terrain_ratio_forest,
+        terrain_ratio_mountain,
+        terrain_ratio_forbidden,
+    ], dtype=np.float64)
+    cols.terrain[:] = rng.choice(terrain_values, size=n, p=weights / weights.sum())
+
+    origin_index = -1
+    if cols.contains(0, 0):
+        origin_index = cols.index_of(0, 0)
+        if cols.terrain[origin_index] == TerrainType.FORBIDDEN.value:
+            cols.terrain[origin_index] = TerrainType.NORMAL.value
+
+    cols.light_level[:] = np.round(rng.uniform(0.3, 1.0, size=n), 2)
+
+    cols.set_strings(ZONE_NAMES + [EFFECT_ID, EVENT_ID])
+    cols.zone_code[:] = rng.integers(0, len(ZONE_NAMES), size=n)
+
+    # NPC 배치 (최초 생성시에만, id도 시드에서 만들어 재현 가능하다)
+    npc_mask = rng.random(n) < npc_chance
+    npc_mask &= cols.terrain != TerrainType.FORBIDDEN.value
+    if origin_index >= 0:
+        npc_mask[origin_index] = False
+
+    npc_indices = np.flatnonzero(npc_mask)
+    if npc_indices.size:
+        id_hex = rng.bytes(16 * npc_indices.size).hex()
+        cols.status[npc_indices] = CellStatus.NPC.value
+        for k, index in enumerate(npc_indices.tolist()):
+            cols.npc_ids[index] = [f"npc_{id_hex[k * 32:(k + 1) * 32]}"]
+
+    # 아이템 / 효과 / 이벤트
+    item_indices = np.flatnonzero(rng.random(n) < item_chance)
+    item_kinds = rng.integers(0, len(ITEM_NAMES), size=item_indices.size)
+    for index, kind in zip(item_indices.tolist(), item_kinds.tolist()):
+        cols.items[index] = [ITEM_NAMES[kind]]
+
+    cols.effect_code[rng.random(n) < effect_chance] = cols.intern(EFFECT_ID)
+    cols.event_code[rng.random(n) < event_chance] = cols.intern(EVENT_ID)
+
+    return cols
@@ -0,0 +1,144 @@
+import math
+import time
+
+from PySide6.QtCore import QRect
+
+from grid.grid_block_manager import GridBlockManager
+from utils.route_changing_detector import RouteChangingDetector
+
+class BlockPrefetcher:
+    """
+    카메라 이동 속도와 NPC 경로로 곧 필요할 블럭을 미리 요청한다.
+
+    - 카메라 : 중심 이동으로 속도(셀/초)를 추정하고,
+      (블럭 로딩 지연 + lookahead_sec) 동안 갈 거리만큼 진행 방향으로
+      화면 영역을 밀어 가며 걸치는 블럭을 요청한다.
+    - NPC : proto_list 경로에서 현재 블럭을 벗어나는 지점의 블럭을 요청한다.
+    - 진행 방향이 angle_threshold_deg 이상 바뀌면 대기 중인 예측 로딩을
+      취소한다.
+
+    요청은 모두 GridBlockManager.request_prefetch_block()으로 들어가므로
+    화면에 필요한 블럭(demand)보다 항상 뒤에 처리된다.
+    """
+
+    def __init__(self, block_mgr: GridBlockManager,
+                 detector: RouteChangingDetector,
+                 lookahead_sec: float = 0.5,
+                 max_blocks_ahead: int = 3,
+                 angle_threshold_deg: float = 45.0,
+                 route_lookahead: int = 64,
+                 npc_interval_sec: float = 0.5):
+        self.block_mgr = block_mgr
+        self.detector = detector
+        self.lookahead_sec = lookahead_sec
+        self.max_blocks_ahead = max_blocks_ahead
+        self.angle_threshold_deg = angle_threshold_deg
+        self.route_lookahead = route_lookahead
+        self.npc_interval_sec = npc_interval_sec
+
+        self.velocity = (0.0, 0.0)  # 셀/초
+        self._last_center = None
+        self._last_time = None
+        self._heading = None
+        self._last_npc_time = 0.0
+
+    def on_camera_moved(self, center: tuple[int, int], rect: QRect,
+                        pending_moves=(), now: float | None = None):
+        """
+        카메라 중심이 바뀔 때마다 호출한다.
+        pending_moves: 아직 처리되지 않은 (dx, dy, distance) 이동들
+        """
+        now = time.monotonic() if now is None else now
+        self._update_velocity(center, now)
+
+        heading = self.detector.get_heading()
+        if heading is None:
+            return
+        if self._heading_changed(heading):
+            self.block_mgr.cancel_prefetch()
+        self._heading = heading
+
+        # 이미 큐에 쌓인 이동은 확정된 이동이므로 예측 거리에 더한다.
+        queued = sum(math.hypot(dx, dy) for dx, dy, *_ in pending_moves)
+        speed = math.hypot(*self.velocity)
+        horizon = self.block_mgr.load_latency_sec + self.lookahead_sec
+        distance = speed * horizon + queued
+
+        bs = self.block_mgr.block_size
+        steps = min(self.max_blocks_ahead, max(1, math.ceil(distance / bs)))
+        for i in range(1, steps + 1):
+            ox = round(heading[0] * i * bs)
+            oy = round(heading[1] * i * bs)
+            keys = self.block_mgr.get_block_keys_in_rect(
+                rect.left() + ox, rect.top() + oy,
+                rect.width(), rect.height())
+            for key in self._nearest_first(keys, center, heading):
+                self.block_mgr.request_prefetch_block(*key)
+
+    def on_npcs_ticked(self, npcs, now: float | None = None):
+        """
+        화면 안 NPC들의 경로를 보고 다음 블럭을 미리 요청한다.
+        npc_interval_sec 간격으로만 실제로 검사한다.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self._last_npc_time < self.npc_interval_sec:
+            return
+        self._last_npc_time = now
+
+        mgr = self.block_mgr
+        for npc in npcs:
+            route = npc.proto_list
+            if not route or npc.start is None:
+                continue
+
+            current = mgr.get_origin(npc.start)
+            begin = self._route_index(route, npc.start)
+            for coord in route[begin:begin + self.route_lookahead]:
+                key = mgr.get_origin(coord.to_tuple())
+                if key != current:
+                    # 경계를 넘는 첫 블럭만 요청한다. (그 다음은 다음 검사에서)
+                    mgr.request_prefetch_block(*key)
+                    break
+
+    def reset(self):
+        self.velocity = (0.0, 0.0)
+        self._last_center = None
+        self._last_time = None
+        self._heading = None
+        self.block_mgr.cancel_prefetch()
+
+    def _update_velocity(self, center, now):
+        if self._last_center is not None:
+            dt = now - self._last_time
+            if dt > 0:
+                vx = (center[0] - self._last_center[0]) / dt
+                vy = (center[1] - self._last_center[1]) / dt
+                # 지수 이동 평균
+                self.velocity = (
+                    self.velocity[0] + 0.3 * (vx - self.velocity[0]),
+                    self.velocity[1] + 0.3 * (vy - self.velocity[1]),
+                )
+        self._last_center = center
+        self._last_time = now
+
+    def _heading_changed(self, heading) -> bool:
+        if self._heading is None:
+            return False
+        dot = heading[0] * self._heading[0] + heading[1] * self._heading[1]
+        angle = math.degrees(math.acos(max(-1.0, min(1.0, dot))))
+        return angle > self.angle_threshold_deg
+
+    def _nearest_first(self, keys, center, heading):
+        """진행 방향으로 가까운 블럭부터 요청되도록 정렬한다."""
+        half = self.block_mgr.block_size / 2
+        def along(key):
+            return ((key[0] + half - center[0]) * heading[0] +
+                    (key[1] + half - center[1]) * heading[1])
+        return sorted(keys, key=along)
+
+    @staticmethod
+    def _route_index(route, start) -> int:
+        for i, coord in enumerate(route):
+            if coord.to_tuple() == tuple(start):
+                return i
+        return 0
@@ -0,0 +1,86 @@
+import zlib
+from collections import OrderedDict
+
+from grid.cell_columns import CellColumns
+from grid.block_file import columns_from_bytes, columns_to_bytes
+
+class BlockSpillCache:
+    """
+    캐시에서 축출된 블럭을 압축된 바이트열로 잠시 보관하는 2차 캐시.
+
+    - 블럭은 .byb 바이트열(columns_to_bytes)을 zlib으로 압축해서 담는다.
+      대부분 같은 값이 이어지는 열이라 압축률이 높다.
+    - max_bytes(압축 후 크기 합)를 넘으면 오래된 것부터 버린다.
+    - take()로 꺼낸 블럭은 캐시에서 빠진다. (1차 캐시로 돌아간다)
+    - dirty=True로 넣은 블럭은 꺼낼 때도 dirty 상태로 돌아온다.
+      (저장소가 없어 아직 어디에도 기록되지 않은 블럭)
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, level: int = 1):
+        self.max_bytes = max(0, max_bytes)
+        self.level = level
+
+        self._entries: OrderedDict[tuple, tuple[bytes, bool, int]] = OrderedDict()
+        self.used_bytes = 0
+        self.raw_bytes = 0  # 압축 전 크기 합 (압축률 확인용)
+
+        self.dropped_count = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def put(self, key: tuple, cols: CellColumns, dirty: bool = False) -> bool:
+        """블럭을 압축해서 담는다. 예산보다 크면 담지 않고 False"""
+        if self.max_bytes == 0:
+            return False
+
+        raw = columns_to_bytes(cols)
+        data = zlib.compress(raw, self.level)
+        if len(data) > self.max_bytes:
+            return False
+
+        self.discard(key)
+        self._entries[key] = (data, dirty, len(raw))
+        self.used_bytes += len(data)
+        self.raw_bytes += len(raw)
+        self._shrink()
+        return True
+
+    def take(self, key: tuple) -> CellColumns | None:
+        entry = self._pop(key)
+        if entry is None:
+            return None
+
+        data, dirty, _ = entry
+        cols = columns_from_bytes(zlib.decompress(data), f"<spill {key}>")
+        if dirty:
+            cols.mark_all_dirty()
+        return cols
+
+    def discard(self, key: tuple):
+        self._pop(key)
+
+    def _pop(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.used_bytes -= len(entry[0])
+            self.raw_bytes -= entry[2]
+        return entry
+
+    def set_max_bytes(self, max_bytes: int):
+        self.max_bytes = max(0, max_bytes)
+        self._shrink()
+
+    def _shrink(self):
+        while self._entries and self.used_bytes > self.max_bytes:
+            key = next(iter(self._entries))
+            self._pop(key)
+            self.dropped_count += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.used_bytes = 0
+        self.raw_bytes = 0
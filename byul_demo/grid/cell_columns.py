@@ -0,0 +1,231 @@
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+# 문자열 코드가 없음을 의미하는 값 (zone/effect/event)
+NO_STRING = -1
+
+# estimate_nbytes()에서 쓰는 CPython 객체 크기 어림값 (64비트 기준)
+_ENTRY_OVERHEAD = 100   # dict 슬롯 + int 키
+_STR_OVERHEAD = 49
+_LIST_OVERHEAD = 72
+_DICT_OVERHEAD = 232
+
+class CellColumns:
+    """
+    사각 영역(블럭)의 셀 속성을 열(column) 단위로 보관하는 저장소.
+
+    - 모든 셀이 가지는 고정 폭 속성(terrain, flags, status,
+      light_level, timestamp)은 NumPy 배열 하나씩에 담는다.
+    - zone_id / effect_id / event_id 문자열은 블럭 단위 문자열 테이블에
+      인터닝하고 배열에는 int16 코드만 저장한다. (없음 = -1)
+    - npc_ids / items / owner_npc_id / custom_data 처럼 대부분의 셀이
+      비어 있는 속성은 `인덱스 -> 값` 희소 테이블에만 둔다.
+
+    셀 인덱스는 행 우선 순서이다. index = (y - y0) * size + (x - x0)
+
+    변경 추적: GridCell을 통한 쓰기는 dirty_cells에 인덱스를 남긴다.
+    열 전체를 한 번에 고친 경우는 dirty_all로 표시한다.
+    flags는 실행 중에만 의미 있는 표시라서 저장용으로는 표시하지 않고
+    (mark_render_dirty) 파일에도 0으로 쓴다. npc_ids와 status는 블럭을
+    다시 로딩할 때 NPC를 만드는 근거이므로 다른 속성처럼 저장한다.
+    새로 생성했거나 디스크에서 읽은 직후에는 깨끗한(clean) 상태이다.
+
+    화면 갱신용 변경 추적(render_dirty)은 저장용과 따로 비운다.
+    take_render_dirty()를 처음 부르기 전까지는 전체가 바뀐 것으로 본다.
+    """
+
+    # 화면 갱신용 변경 추적. __new__로 만든 경우도 있으므로 클래스 기본값을 둔다.
+    render_all = True
+    render_dirty: set[int] | None = None
+    # terrain이 바뀔 때마다 오른다. (미리 그려 둔 terrain 타일 무효화용)
+    terrain_version = 0
+    # 저장용으로 바뀌면 한 번 부른다. (estimate_nbytes()가 달라졌을 수 있다)
+    # 다시 알림을 받으려면 size_changed를 False로 되돌린다.
+    on_size_changed: Callable[[], None] | None = None
+    size_changed = False
+
+    def __init__(self, x0: int, y0: int, size: int):
+        self.x0 = x0
+        self.y0 = y0
+        self.size = size
+
+        n = size * size
+        self.terrain = np.zeros(n, dtype=np.uint8)
+        self.flags = np.zeros(n, dtype=np.uint8)
+        self.status = np.zeros(n, dtype=np.uint8)
+        self.light_level = np.ones(n, dtype=np.float32)
+        self.timestamp = np.zeros(n, dtype=np.float64)
+
+        self.zone_code = np.full(n, NO_STRING, dtype=np.int16)
+        self.effect_code = np.full(n, NO_STRING, dtype=np.int16)
+        self.event_code = np.full(n, NO_STRING, dtype=np.int16)
+
+        self.strings: list[str] = []
+        self._string_codes: dict[str, int] = {}
+
+        self.npc_ids: dict[int, list[str]] = {}
+        self.items: dict[int, list[str]] = {}
+        self.owner_npc_id: dict[int, str] = {}
+        self.custom_data: dict[int, dict[str, Any]] = {}
+
+        self.dirty_cells: set[int] = set()
+        self.dirty_all = False
+
+    def __len__(self) -> int:
+        return self.size * self.size
+
+    def contains(self, x: int, y: int) -> bool:
+        return (self.x0 <= x < self.x0 + self.size and
+                self.y0 <= y < self.y0 + self.size)
+
+    def index_of(self, x: int, y: int) -> int:
+        return (y - self.y0) * self.size + (x - self.x0)
+
+    def coord_of(self, index: int) -> tuple[int, int]:
+        dy, dx = divmod(index, self.size)
+        return (self.x0 + dx, self.y0 + dy)
+
+    def intern(self, value: Optional[str]) -> int:
+        """문자열을 테이블에 등록하고 코드를 반환한다. None은 -1"""
+        if value is None:
+            return NO_STRING
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self._string_codes[value] = code
+        return code
+
+    def string_at(self, code: int) -> Optional[str]:
+        if code < 0:
+            return None
+        return self.strings[code]
+
+    def set_strings(self, strings: list[str]):
+        """문자열 테이블을 통째로 교체한다. (코드 배열과 함께 로딩할 때)"""
+        self.strings = list(strings)
+        self._string_codes = {s: i for i, s in enumerate(self.strings)}
+
+    def grid(self, column: np.ndarray) -> np.ndarray:
+        """1차원 열을 (size, size) 2차원 뷰로 바꾼다. [dy, dx] 순서"""
+        return column.reshape(self.size, self.size)
+
+    # ───── 변경 추적 ─────
+    def mark_dirty(self, index: int):
+        self.dirty_cells.add(index)
+        if not self.render_all:
+            self.render_dirty.add(index)
+        if not self.size_changed:
+            self._notify_size_changed()
+
+    def mark_render_dirty(self, index: int):
+        """화면 갱신에만 반영하고 저장 대상으로는 표시하지 않는다."""
+        if not self.render_all:
+            self.render_dirty.add(index)
+
+    def mark_all_dirty(self):
+        self.dirty_all = True
+        self.render_all = True
+        self.terrain_version += 1
+        if not self.size_changed:
+            self._notify_size_changed()
+
+    def _notify_size_changed(self):
+        self.size_changed = True
+        if self.on_size_changed is not None:
+            self.on_size_changed()
+
+    def take_render_dirty(self) -> set[int] | None:
+        """
+        마지막 호출 이후 바뀐 셀 인덱스를 돌려주고 비운다.
+        전부 다시 그려야 하면 None
+        """
+        dirty = None if self.render_all else self.render_dirty
+        self.render_all = False
+        self.render_dirty = set()
+        return dirty
+
+    def is_dirty(self) -> bool:
+        return self.dirty_all or bool(self.dirty_cells)
+
+    def clear_dirty(self):
+        self.dirty_cells.clear()
+        self.dirty_all = False
+
+    def dirty_row_range(self) -> tuple[int, int] | None:
+        """변경된 셀이 걸친 행 범위 [first, last] (dy 기준), 없으면 None"""
+        if self.dirty_all:
+            return (0, self.size - 1)
+        if not self.dirty_cells:
+            return None
+        return (min(self.dirty_cells) // self.size,
+                max(self.dirty_cells) // self.size)
+
+    def estimate_nbytes(self) -> int:
+        """
+        메모리 사용량 추정치(바이트).
+        배열은 정확한 크기, 희소 테이블은 항목 수와 문자열 길이로 어림한다.
+        """
+        total = sum(getattr(self, name).nbytes for name in (
+            "terrain", "flags", "status", "light_level",
+            "timestamp", "zone_code", "effect_code", "event_code"))
+
+        total += sum(_STR_OVERHEAD + len(s) for s in self.strings)
+        for table in (self.npc_ids, self.items):
+            for values in table.values():
+                total += _ENTRY_OVERHEAD + _LIST_OVERHEAD
+                total += sum(_STR_OVERHEAD + len(v) for v in values)
+        for value in self.owner_npc_id.values():
+            total += _ENTRY_OVERHEAD + _STR_OVERHEAD + len(value)
+        for data in self.custom_data.values():
+            total += _ENTRY_OVERHEAD + _DICT_OVERHEAD
+            total += _ENTRY_OVERHEAD * len(data)
+        return total
+
+    def copy(self) -> "CellColumns":
+        """배열과 희소 테이블을 모두 복사한 스냅샷 (변경 추적 상태 포함)"""
+        other = CellColumns.__new__(CellColumns)
+        other.x0 = self.x0
+        other.y0 = self.y0
+        other.size = self.size
+        for name in ("terrain", "flags", "status", "light_level",
+                     "timestamp", "zone_code", "effect_code", "event_code"):
+            setattr(other, name, np.array(getattr(self, name), copy=True))
+
+        other.set_strings(self.strings)
+        other.npc_ids = {i: list(v) for i, v in self.npc_ids.items()}
+        other.items = {i: list(v) for i, v in self.items.items()}
+        other.owner_npc_id = dict(self.owner_npc_id)
+        other.custom_data = {i: dict(v) for i, v in self.custom_data.items()}
+
+        other.dirty_cells = set(self.dirty_cells)
+        other.dirty_all = self.dirty_all
+        return other
+
+    def clear_cell(self, index: int):
+        self.npc_ids.pop(index, None)
+        self.items.pop(index, None)
+        self.owner_npc_id.pop(index, None)
+        self.custom_data.pop(index, None)
+
+        self.zone_code[index] = NO_STRING
+        self.effect_code[index] = NO_STRING
+        self.event_code[index] = NO_STRING
+        self.mark_dirty(index)
+
+    def close(self):
+        """배열과 희소 테이블을 모두 해제한다. 이후 크기는 0이 된다."""
+        self.size = 0
+        for name in ("terrain", "flags", "status", "light_level",
+                     "timestamp", "zone_code", "effect_code", "event_code"):
+            column: np.ndarray = getattr(self, name)
+            setattr(self, name, column[:0].copy())
+
+        self.strings.clear()
+        self._string_codes.clear()
+        self.npc_ids.clear()
+        self.items.clear()
+        self.owner_npc_id.clear()
+        self.custom_data.clear()
+        self.clear_dirty()
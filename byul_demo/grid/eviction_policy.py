@@ -0,0 +1,97 @@
+from PySide6.QtCore import QRect
+
+from utils.route_changing_detector import RouteChangingDetector
+
+class EvictionPolicy:
+    """
+    블럭 캐시가 예산을 넘었을 때 내보낼 블럭을 고르는 정책.
+
+    select()는 후보 키 목록(오래된 것부터, LRU 순서)을 받아서
+    내보낼 키 하나를 반환한다. 후보에는 화면에 보이는 블럭과
+    방금 로딩된 블럭이 이미 빠져 있다.
+    """
+
+    def select(self, keys: list[tuple], viewport: QRect | None,
+               block_size: int) -> tuple | None:
+        raise NotImplementedError
+
+class LRUEvictionPolicy(EvictionPolicy):
+    """가장 오래 안 쓴 블럭부터 내보낸다."""
+
+    def select(self, keys, viewport, block_size):
+        return keys[0] if keys else None
+
+class ViewportDistanceEvictionPolicy(EvictionPolicy):
+    """
+    최근 사용 순위(오래될수록 1)와 화면 중심까지의 거리(멀수록 1)를
+    가중합해서 점수가 가장 큰 블럭을 내보낸다.
+    거리는 블럭 단위 체비쇼프 거리이다.
+    """
+
+    def __init__(self, recency_weight: float = 1.0,
+                 distance_weight: float = 1.0):
+        self.recency_weight = recency_weight
+        self.distance_weight = distance_weight
+
+    def select(self, keys, viewport, block_size):
+        if not keys:
+            return None
+        if viewport is None:
+            return keys[0]
+
+        center = viewport.center()
+        cbx = center.x() // block_size
+        cby = center.y() // block_size
+
+        last = max(len(keys) - 1, 1)
+        scores = []
+        for rank, key in enumerate(keys):
+            bx = key[0] // block_size - cbx
+            by = key[1] // block_size - cby
+            scores.append((rank / last, self.block_cost(bx, by)))
+
+        max_cost = max(cost for _, cost in scores) or 1.0
+
+        best_key = None
+        best_score = None
+        for key, (recency, cost) in zip(keys, scores):
+            score = (self.recency_weight * (1.0 - recency) +
+                     self.distance_weight * cost / max_cost)
+            if best_score is None or score > best_score:
+                best_key = key
+                best_score = score
+        return best_key
+
+    def block_cost(self, bx: int, by: int) -> float:
+        """화면 중심 블럭 기준 (bx, by) 블럭을 내보내는 것이 좋은 정도"""
+        return float(max(abs(bx), abs(by)))
+
+class DirectionalEvictionPolicy(ViewportDistanceEvictionPolicy):
+    """
+    이동 방향을 고려한다. RouteChangingDetector의 평균 진행 방향 뒤쪽에
+    있는 블럭을 먼저 내보내고, 앞쪽 블럭은 거리가 멀어도 오래 남긴다.
+    진행 방향이 없으면(정지) 거리 기반 정책과 같다.
+    """
+
+    def __init__(self, detector: RouteChangingDetector,
+                 recency_weight: float = 1.0, distance_weight: float = 1.0,
+                 behind_weight: float = 1.0):
+        super().__init__(recency_weight, distance_weight)
+        self.detector = detector
+        self.behind_weight = behind_weight
+        self._heading = None
+
+    def select(self, keys, viewport, block_size):
+        self._heading = self.detector.get_heading()
+        return super().select(keys, viewport, block_size)
+
+    def block_cost(self, bx, by):
+        dist = super().block_cost(bx, by)
+        heading = self._heading
+        if heading is None or dist == 0:
+            return dist
+
+        # 진행 방향과의 코사인 : 앞 = 1, 뒤 = -1
+        norm = (bx * bx + by * by) ** 0.5
+        cos = (bx * heading[0] + by * heading[1]) / norm
+        return max(0.0, dist * (1.0 - self.behind_weight * cos))
@@ -15,19 +15,135 @@ from pathlib import Path
 
 from PySide6.QtCore import QThread, Signal
 
-from grid.grid_cell import GridCell, TerrainType
+from grid.grid_cell import GridCell, TerrainType, CellFlag
+from grid.cell_columns import CellColumns
+from grid.block_generator import generate_block_columns
+from grid.block_file import (
+    BLOCK_FILE_SUFFIX, block_file_path, read_columns_file, write_columns_file
+)
 
 from utils.log_to_panel import g_logger
 
 import random
 
+import numpy as np
+
+class BlockCells:
+    """
+    GridBlock.cells 호환용 매핑 뷰.
+    기존의 dict[tuple, GridCell]처럼 쓸 수 있지만 셀을 저장하지 않고,
+    접근할 때마다 CellColumns 위에 GridCell 뷰를 만들어 돌려준다.
+    """
+    def __init__(self, block: "GridBlock"):
+        self._block = block
+
+    def get(self, pos: tuple[int,int], default=None) -> GridCell | None:
+        cell = self._block.cell_at(pos[0], pos[1])
+        return cell if cell is not None else default
+
+    def __getitem__(self, pos: tuple[int,int]) -> GridCell:
+        cell = self._block.cell_at(pos[0], pos[1])
+        if cell is None:
+            raise KeyError(pos)
+        return cell
+
+    def __setitem__(self, pos: tuple[int,int], cell: GridCell):
+        self._block.put_cell(cell, pos)
+
+    def __contains__(self, pos) -> bool:
+        return self._block.columns.contains(pos[0], pos[1])
+
+    def __len__(self) -> int:
+        return len(self._block.columns)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        cols = self._block.columns
+        for index in range(len(cols)):
+            yield cols.coord_of(index)
+
+    def values(self):
+        cols = self._block.columns
+        for index in range(len(cols)):
+            x, y = cols.coord_of(index)
+            yield GridCell.view(cols, index, x, y)
+
+    def items(self):
+        for cell in self.values():
+            yield (cell.x, cell.y), cell
+
+    def clear(self):
+        self._block.columns.close()
+
 class GridBlock:
+    """
+    block_size x block_size 셀을 열 단위(CellColumns)로 보관하는 블럭.
+    셀 객체는 저장하지 않으며 cell_at()/cells 접근 시 뷰로 만들어진다.
+    """
     def __init__(self, x0: int, y0: int, block_size: int = 100,
-                 cells: dict[tuple, GridCell] = None):
+                 cells: dict[tuple, GridCell] = None,
+                 columns: CellColumns = None):
         self.x0 = x0
         self.y0 = y0
         self.block_size = block_size
-        self.cells: dict[tuple, GridCell] = cells if cells is not None else {}
+        self.columns = (columns if columns is not None
+                        else CellColumns(x0, y0, block_size))
+
+        if cells:
+            for pos, cell in cells.items():
+                self.put_cell(cell, pos)
+
+    @property
+    def cells(self) -> BlockCells:
+        return BlockCells(self)
+
+    def cell_at(self, x: int, y: int) -> GridCell | None:
+        cols = self.columns
+        dx = x - self.x0
+        dy = y - self.y0
+        size = cols.size
+        if 0 <= dx < size and 0 <= dy < size:
+            return GridCell.view(cols, dy * size + dx, x, y)
+        return None
+
+    def put_cell(self, cell: GridCell, pos: tuple[int,int] = None):
+        """외부에서 만든 셀의 값을 블럭 저장소에 복사한다."""
+        x, y = pos if pos is not None else (cell.x, cell.y)
+        cols = self.columns
+        if not cols.contains(x, y):
+            raise KeyError((x, y))
+
+        index = cols.index_of(x, y)
+        if cell.is_view_of(cols, index):
+            return  # 이미 이 블럭의 셀 뷰이다.
+        cell.copy_to(cols, index)
+
+    def npc_cells(self):
+        """NPC가 있는 셀만 ((x, y), npc_ids) 형태로 순회한다."""
+        cols = self.columns
+        for index, npc_ids in list(cols.npc_ids.items()):
+            yield cols.coord_of(index), npc_ids
+
+    def remove_flag_all(self, flag: CellFlag):
+        """블럭의 모든 셀에서 flag를 한 번에 제거한다."""
+        cols = self.columns
+        flags = cols.flags
+        marked = np.flatnonzero(flags & flag.value)
+        if marked.size:
+            flags &= np.uint8(0xFF ^ flag.value)
+            # flags는 런타임 표시라 저장/terrain_version과 무관하다.
+            for index in marked.tolist():
+                cols.mark_render_dirty(index)
+
+    def is_dirty(self) -> bool:
+        """생성/로딩 이후 셀이 바뀌었으면 True"""
+        return self.columns.is_dirty()
+
+    def estimate_nbytes(self) -> int:
+        """블럭이 차지하는 메모리 추정치(바이트)"""
+        return self.columns.estimate_nbytes()
 
     def to_dict(self) -> dict:
         return {
@@ -44,6 +160,32 @@ class GridBlock:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
 
+    def to_file(self, folder: str) -> Path:
+        """바이너리 블럭 파일(block_{x0}_{y0}.byb)로 저장한다."""
+        path = block_file_path(folder, self.x0, self.y0)
+        return write_columns_file(self.columns, path)
+
+    @classmethod
+    def from_file(cls, path, mmap: bool = True) -> "GridBlock":
+        """
+        바이너리 블럭 파일을 읽는다.
+        mmap=True면 고정 폭 열이 메모리 매핑되어 필요한 부분만 읽힌다.
+        """
+        cols = read_columns_file(path, mmap=mmap)
+        return cls(cols.x0, cols.y0, cols.size, columns=cols)
+
+    @classmethod
+    def from_json(cls, path) -> "GridBlock":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def load(cls, path) -> "GridBlock":
+        """확장자(.json / .byb)에 따라 블럭 파일을 읽는다."""
+        if Path(path).suffix == BLOCK_FILE_SUFFIX:
+            return cls.from_file(path)
+        return cls.from_json(path)
+
     @classmethod
     def from_dict(cls, data: dict):
         x0 = data["x0"]
@@ -51,17 +193,16 @@ class GridBlock:
         block_size = data["block_size"]
         raw_cells = data["cells"]
 
-        cell_dict: dict[tuple, GridCell] = {}
+        block = cls(x0, y0, block_size)
         for raw in raw_cells:
-            cell = GridCell.from_dict(raw)
-            cell_dict[(cell.x, cell.y)] = cell
+            cell = block.cell_at(raw["x"], raw["y"])
+            if cell is not None:
+                cell.update_from_dict(raw)
 
-        return cls(x0, y0, block_size, cell_dict)
+        return block
 
     def close(self):
-        for cell in self.cells.values():
-            cell.close()
-        self.cells.clear()
+        self.columns.close()
 
     def get_origin(self) -> tuple[int,int]:
         return (self.x0, self.y0)
@@ -70,16 +211,28 @@ class GridBlock:
         return self.cells[pos]
 
     def __setitem__(self, pos: tuple[int,int], cell: GridCell):
-        self.cells[pos] = cell
+        self.put_cell(cell, pos)
 
     def __contains__(self, pos: tuple[int,int]) -> bool:
-        return pos in self.cells
+        return self.columns.contains(pos[0], pos[1])
 
     def __len__(self) -> int:
-        return len(self.cells)
+        return len(self.columns)
 
     def __iter__(self):
-        return iter(self.cells.items())
+        return self.cells.items()
+
+def convert_json_to_block_file(json_path, folder=None) -> Path:
+    """기존 JSON 블럭 파일을 바이너리 블럭 파일로 변환한다."""
+    block = GridBlock.from_json(json_path)
+    return block.to_file(folder or Path(json_path).parent)
+
+def convert_block_file_to_json(path, folder=None) -> Path:
+    """바이너리 블럭 파일을 기존 JSON 형식으로 변환한다."""
+    block = GridBlock.from_file(path, mmap=False)
+    folder = Path(folder or Path(path).parent)
+    block.to_json(folder)
+    return folder / f"block_{block.x0}_{block.y0}.json"
 
 class BlockThread(QThread):
     succeeded = Signal(tuple)
@@ -105,18 +258,20 @@ class BlockSaverThread(QThread):
     succeeded = Signal(tuple)
     failed = Signal(tuple)
 
-    def __init__(self, block: GridBlock, folder: str):
+    def __init__(self, block: GridBlock, folder: str, binary: bool = True):
+        """binary=False면 기존 JSON 형식으로 저장한다."""
         super().__init__()
         self.block = block
         self.folder = Path(folder)
+        self.binary = binary
 
     def run(self):
         origin = self.block.get_origin()
         try:
-            self.folder.mkdir(parents=True, exist_ok=True)
-            path = self.folder / f"block_{self.block.x0}_{self.block.y0}.json"
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(self.block.to_dict(), f, indent=4, ensure_ascii=False)
+            if self.binary:
+                self.block.to_file(self.folder)
+            else:
+                self.block.to_json(self.folder)
             self.succeeded.emit(origin)
         except Exception as e:
             g_logger.log_debug_threadsafe(f"[\u274c 블럭 저장 실패] {origin}: {e}")
@@ -132,10 +287,8 @@ class BlockLoaderThread(QThread):
 
     def run(self):
         try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                block = GridBlock.from_dict(data)
-                self.succeeded.emit(block)
+            block = GridBlock.load(self.path)
+            self.succeeded.emit(block)
         except Exception as e:
             g_logger.log_debug_threadsafe(f"[\u274c 블럭 로딩 실패] {self.path}: {e}")
             self.failed.emit(str(self.path))
@@ -147,41 +300,34 @@ class BlockMaker(GridBlock):
         block_size: int = 100,
         make_cell_func: tuple[tuple[int, int], GridCell] = None,
         cells: dict = None,
+        world_seed: int = 0,
     ):
         """
         make_cell_func: 셀을 생성하는 함수 (x, y) -> GridCell
+            None이면 (x0, y0, world_seed) 시드로 블럭 전체를
+            generate_block_columns()가 한 번에 생성한다.
         """
         self.block_size = block_size
-        self.make_cell_func = make_cell_func or self._default_make_cell
+        self.make_cell_func = make_cell_func
+        self.world_seed = world_seed
+
+        columns = None
+        if cells is None and make_cell_func is None:
+            columns = generate_block_columns(
+                x0, y0, block_size, world_seed=world_seed)
 
-        if cells is None:
-            cells = self._generate_cells(x0, y0)
+        super().__init__(x0, y0, block_size, cells, columns)
 
-        super().__init__(x0, y0, block_size, cells)
+        if cells is None and make_cell_func is not None:
+            self._generate_cells(x0, y0)
 
-    def _generate_cells(self, x0: int, y0: int) -> dict:
-        result = {}
+    def _generate_cells(self, x0: int, y0: int):
+        cols = self.columns
         for dy in range(self.block_size):
             for dx in range(self.block_size):
                 x = x0 + dx
                 y = y0 + dy
-                result[(x, y)] = self.make_cell_func(x, y)
-        return result
-
-    def _default_make_cell(self, x: int, y: int) -> GridCell:
-        # 기본 지형 랜덤 생성 (외부 지식 없이 내부적으로만 처리)
-        # terrain = random.choices(
-        #     population=[
-        #         TerrainType.NORMAL,
-        #         TerrainType.FOREST,
-        #         TerrainType.MOUNTAIN,
-        #         TerrainType.WATER,
-        #         TerrainType.FORBIDDEN
-        #     ],
-        #     weights=[0.5, 0.2, 0.1, 0.1, 0.1]
-        # )[0]
-        # return GridCell(x=x, y=y, terrain=terrain)
-        return GridCell.random(x=x, y=y, npc_chance=0.05)
+                self.make_cell_func(x, y).copy_to(cols, cols.index_of(x, y))
 
 class BlockMakerThread(QThread):
     succeeded = Signal(tuple, BlockMaker)
@@ -191,12 +337,14 @@ class BlockMakerThread(QThread):
     def __init__(self,
                  x0: int, y0: int,
                  block_size: int = 100,
-                 make_cell_func: tuple[tuple[int, int], GridCell] = None):
+                 make_cell_func: tuple[tuple[int, int], GridCell] = None,
+                 world_seed: int = 0):
         super().__init__()
         self.x0 = x0
         self.y0 = y0
         self.block_size = block_size
         self.make_cell_func = make_cell_func
+        self.world_seed = world_seed
         self.result: BlockMaker | None = None
 
     def run(self):
@@ -205,7 +353,8 @@ class BlockMakerThread(QThread):
                 x0=self.x0,
                 y0=self.y0,
                 block_size=self.block_size,
-                make_cell_func=self.make_cell_func
+                make_cell_func=self.make_cell_func,
+                world_seed=self.world_seed
             )
             self.result = block
             self.succeeded.emit((self.x0, self.y0), block)
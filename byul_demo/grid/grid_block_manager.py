@@ -1,5 +1,4 @@
 from pathlib import Path
-import json
 
 from collections import OrderedDict, deque
 
@@ -7,9 +6,18 @@ from utils.log_to_panel import g_logger
 
 from PySide6.QtCore import QObject, QRect, Signal, QTimer
 
-from grid.grid_block import GridBlock, BlockMakerThread
+from grid.grid_block import GridBlock
+from grid.block_executor import BlockExecutor, ThreadBlockExecutor
+from grid.region_file import RegionStore
+from grid.block_flusher import BlockFlusher
+from grid.block_spill_cache import BlockSpillCache
+from grid.eviction_policy import (
+    EvictionPolicy, ViewportDistanceEvictionPolicy
+)
 from grid.grid_cell import GridCell
 
+from utils.memory_usage import get_memory_usage_mb
+
 import time
 
 from threading import Lock
@@ -19,17 +27,70 @@ class GridBlockManager(QObject):
     
     load_block_succeeded = Signal(tuple)
 
-    def __init__(self, block_size=100, max_blocks = 18, max_parallel = 2):
+    def __init__(self, block_size=100, max_blocks = 18, max_parallel = 2,
+                 world_seed = 0, executor: BlockExecutor | None = None,
+                 spill_max_bytes = 64 * 1024 * 1024,
+                 max_cache_bytes: int | None = None):
+        """
+        executor: 블럭 생성 실행기. None이면 max_parallel개의
+            BlockMakerThread를 쓰는 ThreadBlockExecutor를 사용한다.
+            ProcessBlockExecutor를 넘기면 워커 프로세스에서 생성한다.
+        spill_max_bytes: 축출된 블럭을 압축해 보관하는 2차 캐시의
+            예산(압축 후 바이트). 0이면 2차 캐시를 쓰지 않는다.
+        max_cache_bytes: 1차 캐시의 메모리 예산(블럭 크기 추정치 합).
+            None이면 max_blocks 개수로만 제한한다.
+            max_blocks=None이면 개수 제한 없이 예산으로만 제한한다.
+        """
         super().__init__()
 
         self.block_size = block_size
+        # 같은 시드와 좌표는 항상 같은 블럭을 생성한다.
+        self.world_seed = world_seed
         self.max_blocks = max_blocks
         self.max_parallel = max_parallel
 
         self.block_cache: OrderedDict[tuple, GridBlock] = OrderedDict()
         self._cache_lock = Lock()        
+
+        # 메모리 예산 : 블럭별 크기 추정치와 그 합
+        self.max_cache_bytes = max_cache_bytes
+        self.cache_bytes = 0
+        self._block_bytes: dict[tuple, int] = {}
+        # 마지막 추정 이후 셀이 바뀐 블럭 (CellColumns.on_size_changed로 받는다)
+        self._resized_keys: set[tuple] = set()
+
+        # RSS 피드백 (MB). 프로세스 메모리가 이 값을 넘으면 예산과 상관없이
+        # 블럭을 하나씩 더 내보낸다. None이면 사용하지 않는다.
+        self.memory_limit_mb: float | None = None
+
+        # 축출 정책. 화면(viewport)에 걸친 블럭은 정책과 상관없이 보호된다.
+        self.eviction_policy: EvictionPolicy = ViewportDistanceEvictionPolicy()
+        self.viewport: QRect | None = None
+        self._visible_keys: set[tuple] = set()
+
+        # 스래싱 : 축출된 뒤 thrash_window_sec 안에 다시 요청된 블럭
+        self.thrash_window_sec = 10.0
+        self.eviction_count = 0
+        self.thrash_count = 0
+        self._evicted_at: OrderedDict[tuple, float] = OrderedDict()
+
+        # 2차 캐시 : 축출된 블럭을 압축해서 들고 있다가 재방문시 바로 복원한다.
+        self.spill_cache = BlockSpillCache(spill_max_bytes)
+
+        # 블럭 요청 통계
+        # hit: 이미 1차 캐시에 있음, rehydrate: 메모리(2차 캐시/저장 큐)에서 복원,
+        # miss: 실행기로 생성 또는 디스크 로딩
+        # 블럭이 캐시에 들어온 뒤 첫 요청만 센다. 화면에 보이는 블럭은 매 프레임
+        # 다시 요청되므로 그것까지 세면 hit_rate가 부풀려진다.
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_rehydrates = 0
+        # 캐시에 들어온 뒤 이미 통계에 잡힌 블럭
+        self._counted_keys: set[tuple] = set()
         
-        self._active_threads: dict[tuple, BlockMakerThread] = {}
+        self.block_executor: BlockExecutor = None
+        self.set_block_executor(
+            executor or ThreadBlockExecutor(max_parallel))
 
         self.loading_queue: deque[tuple] = deque()
 
@@ -37,11 +98,33 @@ class GridBlockManager(QObject):
         # 집합으로 중복 값을 확인한다.
         self.loading_set: set[tuple] = set()
 
+        # 예측 로딩(prefetch) 큐. 요청(demand) 큐가 빌 때만 처리되며
+        # 실행기 자리도 prefetch_max_inflight개까지만 쓴다.
+        self.prefetch_queue: deque[tuple] = deque()
+        self.prefetch_set: set[tuple] = set()
+        self._prefetch_inflight: set[tuple] = set()
+        self.prefetch_max_inflight = max(1, self.max_parallel // 2)
+        self.prefetch_count = 0
+        self.prefetch_cancelled = 0
+
+        # 블럭 로딩 지연 (submit -> 완료) 이동 평균. 예측 거리 계산에 쓴다.
+        self.load_latency_sec = 0.05
+        self._submit_times: dict[tuple, float] = {}
+
         self._pending_timer = False
 
         self.on_after_block_loaded = None
         self.on_before_block_evicted = None
 
+        # 블럭 영속 저장소 (없으면 블럭은 항상 시드로 새로 생성된다)
+        self.region_store: RegionStore | None = None
+
+        # 변경된 블럭의 지연 저장 (write-behind)
+        # 축출되는 dirty 블럭과 주기적 flush 스냅샷을 백그라운드에서 기록한다.
+        self.block_flusher: BlockFlusher | None = None
+        self._flush_timer = QTimer(self)
+        self._flush_timer.timeout.connect(self.flush_dirty_blocks)
+
     def reset(self):
         """모든 블록 상태, 캐시, 쓰레드, 큐를 초기화한다."""
         with self._cache_lock:
@@ -55,24 +138,131 @@ class GridBlockManager(QObject):
                     g_logger.log_debug(f"[GridBlockManager] 블록({key}) close 중 예외: {e}")
 
             self.block_cache.clear()
-
-        # 쓰레드 정리
-        for key, thread in list(self._active_threads.items()):
-            try:
-                thread.stop()  # BlockMakerThread가 stop() 지원하는 경우
-            except Exception as e:
-                g_logger.log_debug(f"[GridBlockManager] 쓰레드({key}) 중단 중 예외: {e}")
-        self._active_threads.clear()
+            self._block_bytes.clear()
+            self._resized_keys.clear()
+            self.cache_bytes = 0
+            self.spill_cache.clear()
+            self._evicted_at.clear()
+            self._counted_keys.clear()
+
+        # 진행 중인 블럭 생성 취소
+        try:
+            self.block_executor.cancel_all()
+        except Exception as e:
+            g_logger.log_debug(f"[GridBlockManager] 블럭 생성 취소 중 예외: {e}")
 
         # 대기 큐 및 중복 확인 세트 초기화
         self.loading_queue.clear()
         self.loading_set.clear()
+        self.prefetch_queue.clear()
+        self.prefetch_set.clear()
+        self._prefetch_inflight.clear()
+        self._submit_times.clear()
 
         # 타이머 플래그 초기화
         self._pending_timer = False
 
         g_logger.log_debug("[GridBlockManager] 상태 초기화 완료")
 
+    def set_block_executor(self, executor: BlockExecutor):
+        """블럭 생성 실행기를 교체한다. 이전 실행기는 종료된다."""
+        old = self.block_executor
+        if old is not None:
+            old.block_ready.disconnect(self._on_load_block_succeeded)
+            old.block_failed.disconnect(self._on_load_block_failed)
+            old.shutdown()
+            # 이전 실행기에서 진행 중이던 블럭은 다시 요청해야 한다.
+            self.loading_set.clear()
+            self.loading_queue.clear()
+            self.prefetch_queue.clear()
+            self.prefetch_set.clear()
+            self._prefetch_inflight.clear()
+            self._submit_times.clear()
+
+        self.block_executor = executor
+        self.max_parallel = executor.max_parallel
+        self.prefetch_max_inflight = max(1, self.max_parallel // 2)
+        executor.block_ready.connect(self._on_load_block_succeeded)
+        executor.block_failed.connect(self._on_load_block_failed)
+
+    def set_region_store(self, store: RegionStore | None):
+        """
+        리전 파일 저장소를 연결한다.
+        연결되면 블럭 로딩 시 저장된 블럭을 먼저 읽고, 없을 때만 생성한다.
+        """
+        if store is not None and store.block_size != self.block_size:
+            raise ValueError(
+                f"Block size mismatch: expected {self.block_size}, "
+                f"got {store.block_size}")
+        if self.region_store is store:
+            return
+        if self.block_flusher is not None:
+            self.block_flusher.stop(flush=True)
+            self.block_flusher = None
+        if self.region_store is not None:
+            self.region_store.close()
+
+        self.region_store = store
+        if store is not None:
+            self.block_flusher = BlockFlusher(store)
+        else:
+            self._flush_timer.stop()
+
+    def set_flush_interval(self, msec: int):
+        """
+        dirty 블럭을 주기적으로 저장하는 간격. 0이면 주기 저장을 끈다.
+        (축출되는 dirty 블럭은 간격과 상관없이 항상 저장된다)
+        """
+        if msec > 0:
+            self._flush_timer.start(msec)
+        else:
+            self._flush_timer.stop()
+
+    def flush_dirty_blocks(self) -> int:
+        """
+        로드된 dirty 블럭의 스냅샷을 백그라운드 저장에 넘긴다.
+        넘긴 블럭 수를 반환한다.
+        """
+        if self.block_flusher is None:
+            return 0
+
+        count = 0
+        with self._cache_lock:
+            for key, block in self.block_cache.items():
+                if not block.is_dirty():
+                    continue
+                self._update_block_bytes(key, block)
+                snapshot = block.columns.copy()
+                block.columns.clear_dirty()
+                self.block_flusher.enqueue(key, snapshot, close_after=True)
+                count += 1
+        return count
+
+    def _region_spec(self) -> tuple | None:
+        store = self.region_store
+        if store is None:
+            return None
+        return (str(store.folder), store.region_blocks)
+
+    def save_block(self, key: tuple) -> bool:
+        """로드된 블럭 하나를 리전 저장소에 저장한다."""
+        block = self.block_cache.get(key)
+        if block is None or self.region_store is None:
+            return False
+        self.region_store.save_block(block)
+        block.columns.clear_dirty()
+        return True
+
+    def shutdown(self):
+        self._flush_timer.stop()
+        self.block_executor.shutdown()
+        if self.block_flusher is not None:
+            self.flush_dirty_blocks()
+            self.block_flusher.stop(flush=True)
+            self.block_flusher = None
+        if self.region_store is not None:
+            self.region_store.close()
+
     def get_origin(self, coord:tuple) -> tuple[int,int]:
         return (
             (coord[0] // self.block_size) * self.block_size,
@@ -88,30 +278,69 @@ class GridBlockManager(QObject):
         key = self.get_origin(coord)
 
         block = self.block_cache.get(key)
-        if block:
-            dx = coord[0] - key[0]
-            dy = coord[1] - key[1]            
-            cell = block.cells.get((dx+key[0], dy+key[1]))
-            if cell:
-                return cell
+        if block is not None:
+            return block.cell_at(coord[0], coord[1])
             
         return None
     
     def set_cell(self, key:tuple, cell:GridCell):
         block = self.block_cache[key]
-        block.cells[(cell.x, cell.y)] = cell
+        block.put_cell(cell)
 
     def request_load_block(self, x: int, y: int, interval_msec=5):
         key = self.get_origin((x, y))
 
-        if key in self.block_cache or key in self.loading_set:
+        if key in self.block_cache:
+            self.block_cache.move_to_end(key)
+            if key not in self._counted_keys:
+                # 예측 로딩 등으로 요청 전에 이미 들어와 있던 블럭
+                self._counted_keys.add(key)
+                self.cache_hits += 1
+            return
+        if key in self.loading_set:
             return
+        self._note_reload(key)
+        self._counted_keys.add(key)
+
+        # 예측 로딩 대기 중이던 블럭은 요청 큐로 올린다.
+        if key in self.prefetch_set:
+            self.prefetch_set.discard(key)
+            self.prefetch_queue.remove(key)
 
         g_logger.log_debug(f'블럭({key[0]}, {key[1]}) 로딩이 큐에 추가됨.')
 
         self.loading_queue.append(key)
         self.loading_set.add(key)
 
+        self._schedule_next_block(interval_msec)
+
+    def request_prefetch_block(self, x: int, y: int, interval_msec=5) -> bool:
+        """
+        곧 필요할 것으로 예상되는 블럭의 로딩을 낮은 우선순위로 요청한다.
+        이미 있거나 요청된 블럭이면 False
+        """
+        key = self.get_origin((x, y))
+        if (key in self.block_cache or key in self.loading_set or
+                key in self.prefetch_set):
+            return False
+
+        self.prefetch_queue.append(key)
+        self.prefetch_set.add(key)
+        self._schedule_next_block(interval_msec)
+        return True
+
+    def cancel_prefetch(self) -> int:
+        """
+        아직 시작하지 않은 예측 로딩을 모두 취소한다. (진행 중인 것은 그대로 둔다)
+        취소한 개수를 반환한다.
+        """
+        count = len(self.prefetch_queue)
+        self.prefetch_queue.clear()
+        self.prefetch_set.clear()
+        self.prefetch_cancelled += count
+        return count
+
+    def _schedule_next_block(self, interval_msec=5):
         if not self._pending_timer:
             self._pending_timer = True
             QTimer.singleShot(interval_msec, self._process_next_block)
@@ -119,23 +348,125 @@ class GridBlockManager(QObject):
     def _process_next_block(self, interval_msec=5):
         self._pending_timer = False
 
-        while (self.loading_queue and
-            len(self._active_threads) < self.max_parallel):
-
+        while self.loading_queue:
             key = self.loading_queue.popleft()
-            thread = BlockMakerThread(key[0], key[1], self.block_size)
-
-            thread.succeeded.connect(self._on_load_block_succeeded)
-            thread.failed.connect(self._on_load_block_failed)
-            thread.finished.connect(lambda key=key: self._finalize_thread(key))
+            if not self._start_loading(key):
+                self.loading_queue.appendleft(key)
+                break
 
-            self._active_threads[key] = thread
-            thread.start()
+        # 요청 큐가 비었을 때만 예측 로딩을 진행한다.
+        while (self.prefetch_queue and not self.loading_queue and
+               len(self._prefetch_inflight) < self.prefetch_max_inflight):
+            key = self.prefetch_queue.popleft()
+            self.prefetch_set.discard(key)
+            if key in self.block_cache or key in self.loading_set:
+                continue
+
+            self.loading_set.add(key)
+            if not self._start_loading(key, prefetch=True):
+                self.loading_set.discard(key)
+                self.prefetch_queue.appendleft(key)
+                self.prefetch_set.add(key)
+                break
 
-        if self.loading_queue and not self._pending_timer:
+        if ((self.loading_queue or self.prefetch_queue) and
+                not self._pending_timer):
             self._pending_timer = True
             QTimer.singleShot(interval_msec, self._process_next_block)
 
+    def _start_loading(self, key: tuple, prefetch: bool = False) -> bool:
+        """
+        블럭 하나의 로딩을 시작한다.
+        메모리에서 바로 복원하거나 실행기에 넘기면 True,
+        실행기에 자리가 없으면 False
+        """
+        cols = self._rehydrate_columns(key)
+        if cols is not None:
+            self.cache_rehydrates += 1
+            self._on_load_block_succeeded(
+                key, GridBlock(key[0], key[1], cols.size, columns=cols))
+            return True
+
+        if not self.block_executor.has_capacity():
+            return False
+
+        if prefetch:
+            self.prefetch_count += 1
+            self._prefetch_inflight.add(key)
+        else:
+            self.cache_misses += 1
+        self._submit_times[key] = time.perf_counter()
+        self.block_executor.submit(key, self.block_size, self.world_seed,
+                                   self._region_spec())
+        return True
+
+    def _rehydrate_columns(self, key: tuple):
+        """
+        메모리에 남아 있는 블럭 저장소를 찾는다. 없으면 None
+        아직 디스크에 기록되지 않은 저장 큐의 블럭이 2차 캐시보다 우선이다.
+        """
+        cols = None
+        if self.block_flusher is not None:
+            cols = self.block_flusher.reclaim(key)
+        if cols is not None:
+            self.spill_cache.discard(key)
+            return cols
+        return self.spill_cache.take(key)
+
+    def get_cache_stats(self) -> dict:
+        """1차/2차 캐시 크기와 요청 통계"""
+        spill = self.spill_cache
+        requests = self.cache_hits + self.cache_rehydrates + self.cache_misses
+        return {
+            "blocks": len(self.block_cache),
+            "max_blocks": self.max_blocks,
+            "cache_bytes": self.cache_bytes,
+            "max_cache_bytes": self.max_cache_bytes,
+            "spill_blocks": len(spill),
+            "spill_bytes": spill.used_bytes,
+            "spill_raw_bytes": spill.raw_bytes,
+            "spill_max_bytes": spill.max_bytes,
+            "spill_dropped": spill.dropped_count,
+            "hits": self.cache_hits,
+            "rehydrates": self.cache_rehydrates,
+            "misses": self.cache_misses,
+            "hit_rate": ((self.cache_hits + self.cache_rehydrates) / requests
+                         if requests else 0.0),
+            "prefetches": self.prefetch_count,
+            "prefetch_cancelled": self.prefetch_cancelled,
+            "load_latency_ms": self.load_latency_sec * 1000,
+            "evictions": self.eviction_count,
+            "thrashes": self.thrash_count,
+            "thrash_rate": self.get_thrash_rate(),
+        }
+
+    def get_thrash_rate(self) -> float:
+        """축출된 블럭 중 thrash_window_sec 안에 다시 요청된 비율"""
+        if not self.eviction_count:
+            return 0.0
+        return self.thrash_count / self.eviction_count
+
+    def reset_cache_stats(self):
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_rehydrates = 0
+        self.eviction_count = 0
+        self.thrash_count = 0
+        self._evicted_at.clear()
+
+    def _note_reload(self, key: tuple):
+        now = time.monotonic()
+        evicted = self._evicted_at
+        # 창을 벗어난 기록은 버린다. (오래된 것부터 들어 있다)
+        while evicted:
+            old_key, t = next(iter(evicted.items()))
+            if now - t <= self.thrash_window_sec:
+                break
+            evicted.popitem(last=False)
+
+        if evicted.pop(key, None) is not None:
+            self.thrash_count += 1
+
     def after_block_loaded(self, key: tuple, block: GridBlock):
         if self.on_after_block_loaded:
             self.on_after_block_loaded(key)
@@ -154,22 +485,25 @@ class GridBlockManager(QObject):
             self._pending_timer = True
             QTimer.singleShot(0, self._process_next_block)
 
-    def _on_load_block_succeeded(self, key: tuple):
+    def _on_load_block_succeeded(self, key: tuple, block: GridBlock):
         t0 = time.perf_counter()
 
+        self._finalize_loading(key)
+
         with self._cache_lock:
             if key in self.block_cache:
                 g_logger.log_debug(f"[load_block] ⚠️ 이미 처리된 key (중복 signal?): {key}")
-                return  # ❗ finalize_thread는 finished 시그널로 처리됨
-
-            thread = self._active_threads.get(key)
-            if not thread:
-                g_logger.log_debug(f"[load_block] ❓ 쓰레드 누락: {key}")
                 return
 
-            self.__evict_if_needed(protect_key=key)
-            self.block_cache[key] = thread.result
-            self.after_block_loaded(key, thread.result)
+            nbytes = block.estimate_nbytes()
+            self.__evict_if_needed(protect_key=key, incoming_bytes=nbytes)
+            self.block_cache[key] = block
+            self._block_bytes[key] = nbytes
+            self.cache_bytes += nbytes
+            cols = block.columns
+            cols.size_changed = False
+            cols.on_size_changed = lambda key=key: self._resized_keys.add(key)
+            self.after_block_loaded(key, block)
 
         self.load_block_succeeded.emit(key)
 
@@ -177,56 +511,152 @@ class GridBlockManager(QObject):
         g_logger.log_debug(f"🎯 load_block_succeeded : {key} : 처리 시간: {(t1 - t0)*1000:.3f}ms")
 
     def __evict_if_needed(self, 
-            protect_key: tuple | None = None, max_remove: int = 1):
-        removed = 0
-        while len(self.block_cache) > self.max_blocks and removed < max_remove:
-            for key in self.block_cache:
-                if key == protect_key:
-                    continue
+            protect_key: tuple | None = None, incoming_bytes: int = 0):
+        self._refresh_block_bytes()
 
-                old_block = self.block_cache.pop(key)
-                self.before_block_evicted(key, old_block)
-                old_block.close()
-                self.after_block_evicted(key)
+        # RSS는 블럭을 내보내도 바로 줄지 않으므로 호출당 하나만 더 내보낸다.
+        rss_over = (self.memory_limit_mb is not None and
+                    get_memory_usage_mb() > self.memory_limit_mb)
 
-                removed += 1
-                break  # 한 번에 하나만 제거하고 while 다시 검사
-            else:
+        while self._is_over_budget(incoming_bytes) or rss_over:
+            rss_over = False
+            key = self._pick_victim(protect_key)
+            if key is None:
                 g_logger.log_debug("[evict_block] 🚫 보호 대상 외에 제거할 key 없음")
                 break
+            self._evict_block(key)
+
+    def _is_over_budget(self, incoming_bytes: int = 0) -> bool:
+        if (self.max_blocks is not None and
+                len(self.block_cache) > self.max_blocks):
+            return True
+        if (self.max_cache_bytes is not None and
+                self.cache_bytes + incoming_bytes > self.max_cache_bytes):
+            return True
+        return False
 
-    def _finalize_thread(self, key: tuple, interval_msec=5):
+    def _refresh_block_bytes(self):
+        """마지막 추정 이후 셀이 바뀐 블럭만 크기 추정치를 다시 계산한다."""
+        if not self._resized_keys:
+            return
+        keys, self._resized_keys = self._resized_keys, set()
+        for key in keys:
+            block = self.block_cache.get(key)
+            if block is not None:
+                self._update_block_bytes(key, block)
+
+    def _update_block_bytes(self, key: tuple, block: GridBlock):
+        nbytes = block.estimate_nbytes()
+        self.cache_bytes += nbytes - self._block_bytes.get(key, 0)
+        self._block_bytes[key] = nbytes
+        # 다음 변경 때 다시 알림을 받는다.
+        self._resized_keys.discard(key)
+        block.columns.size_changed = False
+
+    def _pick_victim(self, protect_key: tuple | None = None) -> tuple | None:
+        """내보낼 블럭을 고른다. 화면에 보이는 블럭은 후보가 아니다."""
+        visible = self._visible_keys
+        keys = [k for k in self.block_cache
+                if k != protect_key and k not in visible]
+        if not keys:
+            return None
+        return self.eviction_policy.select(keys, self.viewport,
+                                           self.block_size)
+
+    def _evict_block(self, key: tuple):
+        old_block = self.block_cache.pop(key)
+        self.cache_bytes -= self._block_bytes.pop(key, 0)
+        self._resized_keys.discard(key)
+        old_block.columns.on_size_changed = None
+        self._counted_keys.discard(key)
+        self.eviction_count += 1
+        self._evicted_at.pop(key, None)
+        self._evicted_at[key] = time.monotonic()
+        self.before_block_evicted(key, old_block)
+        self._release_block(key, old_block)
+        self.after_block_evicted(key)
+
+    def _release_block(self, key: tuple, block: GridBlock):
+        """
+        캐시에서 빠진 블럭을 해제한다.
+        압축본은 2차 캐시에 남긴다. 변경된 블럭은 저장 큐로 넘기고,
+        기록이 끝나면 그쪽에서 해제된다.
+        """
+        flusher = self.block_flusher
+        dirty = block.is_dirty()
+        # 저장소가 있으면 dirty 블럭도 곧 기록되므로 압축본은 깨끗한 상태로 둔다.
+        self.spill_cache.put(key, block.columns,
+                             dirty=dirty and flusher is None)
+
+        if flusher is not None and dirty:
+            flusher.enqueue(key, block.columns, close_after=True)
+        else:
+            block.close()
+
+    def _finalize_loading(self, key: tuple):
         self.loading_set.discard(key)
+        self._prefetch_inflight.discard(key)
 
-        thread = self._active_threads.pop(key, None)
-        if thread:
-            thread.deleteLater()  # ❗ 메모리 안전 정리만
+        t0 = self._submit_times.pop(key, None)
+        if t0 is not None:
+            elapsed = time.perf_counter() - t0
+            self.load_latency_sec += 0.2 * (elapsed - self.load_latency_sec)
 
-        # if not self._pending_timer:
-        #     self._pending_timer = True
-        #     QTimer.singleShot(interval_msec, self._process_next_block)
+        # 실행기에 자리가 났으니 대기 중인 블럭을 이어서 처리한다.
+        if self.loading_queue or self.prefetch_queue:
+            self._on_block_ready(key)
 
     def _on_load_block_failed(self, key: tuple):
-        # 중복 처리 방어
-        if key not in self._active_threads:
-            g_logger.log_debug(
-                f"[load_block] ⚠️ 실패 시그널 중복 또는 이미 finalize됨: {key}")
-            return
-
         g_logger.log_debug(f"[load_block] ❌ 실패: {key}")
-        self._finalize_thread(key)
+        self._counted_keys.discard(key)
+        self._finalize_loading(key)
 
     def clear_block_cache(self):
         self.block_cache.clear()
+        self._block_bytes.clear()
+        self._resized_keys.clear()
+        self.cache_bytes = 0
+        self._counted_keys.clear()
 
     def set_max_blocks(self, new_max):
         """
         블록 캐시의 최대 개수를 동적으로 조정하고, 초과분 제거
+        None이면 개수 제한을 끈다. (메모리 예산으로만 제한)
         """
-        self.max_blocks = max(1, new_max)  # 최소 1 이상 보장
+        if new_max is not None:
+            new_max = max(1, new_max)  # 최소 1 이상 보장
+        self.max_blocks = new_max
+        self._shrink_to_budget()
+
+    def set_max_cache_bytes(self, max_bytes: int | None):
+        """1차 캐시의 메모리 예산을 조정하고 초과분을 내보낸다. None이면 끈다."""
+        self.max_cache_bytes = max_bytes
+        self._shrink_to_budget()
+
+    def set_memory_limit_mb(self, limit_mb: float | None):
+        """프로세스 RSS 상한(MB). 넘으면 블럭을 로딩할 때마다 하나씩 더 내보낸다."""
+        self.memory_limit_mb = limit_mb
 
-        while len(self.block_cache) > self.max_blocks:
-            old_key, _ = self.block_cache.popitem(last=False)
+    def set_viewport(self, rect: QRect):
+        """
+        현재 화면 영역을 갱신한다.
+        화면에 걸친 블럭은 축출되지 않고, 정책은 이 영역을 기준으로 고른다.
+        """
+        self.viewport = QRect(rect)
+        self._visible_keys = self.get_block_keys_in_rect(
+            rect.left(), rect.top(), rect.width(), rect.height())
+
+    def set_eviction_policy(self, policy: EvictionPolicy):
+        self.eviction_policy = policy
+
+    def _shrink_to_budget(self):
+        with self._cache_lock:
+            self._refresh_block_bytes()
+            while self._is_over_budget():
+                key = self._pick_victim()
+                if key is None:
+                    break
+                self._evict_block(key)
 
     def is_inside_block(self, x, y, block_x, block_y):
         """좌표 (x, y)가 키가(block_x, block_y)인 블록의 영역 안에 있는지 확인"""
@@ -292,6 +722,8 @@ class GridBlockManager(QObject):
         지정된 rect 영역과 그 주변(around_range + offset) 블럭들 중,
         아직 로딩되지 않은 블럭을 로딩 요청한다.
         """
+        self.set_viewport(rect)
+
         # 확장된 영역 계산
         expanded_left = rect.left() - around_range - offset
         expanded_top = rect.top() - around_range - offset
@@ -303,8 +735,7 @@ class GridBlockManager(QObject):
         )
 
         for key in block_keys:
-            if key not in self.block_cache:
-                self.request_load_block(*key)
+            self.request_load_block(*key)
 
     def load_blocks_forward_for_rect(self, rect: QRect, 
                                      dx: int, dy: int, distance=1):
@@ -315,6 +746,8 @@ class GridBlockManager(QObject):
         if dx == 0 and dy == 0:
             return
 
+        self.set_viewport(rect)
+
         bs = self.block_size
         visited = set()
 
@@ -399,46 +832,25 @@ class GridBlockManager(QObject):
         return result_keys
 
     def save_cells_to_blocks(self, cells, grid_block_dir='./'):
-        blocks = {}
-        block_sizes = {}
-        fixed_block_size = (self.block_size, self.block_size)
+        """
+        {(x, y): GridCell} 셀들을 블럭별로 묶어 리전 저장소에 반영한다.
+        이미 저장된 블럭은 읽어서 셀만 덮어쓰고, 없으면 빈 블럭에 기록한다.
+        리전 저장소가 없으면 grid_block_dir에 만든다.
+        """
+        if self.region_store is None:
+            self.set_region_store(RegionStore(grid_block_dir, self.block_size))
+        store = self.region_store
+
+        blocks: dict[tuple, GridBlock] = {}
         for (x, y), cell in cells.items():
             key = self.get_origin((x, y))
-            if key not in blocks:
-                path = Path(grid_block_dir) / f"block_{key[0]}_{key[1]}.json"
-
-                if path.exists():
-                    with open(path, "r", encoding="utf-8") as f:
-                        existing = json.load(f)
-                    block_size_x = existing.get("width", self.block_size)
-                    block_size_y = existing.get("height", self.block_size)
-
-                    if (block_size_x, block_size_y) != fixed_block_size:
-                        raise ValueError(
-"Block size mismatch in {}: expected {}, got ({}, {})".format(
-    path, fixed_block_size, block_size_x, block_size_y)
-                    )
-                    block_sizes[key] = fixed_block_size
-                    cell_dict = {
-                        (c["x"], c["y"]): GridCell.from_dict(c)
-                        for c in existing["cells"]
-                    }
-                    blocks[key] = cell_dict
-
-                else:
-                    block_sizes[key] = fixed_block_size
-                    blocks[key] = {}
-                    
-            blocks[key] = cell
-
-        Path(self.grid_block_dir).mkdir(parents=True, exist_ok=True)
-        for key, cell_dict in blocks.items():
-            bx = key[0]
-            by = key[1]
-            bw, bh = block_sizes[(bx, by)]
-            block_data = GridBlock(bx, by, bw, bh, 
-                [cell.to_dict() for cell in cell_dict.values()])
-            
-            path = Path(self.grid_block_dir) / f"block_{bx}_{by}.json"
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(block_data.to_json(), f, indent=4)
\ No newline at end of file
+            block = blocks.get(key)
+            if block is None:
+                block = store.load_block(*key)
+                if block is None:
+                    block = GridBlock(key[0], key[1], self.block_size)
+                blocks[key] = block
+            block.put_cell(cell, (x, y))
+
+        for block in blocks.values():
+            store.save_block(block)
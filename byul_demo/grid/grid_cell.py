@@ -6,6 +6,8 @@ import random
 import string
 import uuid
 
+from grid.cell_columns import CellColumns
+
 class CellStatus(Enum):
     EMPTY = 0
     NPC = 1
@@ -24,58 +26,207 @@ class TerrainType(Enum):
     MOUNTAIN = 3    
     FORBIDDEN = 100
 
+_CELL_STATUS_BY_VALUE = {s.value: s for s in CellStatus}
+_TERRAIN_BY_VALUE = {t.value: t for t in TerrainType}
+
+# uint8 열에서 플래그를 지울 때 쓰는 마스크 (~flag는 음수가 되므로)
+_FLAG_MASK = 0xFF
+
 class GridCell:
+    """
+    셀 하나에 대한 가벼운 뷰(view).
+    실제 값은 블럭의 CellColumns 배열과 희소 테이블에 저장되어 있고,
+    GridCell은 (columns, index)만 들고 필요할 때 만들어진다.
+
+    GridCell(x, y)처럼 직접 생성하면 1x1 크기의 전용 저장소를 갖는다.
+    npc_ids / items / custom_data는 희소 테이블의 리스트(딕셔너리)를
+    그대로 돌려주므로, 값이 없는 셀에 append 하려면
+    add_npc_id()나 속성 대입을 사용해야 한다.
+    """
+    __slots__ = ("x", "y", "_cols", "_i")
+
     def __init__(self, x: int, y: int, 
                  terrain: TerrainType = TerrainType.NORMAL):
         self.x = x
         self.y = y
 
-        self.status: CellStatus = CellStatus.EMPTY
-        self.flags: CellFlag = CellFlag.NONE
-        self.npc_ids: list[str] = []
+        self._cols = CellColumns(x, y, 1)
+        self._i = 0
+        self._cols.terrain[0] = terrain.value
 
-        self.terrain: TerrainType = terrain
-        self.light_level: float = 1.0
-        self.zone_id: Optional[str] = None
-        self.items: list[str] = []
-        self.owner_npc_id: Optional[str] = None
-        self.effect_id: Optional[str] = None
-        self.event_id: Optional[str] = None
-        self.timestamp: float = 0.0
-        self.custom_data: dict[str, Any] = {}
+    @classmethod
+    def view(cls, columns: CellColumns, index: int,
+             x: int, y: int) -> "GridCell":
+        """columns의 index 위치를 가리키는 뷰를 만든다. (복사 없음)"""
+        cell = cls.__new__(cls)
+        cell.x = x
+        cell.y = y
+        cell._cols = columns
+        cell._i = index
+        return cell
 
-    def close(self):
-        self.npc_ids.clear()
-        self.items.clear()
-        self.custom_data.clear()
+    def is_view_of(self, columns: CellColumns, index: int) -> bool:
+        return self._cols is columns and self._i == index
+
+    # ───── 고정 폭 속성 (배열) ─────
+    @property
+    def status(self) -> CellStatus:
+        return _CELL_STATUS_BY_VALUE[int(self._cols.status[self._i])]
+
+    @status.setter
+    def status(self, value: CellStatus):
+        self._cols.status[self._i] = value.value
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def flags(self) -> CellFlag:
+        return CellFlag(int(self._cols.flags[self._i]))
+
+    @flags.setter
+    def flags(self, value: CellFlag):
+        self._cols.flags[self._i] = value.value
+        self._cols.mark_render_dirty(self._i)
+
+    @property
+    def terrain(self) -> TerrainType:
+        return _TERRAIN_BY_VALUE[int(self._cols.terrain[self._i])]
+
+    @terrain.setter
+    def terrain(self, value: TerrainType):
+        self._cols.terrain[self._i] = value.value
+        self._cols.terrain_version += 1
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def light_level(self) -> float:
+        return float(self._cols.light_level[self._i])
+
+    @light_level.setter
+    def light_level(self, value: float):
+        self._cols.light_level[self._i] = value
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def timestamp(self) -> float:
+        return float(self._cols.timestamp[self._i])
+
+    @timestamp.setter
+    def timestamp(self, value: float):
+        self._cols.timestamp[self._i] = value
+        self._cols.mark_dirty(self._i)
+
+    # ───── 문자열 속성 (인터닝 코드) ─────
+    @property
+    def zone_id(self) -> Optional[str]:
+        return self._cols.string_at(int(self._cols.zone_code[self._i]))
+
+    @zone_id.setter
+    def zone_id(self, value: Optional[str]):
+        self._cols.zone_code[self._i] = self._cols.intern(value)
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def effect_id(self) -> Optional[str]:
+        return self._cols.string_at(int(self._cols.effect_code[self._i]))
 
-        self.zone_id = None
-        self.owner_npc_id = None
-        self.effect_id = None
-        self.event_id = None
+    @effect_id.setter
+    def effect_id(self, value: Optional[str]):
+        self._cols.effect_code[self._i] = self._cols.intern(value)
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def event_id(self) -> Optional[str]:
+        return self._cols.string_at(int(self._cols.event_code[self._i]))
+
+    @event_id.setter
+    def event_id(self, value: Optional[str]):
+        self._cols.event_code[self._i] = self._cols.intern(value)
+        self._cols.mark_dirty(self._i)
+
+    # ───── 희소 속성 ─────
+    @property
+    def npc_ids(self) -> list[str]:
+        return self._cols.npc_ids.get(self._i, [])
+
+    @npc_ids.setter
+    def npc_ids(self, value: list[str]):
+        if value:
+            self._cols.npc_ids[self._i] = list(value)
+        else:
+            self._cols.npc_ids.pop(self._i, None)
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def items(self) -> list[str]:
+        return self._cols.items.get(self._i, [])
+
+    @items.setter
+    def items(self, value: list[str]):
+        if value:
+            self._cols.items[self._i] = list(value)
+        else:
+            self._cols.items.pop(self._i, None)
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def owner_npc_id(self) -> Optional[str]:
+        return self._cols.owner_npc_id.get(self._i)
+
+    @owner_npc_id.setter
+    def owner_npc_id(self, value: Optional[str]):
+        if value is None:
+            self._cols.owner_npc_id.pop(self._i, None)
+        else:
+            self._cols.owner_npc_id[self._i] = value
+        self._cols.mark_dirty(self._i)
+
+    @property
+    def custom_data(self) -> dict[str, Any]:
+        return self._cols.custom_data.get(self._i, {})
+
+    @custom_data.setter
+    def custom_data(self, value: dict[str, Any]):
+        if value:
+            self._cols.custom_data[self._i] = dict(value)
+        else:
+            self._cols.custom_data.pop(self._i, None)
+        self._cols.mark_dirty(self._i)
+
+    def close(self):
+        self._cols.clear_cell(self._i)
 
     def add_npc_id(self, npc_id: str):
-        if npc_id not in self.npc_ids:
-            self.npc_ids.append(npc_id)
-        self.status = CellStatus.NPC
+        npc_ids = self._cols.npc_ids.setdefault(self._i, [])
+        if npc_id not in npc_ids:
+            npc_ids.append(npc_id)
+        self._cols.status[self._i] = CellStatus.NPC.value
+        self._cols.mark_dirty(self._i)
 
     def remove_npc_id(self, npc_id: str):
-        if npc_id in self.npc_ids:
-            self.npc_ids.remove(npc_id)
-        if len(self.npc_ids) <= 0:
-            self.status = CellStatus.EMPTY
+        npc_ids = self._cols.npc_ids.get(self._i)
+        if npc_ids and npc_id in npc_ids:
+            npc_ids.remove(npc_id)
+        if not npc_ids:
+            self._cols.npc_ids.pop(self._i, None)
+            self._cols.status[self._i] = CellStatus.EMPTY.value
+        self._cols.mark_dirty(self._i)
 
     def has_flag(self, flag: CellFlag) -> bool:
-        return flag in self.flags
+        return bool(int(self._cols.flags[self._i]) & flag.value)
 
     def add_flag(self, flag: CellFlag):
-        self.flags |= flag
+        flags = self._cols.flags
+        flags[self._i] = int(flags[self._i]) | flag.value
+        self._cols.mark_render_dirty(self._i)
 
     def remove_flag(self, flag: CellFlag):
-        self.flags &= ~flag
+        flags = self._cols.flags
+        flags[self._i] = int(flags[self._i]) & (_FLAG_MASK ^ flag.value)
+        self._cols.mark_render_dirty(self._i)
 
     def clear_flags(self):
-        self.flags = CellFlag.NONE
+        self._cols.flags[self._i] = CellFlag.NONE.value
+        self._cols.mark_render_dirty(self._i)
 
     def get_priority_flag(self) -> Optional[CellFlag]:
         for f in [CellFlag.START, CellFlag.GOAL, CellFlag.ROUTE, CellFlag.VISITED]:
@@ -138,24 +289,52 @@ ids: {self.npc_ids}
             "custom_data": self.custom_data
         }
 
+    def update_from_dict(self, data: dict):
+        """to_dict() 형식의 값을 이 셀(뷰)에 기록한다. x, y는 제외"""
+        self.status = CellStatus(data.get("status", 0))
+        self.terrain = TerrainType(data.get("terrain", 0))
+        self.flags = CellFlag(data.get("flags", 0))
+        self.npc_ids = data.get("npc_ids", [])
+        self.light_level = data.get("light_level", 1.0)
+        self.zone_id = data.get("zone_id")
+        self.items = data.get("items", [])
+        self.owner_npc_id = data.get("owner_npc_id")
+        self.effect_id = data.get("effect_id")
+        self.event_id = data.get("event_id")
+        self.timestamp = data.get("timestamp", 0.0)
+        self.custom_data = data.get("custom_data", {})
+
+    def copy_to(self, columns: CellColumns, index: int):
+        """이 셀의 모든 속성을 다른 저장소의 index 위치에 복사한다."""
+        src = self._cols
+        i = self._i
+        columns.terrain[index] = src.terrain[i]
+        columns.terrain_version += 1
+        columns.flags[index] = src.flags[i]
+        columns.status[index] = src.status[i]
+        columns.light_level[index] = src.light_level[i]
+        columns.timestamp[index] = src.timestamp[i]
+        columns.zone_code[index] = columns.intern(self.zone_id)
+        columns.effect_code[index] = columns.intern(self.effect_id)
+        columns.event_code[index] = columns.intern(self.event_id)
+
+        for table_name in ("npc_ids", "items", "owner_npc_id", "custom_data"):
+            src_table = getattr(src, table_name)
+            dst_table = getattr(columns, table_name)
+            value = src_table.get(i)
+            if value is None:
+                dst_table.pop(index, None)
+            elif isinstance(value, str):
+                dst_table[index] = value
+            else:
+                dst_table[index] = value.copy()
+
+        columns.mark_dirty(index)
+
     @classmethod
     def from_dict(cls, data: dict):
-        cell = cls(
-            x=data["x"],
-            y=data["y"],
-            status=CellStatus(data.get("status", 0)),
-            terrain=TerrainType(data.get("terrain", 0))
-        )
-        cell.flags = CellFlag(data.get("flags", 0))
-        cell.npc_ids = data.get("npc_ids", [])
-        cell.light_level = data.get("light_level", 1.0)
-        cell.zone_id = data.get("zone_id")
-        cell.items = data.get("items", [])
-        cell.owner_npc_id = data.get("owner_npc_id")
-        cell.effect_id = data.get("effect_id")
-        cell.event_id = data.get("event_id")
-        cell.timestamp = data.get("timestamp", 0.0)
-        cell.custom_data = data.get("custom_data", {})
+        cell = cls(x=data["x"], y=data["y"])
+        cell.update_from_dict(data)
         return cell
 
     @classmethod
@@ -204,14 +383,13 @@ ids: {self.npc_ids}
             if not cell.npc_ids and cell.terrain != TerrainType.FORBIDDEN:
                 if not (cell.x == 0 and cell.y == 0):
                     npc_id = f"npc_{uuid.uuid4().hex}"
-                    cell.npc_ids.append(npc_id)
-                    cell.status = CellStatus.NPC
+                    cell.add_npc_id(npc_id)
         else:
             cell.status = CellStatus.EMPTY            
 
         # 아이템 / 효과 / 이벤트
         if random.random() < item_chance:
-            cell.items.append("item_" + random.choice(["apple", "gem", "scroll"]))
+            cell.items = ["item_" + random.choice(["apple", "gem", "scroll"])]
         if random.random() < effect_chance:
             cell.effect_id = "heal_zone"
         if random.random() < event_chance:
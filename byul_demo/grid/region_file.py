@@ -0,0 +1,397 @@
+"""
+리전 파일 (.byr) : 여러 블럭을 하나의 파일에 담는 색인 컨테이너
+
+블럭마다 파일 하나를 쓰면 넓은 월드에서 수만 개의 작은 파일이 생기고
+디렉토리 탐색과 open 비용이 I/O를 지배한다.
+리전 파일은 region_blocks x region_blocks(기본 32x32) 블럭을 한 파일에 둔다.
+
+    [header]  <4sHHiiQ   magic, version, region_blocks, rx, ry, dead_bytes
+    [slots]   region_blocks² * <QII   (offset, length, crc32)
+    [data]    블럭 페이로드 (.byb 바이트열)를 뒤에 계속 덧붙인다.
+
+- 쓰기는 항상 파일 끝에 덧붙이고(append-only) 슬롯만 제자리에서 고친다.
+  이전 페이로드는 dead_bytes로 집계되고 compact()에서 정리된다.
+- 블럭 하나를 읽을 때는 슬롯 하나와 그 페이로드만 읽는다.
+"""
+import os
+import re
+import struct
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+
+from grid.cell_columns import CellColumns
+from grid.block_file import (
+    BLOCK_FILE_SUFFIX, columns_from_bytes, columns_to_bytes, read_columns_file
+)
+from grid.grid_block import GridBlock
+
+from utils.log_to_panel import g_logger
+
+REGION_FILE_MAGIC = b"BYRG"
+REGION_FILE_VERSION = 1
+REGION_FILE_SUFFIX = ".byr"
+
+_HEADER = struct.Struct("<4sHHiiQ")
+_SLOT = struct.Struct("<QII")
+
+class RegionFileError(ValueError):
+    pass
+
+def region_file_path(folder, rx: int, ry: int) -> Path:
+    return Path(folder) / f"region_{rx}_{ry}{REGION_FILE_SUFFIX}"
+
+def locate_block(x0: int, y0: int, block_size: int,
+                 region_blocks: int) -> tuple[int, int, int, int]:
+    """블럭 원점을 (rx, ry, 리전 내 lx, ly)로 바꾼다. 음수 좌표 포함"""
+    bx = x0 // block_size
+    by = y0 // block_size
+    rx, lx = divmod(bx, region_blocks)
+    ry, ly = divmod(by, region_blocks)
+    return rx, ry, lx, ly
+
+def _slot_position(region_blocks: int, lx: int, ly: int) -> int:
+    return _HEADER.size + (ly * region_blocks + lx) * _SLOT.size
+
+def read_region_columns(folder, x0: int, y0: int, block_size: int,
+                        region_blocks: int = 32) -> CellColumns | None:
+    """
+    RegionFile 객체 없이 블럭 하나만 읽는다. (워커 프로세스용)
+    슬롯 하나와 해당 페이로드만 읽으며, 없으면 None
+
+    다른 프로세스가 같은 슬롯을 고치거나 파일을 압축하는 중이면
+    슬롯과 페이로드가 어긋나 crc가 맞지 않을 수 있다. 이때 한 번 다시 읽는다.
+    """
+    rx, ry, lx, ly = locate_block(x0, y0, block_size, region_blocks)
+    path = region_file_path(folder, rx, ry)
+
+    for attempt in range(2):
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        with f:
+            header = f.read(_HEADER.size)
+            magic, version, blocks = _HEADER.unpack(header)[:3]
+            if magic != REGION_FILE_MAGIC or blocks != region_blocks:
+                raise RegionFileError(f"{path}: 리전 헤더 불일치")
+            f.seek(_slot_position(region_blocks, lx, ly))
+            offset, length, crc = _SLOT.unpack(f.read(_SLOT.size))
+            if length == 0:
+                return None
+            f.seek(offset)
+            payload = f.read(length)
+
+        if zlib.crc32(payload) == crc:
+            return columns_from_bytes(payload, path)
+
+    raise RegionFileError(f"{path}: 블럭({x0}, {y0}) crc 불일치")
+
+class RegionFile:
+    """리전 파일 하나. 모든 메서드는 내부 락으로 보호된다."""
+
+    def __init__(self, path, region_blocks: int = 32, rx: int = 0, ry: int = 0):
+        self.path = Path(path)
+        self.region_blocks = region_blocks
+        self.rx = rx
+        self.ry = ry
+        self._lock = Lock()
+
+        if not self.path.exists():
+            self._create()
+
+        self._f = open(self.path, "r+b")
+        self._load_table()
+
+    def _create(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        slot_count = self.region_blocks * self.region_blocks
+        with open(self.path, "wb") as f:
+            f.write(_HEADER.pack(REGION_FILE_MAGIC, REGION_FILE_VERSION,
+                                 self.region_blocks, self.rx, self.ry, 0))
+            f.write(bytes(_SLOT.size * slot_count))
+
+    def _load_table(self):
+        f = self._f
+        f.seek(0)
+        (magic, version, blocks,
+         self.rx, self.ry, self.dead_bytes) = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != REGION_FILE_MAGIC:
+            raise RegionFileError(f"{self.path}: 리전 파일이 아니다")
+        if version != REGION_FILE_VERSION:
+            raise RegionFileError(f"{self.path}: 지원하지 않는 버전 {version}")
+        if blocks != self.region_blocks:
+            raise RegionFileError(
+                f"{self.path}: region_blocks 불일치 {blocks} != {self.region_blocks}")
+
+        raw = f.read(_SLOT.size * blocks * blocks)
+        self._slots = [_SLOT.unpack_from(raw, i * _SLOT.size)
+                       for i in range(blocks * blocks)]
+
+    def _write_header(self):
+        self._f.seek(0)
+        self._f.write(_HEADER.pack(REGION_FILE_MAGIC, REGION_FILE_VERSION,
+                                   self.region_blocks, self.rx, self.ry,
+                                   self.dead_bytes))
+
+    def _index(self, lx: int, ly: int) -> int:
+        return ly * self.region_blocks + lx
+
+    def has(self, lx: int, ly: int) -> bool:
+        return self._slots[self._index(lx, ly)][1] > 0
+
+    def read(self, lx: int, ly: int) -> bytes | None:
+        with self._lock:
+            offset, length, crc = self._slots[self._index(lx, ly)]
+            if length == 0:
+                return None
+            self._f.seek(offset)
+            payload = self._f.read(length)
+
+        if zlib.crc32(payload) != crc:
+            raise RegionFileError(f"{self.path}: 슬롯({lx}, {ly}) crc 불일치")
+        return payload
+
+    def write(self, lx: int, ly: int, payload: bytes):
+        """페이로드를 파일 끝에 덧붙이고 슬롯을 갱신한다."""
+        index = self._index(lx, ly)
+        with self._lock:
+            f = self._f
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(payload)
+
+            old_length = self._slots[index][1]
+            self._set_slot(index, (offset, len(payload), zlib.crc32(payload)))
+            if old_length:
+                self.dead_bytes += old_length
+                self._write_header()
+            f.flush()
+
+    def delete(self, lx: int, ly: int):
+        index = self._index(lx, ly)
+        with self._lock:
+            old_length = self._slots[index][1]
+            if not old_length:
+                return
+            self._set_slot(index, (0, 0, 0))
+            self.dead_bytes += old_length
+            self._write_header()
+            self._f.flush()
+
+    def _set_slot(self, index: int, slot: tuple):
+        self._slots[index] = slot
+        self._f.seek(_HEADER.size + index * _SLOT.size)
+        self._f.write(_SLOT.pack(*slot))
+
+    def file_size(self) -> int:
+        with self._lock:
+            self._f.seek(0, os.SEEK_END)
+            return self._f.tell()
+
+    def needs_compaction(self, ratio: float = 0.5,
+                         min_dead_bytes: int = 1 << 20) -> bool:
+        """죽은 페이로드가 파일의 ratio 이상이고 min_dead_bytes를 넘으면 True"""
+        if self.dead_bytes < min_dead_bytes:
+            return False
+        return self.dead_bytes >= self.file_size() * ratio
+
+    def compact(self):
+        """살아 있는 페이로드만 새 파일로 옮겨 담고 교체한다."""
+        with self._lock:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            slot_count = len(self._slots)
+            new_slots = []
+            with open(tmp, "wb") as out:
+                out.write(_HEADER.pack(REGION_FILE_MAGIC, REGION_FILE_VERSION,
+                                       self.region_blocks, self.rx, self.ry, 0))
+                out.write(bytes(_SLOT.size * slot_count))
+                for offset, length, crc in self._slots:
+                    if length == 0:
+                        new_slots.append((0, 0, 0))
+                        continue
+                    self._f.seek(offset)
+                    new_slots.append((out.tell(), length, crc))
+                    out.write(self._f.read(length))
+
+                out.seek(_HEADER.size)
+                for slot in new_slots:
+                    out.write(_SLOT.pack(*slot))
+
+            self._f.close()
+            os.replace(tmp, self.path)
+            self._f = open(self.path, "r+b")
+            self._slots = new_slots
+            self.dead_bytes = 0
+
+        g_logger.log_debug_threadsafe(f"[RegionFile] 압축 완료: {self.path}")
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+class RegionStore:
+    """
+    리전 파일들로 이루어진 블럭 저장소.
+    열린 리전 파일은 max_open개까지 LRU로 유지한다.
+
+    리전 파일은 _use()로 빌려 쓴다. 빌려 쓰는 중에 LRU에서 밀려난 파일은
+    바로 닫지 않고 마지막 사용자가 돌려줄 때 닫는다. 그 사이에 같은 리전을
+    다시 요청하면 새로 열지 않고 그 객체를 되살린다.
+    (한 리전 파일을 두 객체가 동시에 열면 슬롯 표가 어긋난다)
+    """
+
+    def __init__(self, folder, block_size: int = 100, region_blocks: int = 32,
+                 compact_ratio: float = 0.5, max_open: int = 16):
+        self.folder = Path(folder)
+        self.block_size = block_size
+        self.region_blocks = region_blocks
+        self.compact_ratio = compact_ratio
+        self.max_open = max_open
+
+        self._regions: OrderedDict[tuple, RegionFile] = OrderedDict()
+        # LRU에서 밀려났지만 아직 누가 쓰고 있는 리전 (닫기 보류)
+        self._retired: dict[tuple, RegionFile] = {}
+        self._refs: dict[tuple, int] = {}
+        self._lock = Lock()
+
+    @contextmanager
+    def _use(self, rx: int, ry: int, create: bool):
+        """리전 파일을 빌려 준다. 파일이 없고 create가 아니면 None"""
+        key = (rx, ry)
+        region = self._acquire(key, create)
+        try:
+            yield region
+        finally:
+            if region is not None:
+                self._release(key)
+
+    def _acquire(self, key: tuple, create: bool) -> RegionFile | None:
+        with self._lock:
+            region = self._regions.get(key)
+            if region is not None:
+                self._regions.move_to_end(key)
+            else:
+                region = self._retired.pop(key, None)
+                if region is None:
+                    path = region_file_path(self.folder, *key)
+                    if not create and not path.exists():
+                        return None
+                    region = RegionFile(path, self.region_blocks, *key)
+                self._regions[key] = region
+                self._evict_locked()
+
+            self._refs[key] = self._refs.get(key, 0) + 1
+            return region
+
+    def _release(self, key: tuple):
+        with self._lock:
+            refs = self._refs[key] - 1
+            if refs:
+                self._refs[key] = refs
+                return
+            del self._refs[key]
+            region = self._retired.pop(key, None)
+        if region is not None:
+            region.close()
+
+    def _evict_locked(self):
+        while len(self._regions) > self.max_open:
+            key, old = self._regions.popitem(last=False)
+            if self._refs.get(key):
+                self._retired[key] = old
+            else:
+                old.close()
+
+    def _locate(self, x0: int, y0: int):
+        return locate_block(x0, y0, self.block_size, self.region_blocks)
+
+    def has_block(self, x0: int, y0: int) -> bool:
+        rx, ry, lx, ly = self._locate(x0, y0)
+        with self._use(rx, ry, create=False) as region:
+            return region is not None and region.has(lx, ly)
+
+    def load_columns(self, x0: int, y0: int) -> CellColumns | None:
+        rx, ry, lx, ly = self._locate(x0, y0)
+        with self._use(rx, ry, create=False) as region:
+            if region is None:
+                return None
+            payload = region.read(lx, ly)
+            path = region.path
+        if payload is None:
+            return None
+        return columns_from_bytes(payload, path)
+
+    def load_block(self, x0: int, y0: int) -> GridBlock | None:
+        cols = self.load_columns(x0, y0)
+        if cols is None:
+            return None
+        return GridBlock(cols.x0, cols.y0, cols.size, columns=cols)
+
+    def save_block(self, block: GridBlock):
+        self.save_columns(block.columns)
+
+    def save_columns(self, cols: CellColumns):
+        if cols.size != self.block_size:
+            raise ValueError(
+                f"Block size mismatch: expected {self.block_size}, "
+                f"got {cols.size}")
+
+        rx, ry, lx, ly = self._locate(cols.x0, cols.y0)
+        payload = columns_to_bytes(cols)
+        with self._use(rx, ry, create=True) as region:
+            region.write(lx, ly, payload)
+            if region.needs_compaction(self.compact_ratio):
+                region.compact()
+
+    def delete_block(self, x0: int, y0: int):
+        rx, ry, lx, ly = self._locate(x0, y0)
+        with self._use(rx, ry, create=False) as region:
+            if region is not None:
+                region.delete(lx, ly)
+
+    def compact_all(self, force: bool = False):
+        """모든 리전 파일 중 압축이 필요한 것(force면 전부)을 압축한다."""
+        pattern = re.compile(r"region_(-?\d+)_(-?\d+)" +
+                             re.escape(REGION_FILE_SUFFIX) + "$")
+        for path in sorted(self.folder.glob(f"region_*{REGION_FILE_SUFFIX}")):
+            m = pattern.match(path.name)
+            if not m:
+                continue
+            with self._use(int(m.group(1)), int(m.group(2)),
+                           create=False) as region:
+                if region is None:
+                    continue
+                if force or region.needs_compaction(self.compact_ratio):
+                    region.compact()
+
+    def import_block_files(self, folder) -> int:
+        """
+        기존 block_{x0}_{y0}.json / .byb 파일들을 리전 파일로 옮긴다.
+        옮긴 블럭 수를 반환한다. 원본 파일은 지우지 않는다.
+        """
+        count = 0
+        for path in sorted(Path(folder).glob("block_*")):
+            if path.suffix == BLOCK_FILE_SUFFIX:
+                cols = read_columns_file(path, mmap=False)
+                block = GridBlock(cols.x0, cols.y0, cols.size, columns=cols)
+            elif path.suffix == ".json":
+                block = GridBlock.from_json(path)
+            else:
+                continue
+            self.save_block(block)
+            count += 1
+        return count
+
+    def close(self):
+        with self._lock:
+            for region in self._regions.values():
+                region.close()
+            for region in self._retired.values():
+                region.close()
+            self._regions.clear()
+            self._retired.clear()
@@ -0,0 +1,150 @@
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPainter, QPixmap
+
+from grid.grid_block import GridBlock
+from grid.grid_block_manager import GridBlockManager
+from utils.image_manager import ImageManager
+
+class _Tile:
+    __slots__ = ("pixmap", "columns", "terrain_version")
+
+    def __init__(self, pixmap: QPixmap, columns, terrain_version: int):
+        self.pixmap = pixmap
+        self.columns = weakref.ref(columns)
+        self.terrain_version = terrain_version
+
+class BlockTileCache:
+    """
+    블럭의 정적 레이어(빈 셀 + 선택된 NPC 기준 장애물)를 미리 그려 둔 타일.
+
+    키는 (블럭 원점, 타일 위치, cell_size, 이동 등급)이다. 블럭 하나를
+    max_tile_px 픽셀을 넘지 않는 정사각 타일들로 나눠서 그린다.
+    (셀 크기가 작으면 블럭 하나가 타일 하나)
+
+    - terrain이 바뀌면(CellColumns.terrain_version) 그 블럭 타일을 다시 그린다.
+    - 블럭이 축출되면 discard_block()으로 버린다. 같은 블럭이 다시 로딩되어도
+      columns가 달라지므로 옛 타일은 쓰지 않는다.
+    - 전체 픽셀 수가 max_pixels를 넘으면 오래 안 쓴 타일부터 버린다. (LRU)
+
+    메인 쓰레드에서만 쓴다.
+    """
+
+    def __init__(self, block_mgr: GridBlockManager, max_tile_px: int = 2048,
+                 max_pixels: int = 32 * 1024 * 1024):
+        self.block_mgr = block_mgr
+        self.max_tile_px = max_tile_px
+        self.max_pixels = max_pixels
+
+        self._tiles: OrderedDict[tuple, _Tile] = OrderedDict()
+        self._by_block: dict[tuple, set[tuple]] = {}
+        self._pixels = 0
+        # (이미지 cacheKey, cell_size) -> 미리 늘려 둔 이미지
+        self._scaled: dict[tuple[int, int], QPixmap] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def tile_cells(self, cell_size: int) -> int:
+        """cell_size에서 타일 한 변의 셀 수"""
+        return max(1, min(self.block_mgr.block_size,
+                          self.max_tile_px // max(1, cell_size)))
+
+    def get(self, block: GridBlock, tx: int, ty: int, cell_size: int,
+            movable: frozenset | None) -> QPixmap:
+        """
+        block의 (tx, ty)번째 타일. 좌상단은 블럭 원점에서
+        (tx, ty) * tile_cells(cell_size) 셀 떨어진 곳이다.
+        movable이 None이면 장애물 표시 없이 그린다.
+        """
+        cols = block.columns
+        block_key = (cols.x0, cols.y0)
+        key = (block_key, tx, ty, cell_size, movable)
+
+        tile = self._tiles.get(key)
+        if (tile is not None and tile.columns() is cols and
+                tile.terrain_version == cols.terrain_version):
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile.pixmap
+
+        self.misses += 1
+        self._remove(key)
+        pixmap = self._render(cols, tx, ty, cell_size, movable)
+        self._tiles[key] = _Tile(pixmap, cols, cols.terrain_version)
+        self._by_block.setdefault(block_key, set()).add(key)
+        self._pixels += pixmap.width() * pixmap.height()
+
+        while self._pixels > self.max_pixels and len(self._tiles) > 1:
+            self._remove(next(iter(self._tiles)))
+        return pixmap
+
+    def discard_block(self, block_key: tuple):
+        for key in list(self._by_block.get(tuple(block_key), ())):
+            self._remove(key)
+
+    def clear(self):
+        self._tiles.clear()
+        self._by_block.clear()
+        self._pixels = 0
+        self._scaled.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "tiles": len(self._tiles),
+            "pixels": self._pixels,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def scaled(self, image: QPixmap, cell_size: int) -> QPixmap:
+        """image를 cell_size x cell_size로 늘린 것 (한 번만 만든다)"""
+        key = (image.cacheKey(), cell_size)
+        scaled = self._scaled.get(key)
+        if scaled is None:
+            scaled = image.scaled(cell_size, cell_size,
+                                  Qt.IgnoreAspectRatio,
+                                  Qt.FastTransformation)
+            self._scaled[key] = scaled
+        return scaled
+
+    def _render(self, cols, tx: int, ty: int, cell_size: int,
+                movable: frozenset | None) -> QPixmap:
+        n = self.tile_cells(cell_size)
+        ox, oy = tx * n, ty * n
+        w = min(n, cols.size - ox)
+        h = min(n, cols.size - oy)
+
+        pixmap = QPixmap(w * cell_size, h * cell_size)
+        pixmap.fill(Qt.darkGray)
+        painter = QPainter(pixmap)
+        painter.drawTiledPixmap(
+            0, 0, w * cell_size, h * cell_size,
+            self.scaled(ImageManager.get_empty_image(), cell_size))
+
+        if movable is not None:
+            terrain = cols.grid(cols.terrain)[oy:oy + h, ox:ox + w]
+            values = np.fromiter(movable, dtype=np.uint8)
+            ys, xs = np.nonzero(~np.isin(terrain, values))
+            if ys.size:
+                obstacle = self.scaled(
+                    ImageManager.get_obstacle_for_npc_image(), cell_size)
+                for y, x in zip(ys.tolist(), xs.tolist()):
+                    painter.drawPixmap(x * cell_size, y * cell_size, obstacle)
+        painter.end()
+        return pixmap
+
+    def _remove(self, key: tuple):
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            return
+        self._pixels -= tile.pixmap.width() * tile.pixmap.height()
+        keys = self._by_block.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_block[key[0]]
@@ -27,6 +27,12 @@ from pathlib import Path
 from utils.image_manager import ImageManager
 
 from utils.route_changing_detector import RouteChangingDetector
+from grid.eviction_policy import DirectionalEvictionPolicy
+from grid.block_prefetcher import BlockPrefetcher
+from world.route_engine.obstacle_map import movement_class
+from gui.block_tile_cache import BlockTileCache
+
+import numpy as np
 
 class GridCanvas(QWidget):
     '''GridCanvas는 사용자와의 상호 작용을 담당하며,
@@ -74,8 +80,20 @@ class GridCanvas(QWidget):
 
         self._pressed_keys = set()
 
+        # 셀만 그려 둔 배경 픽스맵. 바뀐 셀과 새로 드러난 줄만 다시 그린다.
+        # NPC, 선택 표시, hover는 paintEvent에서 그 위에 그린다.
         self.cached_pixmap = None
         self.needs_redraw = False
+        # cached_pixmap을 그린 때의 (min_x, min_y)와 (w, h, cell_size, grid w, h)
+        self._drawn_origin = None
+        self._drawn_geometry = None
+        # 장애물 표시 기준인 선택된 NPC의 이동 등급 (그린 때의 값)
+        self._drawn_movable = None
+        # 마지막으로 그린 화면에 걸친 로드된 블럭들
+        self._drawn_blocks: set[tuple] = set()
+        # 블럭별로 미리 그려 둔 바탕 타일. 블럭이 축출되면 같이 버린다.
+        self.tile_cache = BlockTileCache(world.block_mgr)
+        world.block_evicted.connect(self.tile_cache.discard_block)
 
         self.default_empty_cell_color = QColor(30, 30, 30)
 
@@ -85,11 +103,14 @@ class GridCanvas(QWidget):
         self.set_interval_msec(interval_msec)
         self.logic_timer.start()
 
+        if not self.world.simulator.is_running():
+            self.world.simulator.start()
+
         self.wheel_timer = QTimer()
         self.wheel_timer.setSingleShot(True)
         self.wheel_timer.timeout.connect(self.change_grid_from_window)
 
-        self.center_changed.connect(self.request_redraw)
+        # 중심 이동은 draw_cells()가 픽스맵을 스크롤해서 처리한다.
 
         self.click_mode = "select_npc"
 
@@ -102,6 +123,12 @@ class GridCanvas(QWidget):
 
         # move_center에서 사용한다 현재 진행방향을 확인하기 위해
         self.route_detector = RouteChangingDetector()        
+        # 진행 방향 뒤쪽 블럭부터 캐시에서 내보낸다.
+        self.world.block_mgr.set_eviction_policy(
+            DirectionalEvictionPolicy(self.route_detector))
+        # 이동 속도와 NPC 경로로 앞쪽 블럭을 미리 로딩한다.
+        self.block_prefetcher = BlockPrefetcher(
+            self.world.block_mgr, self.route_detector)
 
         self._move_queue = deque()
         self._move_timer = QTimer()
@@ -111,6 +138,7 @@ class GridCanvas(QWidget):
 
         if world.npc_mgr.has_npc(FIRST_NPC_ID):
             self.m_selected_npc = world.npc_mgr.get_npc(FIRST_NPC_ID)
+            world.set_focus_npc(self.m_selected_npc)
 
     @property
     def selected_npc(self):
@@ -119,6 +147,9 @@ class GridCanvas(QWidget):
     @selected_npc.setter
     def selected_npc(self, npc:NPC):
         self.m_selected_npc = npc
+        self.world.set_focus_npc(npc)
+        # 장애물/경로 표시가 선택된 NPC 기준이다.
+        self.request_redraw()
         self.npc_selected.emit(npc)
 
 
@@ -178,6 +209,8 @@ class GridCanvas(QWidget):
         painter = QPainter(self)
         if self.cached_pixmap:
             painter.drawPixmap(0, 0, self.cached_pixmap)
+            self.draw_overlays(painter)
+        painter.end()
 
     def get_center(self)->tuple[int,int]:
         return (self.center_x, self.center_y)
@@ -233,6 +266,9 @@ class GridCanvas(QWidget):
         if not self.world.block_mgr.is_blocks_loaded_forward_for_rect(rect, dx, dy, distance):
             self.world.block_mgr.load_blocks_forward_for_rect(rect, dx, dy, distance)
 
+        self.block_prefetcher.on_camera_moved(
+            (new_x, new_y), rect, self._move_queue)
+
         self.center_changed.emit(new_x, new_y)
 
     def update_grid(self):
@@ -258,9 +294,9 @@ class GridCanvas(QWidget):
         min_x = self.center_x - (self.grid_width // 2)
         min_y = self.center_y - (self.grid_height // 2)
         rect = QRect(min_x, min_y, self.grid_width, self.grid_height)
+        # NPC 진행은 world.simulator가 한다. 여기서는 결과만 그린다.
         npcs = self.world.get_npcs_in_rect(rect)
-        for npc in npcs:
-            npc.on_tick(elapsed_sec, self.cell_size)
+        self.block_prefetcher.on_npcs_ticked(npcs)
 
         self.update_grid()
 
@@ -277,85 +313,226 @@ class GridCanvas(QWidget):
         self.update()
 
     def draw_cells(self):
+        """
+        cached_pixmap에서 바뀐 곳만 다시 그린다.
+        - 크기/셀 크기나 선택된 NPC의 이동 가능 지형이 바뀌었거나
+          request_redraw()면 전체
+        - 중심이 움직였으면 픽스맵을 스크롤하고 새로 드러난 줄만
+        - 셀 변경(CellColumns.take_render_dirty)과 블럭 로딩/축출
+
+        셀 바탕(빈 셀, 장애물)은 tile_cache의 블럭 타일을 영역 단위로
+        복사하고, 경로/목표 표시와 텍스트만 셀마다 그린다.
+        """
         if g_logger.debug_mode:
             t0 = time.time()
             self.draw_cells_started.emit(t0)
 
         w, h = self.width(), self.height()
-        self.cached_pixmap = QPixmap(w, h)
-        self.cached_pixmap.fill(Qt.darkGray)
-
-        painter = QPainter(self.cached_pixmap)
-        painter.setFont(QFont("Courier", 8))
-
-        font = QFont("Courier", 10)
-        pen_black = QPen(Qt.black)
-        brush_empty = QBrush(self.default_empty_cell_color)
-
         min_x = self.center_x - (self.grid_width // 2)
         min_y = self.center_y - (self.grid_height // 2)
+        view = QRect(min_x, min_y, self.grid_width, self.grid_height)
+        geometry = (w, h, self.cell_size, self.grid_width, self.grid_height)
 
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                gx = min_x + x
-                gy = min_y + y
-                # key = self.world.block_mgr.get_origin(gx, gy)
-                px, py = self.convert_pos_grid_to_win(x, y)
-
-                # ox, oy = self.world.block_mgr.get_origin(gx, gy)
-                cell = self.world.block_mgr.get_cell((gx, gy))
-
-                if cell is None:
-                    painter.setBrush(brush_empty)
-                    painter.drawRect(px, py, self.cell_size, self.cell_size)
+        # 이동 가능 지형은 NPC가 새 지형에 서거나 속성 창에서 바뀐다.
+        movable = None
+        if self.selected_npc:
+            movable = movement_class(self.selected_npc.movable_terrain)
+
+        full = (self.needs_redraw or self.cached_pixmap is None or
+                geometry != self._drawn_geometry or
+                movable != self._drawn_movable)
+        # 다시 그릴 영역 (격자 좌표)
+        rects: list[QRect] = []
+        if not full and (min_x, min_y) != self._drawn_origin:
+            full = not self._scroll_cached(min_x, min_y, rects)
+
+        # 셀 변경은 전체를 그릴 때도 비워 둬야 한다.
+        cells = self._collect_dirty_cells(view, rects)
+
+        if full:
+            self.cached_pixmap = QPixmap(w, h)
+            self.cached_pixmap.fill(Qt.darkGray)
+            self.needs_redraw = False
+            rects = [view]
+            cells = set()
+        self._drawn_geometry = geometry
+        self._drawn_origin = (min_x, min_y)
+        self._drawn_movable = movable
+
+        if rects or cells:
+            painter = QPainter(self.cached_pixmap)
+            for rect in rects:
+                self._paint_rect(painter, rect.intersected(view), min_x, min_y)
+            for x, y in cells:
+                if any(rect.contains(x, y) for rect in rects):
                     continue
+                self._paint_rect(painter, QRect(x, y, 1, 1), min_x, min_y)
+            painter.end()
 
-                image = None
-                npc = None
-                if cell.status == CellStatus.NPC:
-                    for npc_id in cell.npc_ids:
-                        if self.world.npc_mgr.has_npc(npc_id):
-                            npc = self.world.npc_mgr.get_npc(npc_id)
-                        # else:
-                        #     npc = self.world.spawn_npc(npc_id, (gx, gy))
-                        #     pass
-                        if npc:
-                            if npc.anim_started:
-                                image = ImageManager.get_empty_image()
-                            else:
-                                image = npc.get_image()
-
-                            win_pos_x, win_pos_y = self.get_win_pos_at_coord(npc.start)
-
-                            if win_pos_x and win_pos_y:
-                                npc.draw( painter, win_pos_x, win_pos_y, self.cell_size)   
-
-                elif cell.status == CellStatus.EMPTY:
-                    image = ImageManager.get_empty_image()
-
-                if self.selected_npc:
-                    coord = (gx, gy)
-                    
-                    if not cell.terrain in self.selected_npc.movable_terrain:
-                        image = ImageManager.get_obstacle_for_npc_image()
-
-                    if cell.has_flag(CellFlag.ROUTE):
-                        # index = self.selected_npc.cur_index
-                        # image = self.selected_npc.get_proto_image(index)
-                        image = self.selected_npc.get_proto_route_image(coord)
+        if g_logger.debug_mode:
+            t1 = time.time()
+            elapsed = (t1 - t0) * 1000
+            self.draw_cells_elapsed.emit(elapsed)
 
-                    if cell.has_flag(CellFlag.GOAL):
-                        image = ImageManager.get_goal_image()
+    def _paint_rect(self, painter: QPainter, rect: QRect,
+                    min_x: int, min_y: int):
+        """격자 영역 rect를 블럭별로 나눠 그린다."""
+        if rect.isEmpty():
+            return
+        mgr = self.world.block_mgr
+        size = mgr.block_size
+        kx0, ky0 = mgr.get_origin((rect.left(), rect.top()))
+        kx1, ky1 = mgr.get_origin((rect.right(), rect.bottom()))
+        movable = None
+        if self.selected_npc:
+            movable = movement_class(self.selected_npc.movable_terrain)
 
-                if image:
-                    painter.drawPixmap(
-                        px, py, self.cell_size, self.cell_size, image)
+        for ky in range(ky0, ky1 + 1, size):
+            for kx in range(kx0, kx1 + 1, size):
+                part = rect.intersected(QRect(kx, ky, size, size))
+                if part.isEmpty():
+                    continue
+                block = mgr.block_cache.get((kx, ky))
+                if block is None:
+                    self._paint_unloaded(painter, part, min_x, min_y)
+                else:
+                    self._paint_block_part(painter, block, part,
+                                           min_x, min_y, movable)
+
+    def _paint_unloaded(self, painter: QPainter, part: QRect,
+                        min_x: int, min_y: int):
+        cs = self.cell_size
+        painter.setPen(QPen(Qt.black))
+        painter.setBrush(QBrush(self.default_empty_cell_color))
+        for gy in range(part.top(), part.bottom() + 1):
+            for gx in range(part.left(), part.right() + 1):
+                px, py = self.convert_pos_grid_to_win(gx - min_x, gy - min_y)
+                painter.fillRect(px, py, cs, cs, Qt.darkGray)
+                painter.drawRect(px, py, cs, cs)
+
+    def _paint_block_part(self, painter: QPainter, block, part: QRect,
+                          min_x: int, min_y: int, movable):
+        cs = self.cell_size
+        cols = block.columns
+        n = self.tile_cache.tile_cells(cs)
+
+        # 1. 바탕 : 겹치는 타일마다 한 번씩 복사
+        bx0, by0 = part.left() - cols.x0, part.top() - cols.y0
+        bx1, by1 = part.right() - cols.x0, part.bottom() - cols.y0
+        for ty in range(by0 // n, by1 // n + 1):
+            for tx in range(bx0 // n, bx1 // n + 1):
+                tile = self.tile_cache.get(block, tx, ty, cs, movable)
+                sx0, sy0 = max(bx0, tx * n), max(by0, ty * n)
+                sx1 = min(bx1, tx * n + n - 1)
+                sy1 = min(by1, ty * n + n - 1)
+                px, py = self.convert_pos_grid_to_win(
+                    cols.x0 + sx0 - min_x, cols.y0 + sy0 - min_y)
+                painter.drawPixmap(
+                    px, py, tile,
+                    (sx0 - tx * n) * cs, (sy0 - ty * n) * cs,
+                    (sx1 - sx0 + 1) * cs, (sy1 - sy0 + 1) * cs)
+
+        # 2. 경로/목표 표시 (선택된 NPC 기준)
+        if self.selected_npc:
+            flags = cols.grid(cols.flags)[by0:by1 + 1, bx0:bx1 + 1]
+            marked = flags & (CellFlag.ROUTE.value | CellFlag.GOAL.value)
+            for dy, dx in zip(*(a.tolist() for a in np.nonzero(marked))):
+                gx, gy = cols.x0 + bx0 + dx, cols.y0 + by0 + dy
+                if flags[dy, dx] & CellFlag.GOAL.value:
+                    image = ImageManager.get_goal_image()
+                else:
+                    image = self.selected_npc.get_proto_route_image((gx, gy))
+                if not image:
+                    continue
+                px, py = self.convert_pos_grid_to_win(gx - min_x, gy - min_y)
+                painter.fillRect(px, py, cs, cs, Qt.darkGray)
+                painter.drawPixmap(px, py, cs, cs, image)
+
+        # 3. 텍스트 (셀이 충분히 클 때만)
+        if cs > self.min_size_for_text:
+            painter.setPen(QPen(Qt.black))
+            painter.setFont(QFont("Courier", 10))
+            for gy in range(part.top(), part.bottom() + 1):
+                for gx in range(part.left(), part.right() + 1):
+                    cell = block.cell_at(gx, gy)
+                    px, py = self.convert_pos_grid_to_win(
+                        gx - min_x, gy - min_y)
+                    painter.drawText(px, py, cs, cs,
+                                     Qt.AlignCenter, cell.text())
+
+    def _scroll_cached(self, min_x: int, min_y: int,
+                       rects: list[QRect]) -> bool:
+        """
+        중심 이동만큼 cached_pixmap을 밀고 새로 드러난 영역을 rects에 넣는다.
+        화면을 통째로 벗어났으면 False (전체를 다시 그린다)
+        """
+        ox, oy = self._drawn_origin
+        dx, dy = min_x - ox, min_y - oy
+        gw, gh = self.grid_width, self.grid_height
+        if abs(dx) >= gw or abs(dy) >= gh:
+            return False
+
+        cs = self.cell_size
+        left, top = self.convert_pos_grid_to_win(0, 0)
+        self.cached_pixmap.scroll(
+            -dx * cs, -dy * cs, QRect(left, top, gw * cs, gh * cs))
+
+        if dx:
+            x = min_x + gw - dx if dx > 0 else min_x
+            rects.append(QRect(x, min_y, abs(dx), gh))
+        if dy:
+            y = min_y + gh - dy if dy > 0 else min_y
+            rects.append(QRect(min_x, y, gw, abs(dy)))
+        return True
+
+    def _collect_dirty_cells(self, view: QRect,
+                             rects: list[QRect]) -> set[tuple[int, int]]:
+        """
+        화면에 걸친 블럭의 바뀐 셀을 돌려준다.
+        로딩/축출된 블럭은 영역째 rects에 넣는다.
+        """
+        mgr = self.world.block_mgr
+        size = mgr.block_size
+        x0, y0 = view.left(), view.top()
+        x1, y1 = view.right(), view.bottom()
+        kx0, ky0 = mgr.get_origin((x0, y0))
+        kx1, ky1 = mgr.get_origin((x1, y1))
+
+        dirty: set[tuple[int, int]] = set()
+        present = set()
+        for ky in range(ky0, ky1 + 1, size):
+            for kx in range(kx0, kx1 + 1, size):
+                key = (kx, ky)
+                block = mgr.block_cache.get(key)
+                if block is None:
+                    continue
+                present.add(key)
+                changed = block.columns.take_render_dirty()
+                if changed is None or key not in self._drawn_blocks:
+                    rects.append(QRect(kx, ky, size, size).intersected(view))
+                    continue
+                cols = block.columns
+                for index in changed:
+                    x, y = cols.coord_of(index)
+                    if x0 <= x <= x1 and y0 <= y <= y1:
+                        dirty.add((x, y))
+
+        # 화면에 있던 블럭이 축출되었다.
+        for kx, ky in self._drawn_blocks - present:
+            rects.append(QRect(kx, ky, size, size).intersected(view))
+        self._drawn_blocks = present
+        return dirty
+
+    def draw_overlays(self, painter: QPainter):
+        """매 프레임 바뀌는 것들 : NPC(보간 위치), 선택 표시, hover"""
+        min_x = self.center_x - (self.grid_width // 2)
+        min_y = self.center_y - (self.grid_height // 2)
+        rect = QRect(min_x, min_y, self.grid_width, self.grid_height)
 
-                if self.cell_size > self.min_size_for_text:
-                    painter.setPen(pen_black)
-                    painter.setFont(font)
-                    painter.drawText(px, py, self.cell_size, self.cell_size, 
-                                    Qt.AlignCenter, cell.text())
+        for npc in self.world.get_npcs_in_rect(rect):
+            win_pos_x, win_pos_y = self.get_win_pos_at_coord(npc.start)
+            if win_pos_x is not None and win_pos_y is not None:
+                npc.draw(painter, win_pos_x, win_pos_y, self.cell_size)
 
         if self.selected_npc:
             npc_start = self.selected_npc.start
@@ -366,13 +543,6 @@ class GridCanvas(QWidget):
         if self.last_mouse_pos:
             self.draw_hover_cell(painter, self.last_mouse_pos, 120)
 
-        painter.end()
-
-        if g_logger.debug_mode:
-            t1 = time.time()
-            elapsed = (t1 - t0) * 1000
-            self.draw_cells_elapsed.emit(elapsed)       
-
     # 나머지: 입력 처리, hover 표시, 클릭 처리 등은 원래 코드 유지
     def keyPressEvent(self, event):
         key = event.key()
@@ -412,7 +582,8 @@ class GridCanvas(QWidget):
     # 마우스 이동 시 위치 저장 후 업데이트
     def _on_mouse_moved(self, event: QMouseEvent):
         self.last_mouse_pos = event.position().toPoint()
-        self.request_redraw()
+        # hover는 paintEvent에서 그리므로 셀은 다시 그리지 않는다.
+        self.update()
         # self.update()
 
     def focusOutEvent(self, event):
@@ -729,5 +900,4 @@ class GridCanvas(QWidget):
 
     def clear_proto_flags(self):
         for block in self.world.block_mgr.block_cache.values():
-            for cell in block.cells.values():
-                cell.remove_flag(CellFlag.ROUTE)
+            block.remove_flag_all(CellFlag.ROUTE)
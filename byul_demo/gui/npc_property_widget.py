@@ -68,6 +68,10 @@ class NpcPropertyWidget(QWidget):
         self.retry_spin.setValue(self.npc.max_retry)
         self.form.addRow("🔁 최대 재시도:", self.retry_spin)
 
+        self.incremental_cb = QCheckBox("D* Lite 증분 재탐색")
+        self.incremental_cb.setChecked(self.npc.incremental_replan)
+        self.form.addRow(self.incremental_cb)
+
         # ── 그래픽 설정 ──
         self.disp_dx_spin = QDoubleSpinBox()
         self.disp_dx_spin.setRange(-1000.0, 1000.0)
@@ -152,6 +156,8 @@ class NpcPropertyWidget(QWidget):
                 npc.set_max_retry(self.retry_spin.value())
             )
 
+            self.incremental_cb.toggled.connect(npc.set_incremental_replan)
+
             npc.disp_dx_changed.connect(self.disp_dx_spin.setValue)
             self.disp_dx_spin.valueChanged.connect(npc.set_disp_dx)
             self.disp_dx_spin.editingFinished.connect(lambda:
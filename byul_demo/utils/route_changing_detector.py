@@ -43,6 +43,19 @@ class RouteChangingDetector:
         count = len(self.history)
         return (sx / count, sy / count, sz / count)
 
+    def get_heading(self):
+        """
+        평균 진행 방향의 (x, y) 단위 벡터. 히스토리가 없거나
+        방향이 상쇄되어 정지와 다름없으면 None
+        """
+        avg_vec = self._get_average_vector()
+        if avg_vec is None:
+            return None
+        mag = math.sqrt(avg_vec[0]**2 + avg_vec[1]**2)
+        if mag < 1e-5:
+            return None
+        return (avg_vec[0] / mag, avg_vec[1] / mag)
+
     def has_changed(self, from_pos, to_pos, angle_threshold_deg=10):
         """
         경로가 변경되었는지 판단한다.
@@ -26,6 +26,7 @@ from utils.log_to_panel import g_logger
 from queue import Queue, Empty
 
 import random
+import time
 
 import uuid
 import math
@@ -39,7 +40,8 @@ import copy
 from world.npc.npc_animator import DirectionalAnimator
 from world.npc.npc_pos import NpcPos
 
-from world.route_engine.common import RouteResult
+from world.route_engine.common import RouteResult, RouteRequest
+from world.route_engine.obstacle_map import movement_class
 from route_finder import RouteFindertype
 
 from typing import TYPE_CHECKING
@@ -67,11 +69,15 @@ class NPC(QObject):
                  max_retry = 1000, 
                  influence_range = 0,
                  max_range = 10,
+                 incremental_replan: bool = False,
                  image_path:Path=None, route_image_path:Path=None, 
                  parent=None):
         
         '''start_delay_sec는 dstar_lite에서는 0.5 밑으로는 설정하지 마라.
         여러번 클릭시에 경로 찾기가 잠깐 멈춘다 다시 클릭해야 npc가 움직인다.
+
+        incremental_replan이면 AlgoEngine 대신 DslEngine의 D* Lite 세션으로
+        찾고, 장애물이 바뀌면 처음부터 찾지 않고 경로를 고친다.
         '''
         super().__init__()
         self.parent = parent
@@ -87,7 +93,10 @@ class NPC(QObject):
 
         self.algotype = algotype
         self.max_retry = max_retry
+        self.incremental_replan = incremental_replan
         self.set_compute_max_retry(max_retry)
+        # 구간 결과를 이보다 오래 못 받으면 그 구간을 다시 요청한다.
+        self.segment_timeout_sec = 10.0
 
         self.route_capacity = route_capacity
         self.set_route_capacity(route_capacity)
@@ -117,6 +126,15 @@ class NPC(QObject):
 
         self.goal_list:list[tuple[int,int]] = list()
 
+        # 먼 목표는 블럭 단위 중간 목표로 나눠서 한 구간씩 찾는다.
+        self._waypoints: list[tuple[int,int]] = list()
+        self._segment_start = None
+        self._segment_pending = False
+        # 기다리는 구간 (start, goal), 요청 시각, AlgoEngine 요청
+        self._segment = None
+        self._segment_time = 0.0
+        self._segment_request: RouteRequest | None = None
+
         self.real_list = list()
         
         self.proto_list = list()
@@ -133,6 +151,8 @@ class NPC(QObject):
         self.start = (0,0)        
         self.goal = self.start
         self.cur_index_changed = False
+        # COARSE/DISTANT에서 다음 칸까지 진행한 비율 (칸 단위)
+        self._lod_progress = 0.0
 
     @Slot(int)
     def set_route_capacity(self, capacity:int):
@@ -144,6 +164,13 @@ class NPC(QObject):
         self.max_retry = max_retry
         self.compute_max_retry_changed.emit(max_retry)
 
+    @Slot(bool)
+    def set_incremental_replan(self, enabled: bool):
+        """다음 길찾기부터 적용한다. 끄면 D* Lite 세션을 버린다."""
+        self.incremental_replan = enabled
+        if not enabled:
+            self.world.dsl_engine.drop(self.id)
+
     @Slot(float)
     def set_speed_kmh(self, speed_kmh:float):
         self.speed_kmh = speed_kmh
@@ -189,6 +216,7 @@ class NPC(QObject):
     def move_to(self, coord: tuple):
         self.loop_once = True
         self.goal_list.clear()
+        self._waypoints.clear()
         self.append_goal(coord)
         self.goal = coord
 
@@ -228,12 +256,8 @@ class NPC(QObject):
         return int((self.world.grid_unit_m / speed_mps) * 1000)
 
     def on_tick(self, elapsed_sec: float):
-        # 길찾기 요청 조건 (목표 존재 + 시작 ≠ 목표)
-        if len(self.goal_list) > 0 and self.start != self.goal:
-            g_logger.log_debug(f'지금 find()가 실행되었다 '
-                f'elapsed_sec : {elapsed_sec}, '
-                f'start_delay_sec : {self.start_delay_sec}')
-            self.find()
+        """화면 안 NPC (SimLevel.FULL) : 칸 사이를 애니메이션으로 보간한다."""
+        self._request_route(elapsed_sec)
 
         # 경로가 존재하고, 아직 도달하지 않았는가?
         if len(self.proto) > 0 and self.cur_index < len(self.proto):
@@ -243,56 +267,238 @@ class NPC(QObject):
 
                 self.direction = self.proto.get_direction_by_index(self.cur_index)
                 self.animator.start(self.direction)
+                self._lod_progress = 0.0
 
                 self.cur_index_changed = False
 
-            # animator가 실행 중이면 tick을 제출
-            if self.animator.is_anim_started():
-                self.world.animator_engine.submit(self.animator, elapsed_sec)
+            # 진행은 World.step_animations()가 모든 NPC를 모아서 한다.
+
+    def on_tick_coarse(self, elapsed_sec: float):
+        """
+        화면 근처 NPC (SimLevel.COARSE) : 보간 없이 한 칸씩 옮긴다.
+        셀 배치와 장애물 갱신은 on_tick()과 같다.
+        """
+        self._request_route(elapsed_sec)
+        self._leave_animation()
+
+        self._lod_progress += elapsed_sec * self.speed_cells_per_sec()
+        while self._lod_progress >= 1.0:
+            if not self._has_next_cell():
+                self._lod_progress = 0.0
+                break
+            if not self._arrive_at(self.cur_index + 1):
+                break  # 다음 칸의 블럭이 아직 로드되지 않았다.
+            self._lod_progress -= 1.0
+
+    def on_tick_distant(self, elapsed_sec: float):
+        """
+        먼 NPC (SimLevel.DISTANT) : 낮은 빈도로 불린다. 흐른 시간만큼
+        경로 위의 위치를 계산해서 중간 칸을 거치지 않고 바로 옮긴다.
+        """
+        self._request_route(elapsed_sec)
+        self._leave_animation()
+
+        self._lod_progress += elapsed_sec * self.speed_cells_per_sec()
+        steps = int(self._lod_progress)
+        if steps <= 0:
+            return
+        if not self._has_next_cell():
+            self._lod_progress = 0.0
+            return
+        old_index = self.cur_index
+        index = min(old_index + steps, len(self.proto) - 1)
+        # 로드되지 않은 블럭으로는 건너뛰지 않는다. (그 앞까지만)
+        block_mgr = self.world.block_mgr
+        while index > old_index and block_mgr.get_cell(
+                self.proto.coord_at(index).to_tuple()) is None:
+            index -= 1
+        if index <= old_index or not self._arrive_at(index):
+            return
+        if self._has_next_cell():
+            # 실제로 나아간 칸 수만큼만 쓴다.
+            self._lod_progress -= index - old_index
+        else:
+            self._lod_progress = 0.0
+
+    def speed_cells_per_sec(self) -> float:
+        return self.speed_kmh * 1000 / 3600.0 / self.world.grid_unit_m
+
+    def _request_route(self, elapsed_sec: float):
+        # 길찾기 요청 조건 (목표 존재 + 시작 ≠ 목표)
+        if len(self.goal_list) > 0 and self.start != self.goal:
+            g_logger.log_debug(f'지금 find()가 실행되었다 '
+                f'elapsed_sec : {elapsed_sec}, '
+                f'start_delay_sec : {self.start_delay_sec}')
+            self.world.request_find(self)
+        elif ((self._waypoints or self._segment_pending) and
+              self._needs_next_segment()):
+            self.world.request_find(self)
+
+    def _has_next_cell(self) -> bool:
+        return (len(self.proto) > 0 and
+                self.cur_index + 1 < len(self.proto) and
+                self.start != self.goal)
+
+    def _leave_animation(self):
+        """보간 중이던 애니메이션을 멈추고 진행한 비율을 이어받는다."""
+        if not self.animator.is_anim_started():
+            return
+        pos = self.pos
+        self._lod_progress = max(abs(pos.disp_dx), abs(pos.disp_dy))
+        self.animator.stop()
+        pos.update_disp(0.0, 0.0)
+        self.cur_index_changed = True
 
     def on_anim_tick_cb(self):
         # 필요 시 디버깅/로깅 가능
         pass
 
     def on_anim_complete_cb(self):
-        self.cur_index += 1
+        self._arrive_at(self.cur_index + 1)
+
+    def _arrive_at(self, index: int) -> bool:
+        """
+        경로의 index번째 칸으로 옮긴다. (모든 SimLevel 공통)
+        goal은 길찾기 목표이므로 그대로 두고, 셀 배치와 두 셀의 장애물
+        갱신은 place_npc_to_cell()이 한다.
+        그 칸의 블럭이 로드되지 않았으면 옮기지 않고 False
+        """
+        next = self.proto.coord_at(index).to_tuple()
+        if self.world.block_mgr.get_cell(next) is None:
+            # 블럭이 로드되면 on_tick()이 같은 칸으로 다시 움직인다.
+            self.pos.update_disp(0.0, 0.0)
+            self.cur_index_changed = True
+            return False
+
+        self.cur_index = index
         self.cur_index_changed = True
-        next = self.proto.coord_at(self.cur_index).to_tuple()
-        self.pos.move_to(next)
-        self.world.set_start(self, next)
+        self.world.place_npc_to_cell(self, next)
+
         if self.start == self.goal:
+            # 목표에 도착했다. 다음 경로는 처음부터 쌓는다.
+            self.proto = c_route()
+            self.proto_list.clear()
             self.cur_index = 0
-
-        self.world.add_changed_coord(self.goal)
+            if self.incremental_replan:
+                # 다음 목표는 plan()이 새 세션으로 찾는다.
+                self.world.dsl_engine.drop(self.id)
+        return True
 
     def on_anim_start_cb(self):
         # 필요 시 효과음, 감정 연출 등 후처리
         # grid_canvas에서 그림을 제거해야한다.
         pass
 
-    def find(self):
+    def _next_goal(self):
         if len(self.goal_list) > 0:
-            goal = self.goal_list.pop(0)
+            return self.goal_list.pop(0)
+        if self.start == self.goal:
+            return None
+        return self.goal
+
+    def _next_segment(self):
+        """
+        다음에 찾을 (start, goal) 구간.
+        먼 목표는 World.plan_waypoints()로 블럭 단위 중간 목표로 나누고,
+        이어지는 구간은 앞 구간의 끝에서 시작한다.
+        """
+        if self._waypoints:
+            start = self._segment_start
+            goal = self._waypoints.pop(0)
         else:
-            if self.start == self.goal:
-                return
-            goal = self.goal
-            
-        map = self.world.map
-        map.set_is_coord_blocked_fn(self._is_blocked_cb)
-        self.world.route_finder_engine.submit(
-            map,
-            self.id,
-            self.algotype,
-            self.start,
-            goal,
-            self.on_proto_found,
-            self.max_retry,
+            goal = self._next_goal()
+            if goal is None:
+                return None
+            start = self.start
+            waypoints = self.world.plan_waypoints(self, start, goal)
+            if waypoints:
+                goal = waypoints[0]
+                self._waypoints = waypoints[1:]
+
+        self._segment_start = goal
+        self._segment_pending = True
+        self._segment = (start, goal)
+        self._segment_time = time.monotonic()
+        self._segment_request = None
+        return start, goal
+
+    def _segment_lost(self) -> bool:
+        """기다리는 구간 요청이 취소되었거나 segment_timeout_sec 동안 답이 없다."""
+        request = self._segment_request
+        if request is not None and request.cancelled():
+            return True
+        return time.monotonic() - self._segment_time > self.segment_timeout_sec
+
+    def _retry_segment(self):
+        """잃어버린 구간을 취소하고 _waypoints 맨 앞에 되돌려 다시 찾게 한다."""
+        request = self._segment_request
+        if request is not None and request.handle is not None:
+            request.handle.cancel()  # 늦게 온 결과가 이어 붙지 않게 한다.
+        start, goal = self._segment
+        g_logger.log_debug(f'npc_id : {self.id}, 구간 {start} -> {goal} 재요청')
+        self._waypoints.insert(0, goal)
+        self._segment_start = start
+        self._segment_pending = False
+        self._segment_request = None
+
+    def _needs_next_segment(self) -> bool:
+        """앞 구간이 끝나 가면(남은 경로가 블럭 하나보다 짧으면) True"""
+        if self._segment_pending:
+            if not self._segment_lost():
+                return False
+            self._retry_segment()
+        remaining = len(self.proto) - self.cur_index
+        return remaining < self.world.block_mgr.block_size
+
+    def make_route_request(self) -> RouteRequest | None:
+        """World.request_find()가 배치로 보낼 다음 길찾기 요청"""
+        segment = self._next_segment()
+        if segment is None:
+            return None
+        start, goal = segment
+        request = RouteRequest(
+            map=self.world.obstacle_maps.snapshot(self.movable_terrain),
+            npc_id=self.id,
+            type=self.algotype,
+            start=start,
+            goal=goal,
+            on_route_found_cb=self.world.route_found.emit,
+            max_retry=self.max_retry,
+            priority=self.world.route_priority(self),
+            blocked=self.world.npc_overlay(self, start, goal),
         )
+        # 같은 npc_id의 새 요청이 이 요청을 취소(supersede)했는지 본다.
+        self._segment_request = request
+        return request
+
+    def find(self):
+        if self.incremental_replan:
+            segment = self._next_segment()
+            if segment is None:
+                return
+            self.world.plan_incremental(self, *segment)
+            return
+
+        # 이동 등급별로 미리 계산된 장애물 맵의 스냅샷을 쓴다.
+        # 요청마다 자기 맵을 들고 가므로 다른 요청이나 갱신과 섞이지 않는다.
+        # 결과는 워커 쓰레드에서 오므로 World를 거쳐 메인 쓰레드에서 받는다.
+        request = self.make_route_request()
+        if request is None:
+            return
+        self.world.route_finder_engine.submit_batch(
+            [request], movement_class=movement_class(self.movable_terrain))
 
     def on_proto_found(self, result:RouteResult):
         id = result.npc_id
         route:c_route = result.route
+        self._segment_pending = False
+        self._segment_request = None
+        if not route.is_success() and self._waypoints:
+            # 로드되지 않았던 블럭이 막혀 있었다. 남은 계획은 버린다.
+            g_logger.log_debug_threadsafe(
+                f'npc_id : {id}, 구간 길찾기 실패, 중간 목표 '
+                f'{len(self._waypoints)}개 취소')
+            self._waypoints.clear()
         self.proto.append(route, nodup=True)
 
         a_list = route.coords().to_list()
@@ -300,17 +506,15 @@ class NPC(QObject):
         for i in range(len(a_list)):
             self.proto_list.append(a_list[i])
 
-        # 길이 초과 시 마지막 N개만 유지
-        if len(self.proto_list) > self.route_capacity:
-            self.proto_list[:] = self.proto_list[-self.route_capacity:]
-
-        end  = len(self.proto)
-        if end > self.route_capacity:
-            odd = end - self.route_capacity
-            start = odd
-
-            sliced = self.proto.slice(start, end)
-            self.proto = sliced
+        # 길이 초과 시 이미 지나온 칸만 버리고 cur_index를 그만큼 당긴다.
+        # 앞으로 갈 칸은 버리지 않으므로 구간을 이어 붙인 경로는
+        # route_capacity보다 길어질 수 있다.
+        end = len(self.proto)
+        drop = min(end - self.route_capacity, self.cur_index)
+        if drop > 0:
+            self.proto = c_route(raw_ptr=self.proto.slice(drop, end), own=True)
+            self.cur_index -= drop
+            self.proto_list[:] = self.proto.coords().to_list()
 
         g_logger.log_debug_threadsafe(
             f'npc_id : {id}, len(proto_list): {len(self.proto_list)}')
@@ -323,6 +527,30 @@ class NPC(QObject):
         # coord =  self.proto_list[-1].to_tuple()
         # self.world.set_start(self, coord)
 
+    def on_route_repaired(self, result:RouteResult):
+        """
+        D* Lite가 고친 경로로 지금 위치부터 다시 간다.
+        고친 경로는 repair를 요청한 때의 위치에서 시작하므로 지금 칸부터
+        잘라 쓴다. 그 사이 경로 밖으로 나갔으면 버리고 다시 고친다.
+        """
+        route: c_route = result.route
+        coords = [c.to_tuple() for c in route.coords().to_list()]
+        if not route.is_success() or not coords:
+            return  # 고칠 수 없었다. 지금 경로로 가다가 다음 변경에서 다시 본다.
+        if self.start not in coords:
+            self.world.repair_incremental(self)
+            return
+        index = coords.index(self.start)
+        if index > 0:
+            route = c_route(raw_ptr=route.slice(index, len(coords)), own=True)
+
+        self._leave_animation()
+        self.world.clear_proto_flags(self)
+        self.proto = c_route()
+        self.proto_list.clear()
+        self.cur_index = 0
+        self.on_proto_found(RouteResult(result.npc_id, route))
+
     def _move_cb(self, coord_c:'c_coord', userdata):
         try:
             g_logger.log_debug_threadsafe(f"[MOVE_CB] 받은 이동 좌표: {coord_c}")
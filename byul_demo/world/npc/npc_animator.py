@@ -30,67 +30,35 @@ class DirectionalAnimator:
     def set_cell_size(self, cell_size: int):
         self.cell_size = cell_size
 
+    @property
+    def world(self) -> 'World':
+        return self.npc.world
+
     def start(self, direction:RouteDir):
-        """애니메이션 시작 (tick 호출 필요)"""
+        """
+        애니메이션 시작. 실제 진행은 world.animator_engine.step()이
+        다른 NPC들과 함께 한 번에 한다.
+        """
+        self.direction = direction
+        self.next = c_route.direction_to_coord(direction)
         self.is_running = True
         self.on_start_cb()
-        self.direction = direction
-
-    def tick(self, elapsed_sec: float):
-        """tick 기반 애니메이션 동작"""
-        if not self.is_running or not self.npc or not self.world:
-            return
 
         npc = self.npc
-
-        self.total_elapsed_sec += elapsed_sec
-        if self.total_elapsed_sec < npc.start_delay_sec:
-            return
-
-        arrived = self._step_ratio(elapsed_sec)
-
-        self.on_tick_cb()
-
-        if arrived:
-            self.is_running = False
-            self.on_complete_cb()
-
-    def _step_ratio(self, elapsed_sec: float, tolerance: float = 1e-4) -> bool:
-        """
-        NPC의 disp_dx/dy를 목표 값까지 직접 보간하여 이동한다.
-        
-        Returns:
-            bool: x, y가 모두 목표 위치에 도달하면 True
-        """
         grid_unit_m = self.world.grid_unit_m
-        speed_cells_per_sec = self.npc.speed_kmh * 1000 / 3600.0 / grid_unit_m
-        delta = speed_cells_per_sec * elapsed_sec
-
-        # 현재 보간 상태
-        rel_x = self.npc.pos.disp_dx
-        rel_y = self.npc.pos.disp_dy
-
-        # 목표값
-        target_x = self.next[0]
-        target_y = self.next[1]
-
-        # X축 보간
-        dx = target_x - rel_x
-        if abs(dx) <= delta + tolerance:
-            rel_x = target_x
-            x_done = True
-        else:
-            rel_x += delta if dx > 0 else -delta
-            x_done = False
-
-        # Y축 보간
-        dy = target_y - rel_y
-        if abs(dy) <= delta + tolerance:
-            rel_y = target_y
-            y_done = True
-        else:
-            rel_y += delta if dy > 0 else -delta
-            y_done = False
+        speed_cells_per_sec = npc.speed_kmh * 1000 / 3600.0 / grid_unit_m
+        self.world.animator_engine.start(
+            self, (self.next[0], self.next[1]), speed_cells_per_sec,
+            npc.start_delay_sec)
+
+    def stop(self):
+        """진행 중인 애니메이션을 멈춘다. (완료 콜백은 부르지 않는다)"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.world.animator_engine.stop(self)
 
-        self.npc.pos.update_disp(rel_x, rel_y)
-        return x_done and y_done
+    def finish(self):
+        """엔진이 목표 도착을 알릴 때 (메인 쓰레드)"""
+        self.is_running = False
+        self.on_complete_cb()
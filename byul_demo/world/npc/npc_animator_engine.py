@@ -1,41 +1,124 @@
 # animator_engine.py
 
-from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
-import threading
+import numpy as np
 
-class AnimatorTask:
-    def __init__(self, animator, elapsed_sec):
-        self.animator = animator
-        self.elapsed_sec = elapsed_sec
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from world.npc.npc_animator import DirectionalAnimator
 
 class AnimatorEngine:
-    def __init__(self, max_workers=8):
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.queue = Queue()
-        self.running = True
-        self.thread = threading.Thread(
-            target=self._dispatcher_loop, daemon=True)
-        self.thread.start()
-
-    def submit(self, animator, elapsed_sec):
-        """애니메이터를 큐에 제출한다. (NPC가 아니라 Animator 기준)"""
-        if animator and animator.is_anim_started():
-            self.queue.put(AnimatorTask(animator, elapsed_sec))
-
-    def _dispatcher_loop(self):
-        while self.running:
-            task = self.queue.get()
-            if task is None:
-                break
-            self.executor.submit(self._process_task, task)
-
-    def _process_task(self, task: AnimatorTask):
-        task.animator.tick(task.elapsed_sec)
-        # tick() 내부에서 on_anim_complete() 호출됨
-        # 필요시 이후 프레임처리는 NPC가 직접 구현 가능
+    """
+    실행 중인 모든 NPC 애니메이션을 NumPy 배열로 한 번에 진행한다.
+
+    슬롯마다 현재 보간값(disp), 목표 보간값(target), 속도(셀/초),
+    시작 지연(delay)과 누적 시간(elapsed)을 배열에 담고, step()이 한 번의
+    배열 연산으로 전부 진행한 뒤 도착한 애니메이터 목록을 돌려준다.
+
+    메인 쓰레드에서만 쓴다. 도착 콜백(on_complete_cb)도 메인 쓰레드에서
+    step()을 부른 쪽이 처리한다.
+    """
+
+    def __init__(self, capacity: int = 256, tolerance: float = 1e-4):
+        self.tolerance = tolerance
+        self._alloc(max(1, capacity))
+
+        self._animators: list['DirectionalAnimator | None'] = [None] * self.capacity
+        self._slots: dict['DirectionalAnimator', int] = {}
+        self._free: list[int] = list(range(self.capacity - 1, -1, -1))
+
+    def _alloc(self, capacity: int):
+        self.capacity = capacity
+        self.disp = np.zeros((capacity, 2), dtype=np.float64)
+        self.target = np.zeros((capacity, 2), dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.delay = np.zeros(capacity, dtype=np.float64)
+        self.elapsed = np.zeros(capacity, dtype=np.float64)
+        self.active = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        old = (self.disp, self.target, self.speed, self.delay,
+               self.elapsed, self.active)
+        n = self.capacity
+        self._alloc(n * 2)
+        for new, prev in zip((self.disp, self.target, self.speed, self.delay,
+                              self.elapsed, self.active), old):
+            new[:n] = prev
+        self._animators.extend([None] * n)
+        self._free.extend(range(self.capacity - 1, n - 1, -1))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def start(self, animator: 'DirectionalAnimator', target: tuple,
+              speed_cells_per_sec: float, delay_sec: float):
+        """
+        애니메이터를 등록한다. 이미 있으면 목표와 속도만 바꾼다.
+        target : 도착 시의 (disp_dx, disp_dy)
+        """
+        slot = self._slots.get(animator)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._free.pop()
+            self._slots[animator] = slot
+            self._animators[slot] = animator
+            self.elapsed[slot] = animator.total_elapsed_sec
+
+        pos = animator.npc.pos
+        self.disp[slot] = (pos.disp_dx, pos.disp_dy)
+        self.target[slot] = target
+        self.speed[slot] = speed_cells_per_sec
+        self.delay[slot] = delay_sec
+        self.active[slot] = True
+
+    def stop(self, animator: 'DirectionalAnimator'):
+        slot = self._slots.pop(animator, None)
+        if slot is None:
+            return
+        animator.total_elapsed_sec = float(self.elapsed[slot])
+        self.active[slot] = False
+        self._animators[slot] = None
+        self._free.append(slot)
+
+    def step(self, elapsed_sec: float) -> list['DirectionalAnimator']:
+        """
+        모든 애니메이션을 elapsed_sec만큼 진행하고 NPC 보간값을 갱신한다.
+        목표에 도착한 애니메이터는 등록을 풀고 목록으로 반환한다.
+        """
+        idx = np.flatnonzero(self.active)
+        if idx.size == 0:
+            return []
+
+        self.elapsed[idx] += elapsed_sec
+        # 시작 지연이 지나지 않은 것은 움직이지 않는다.
+        idx = idx[self.elapsed[idx] >= self.delay[idx]]
+        if idx.size == 0:
+            return []
+
+        disp = self.disp[idx]
+        target = self.target[idx]
+        delta = (self.speed[idx] * elapsed_sec)[:, None]
+
+        diff = target - disp
+        done = np.abs(diff) <= delta + self.tolerance
+        disp = np.where(done, target, disp + np.sign(diff) * delta)
+        self.disp[idx] = disp
+        arrived = done.all(axis=1)
+
+        animators = self._animators
+        for slot, (dx, dy) in zip(idx.tolist(), disp.tolist()):
+            animator = animators[slot]
+            animator.npc.pos.update_disp(dx, dy)
+            animator.on_tick_cb()
+
+        finished = [animators[slot] for slot in idx[arrived].tolist()]
+        for animator in finished:
+            self.stop(animator)
+        return finished
+
+    def clear(self):
+        for animator in list(self._slots):
+            self.stop(animator)
 
     def shutdown(self):
-        self.running = False
-        self.queue.put(None)
-        self.executor.shutdown(wait=True)
+        self.clear()
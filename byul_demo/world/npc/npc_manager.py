@@ -1,4 +1,4 @@
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, QRect, Signal
 
 from PySide6.QtCore import QObject
 from world.npc.npc import NPC
@@ -12,11 +12,23 @@ from utils.log_to_panel import g_logger
 class NPCManager(QObject):
     npc_created = Signal(str)
 
-    def __init__(self, world: "World"):
+    def __init__(self, world: "World", bucket_size: int = 16,
+                 block_size: int = 100):
         super().__init__()
         self.npc_dict: dict[str, NPC] = {}
         self.world = world
 
+        # 블럭 인덱스 : 블럭 원점 -> 그 블럭의 셀에 배치된 npc_id
+        # 블럭 로딩/축출 때 전체 NPC를 훑지 않는다.
+        self.block_size = block_size
+        self._block_npcs: dict[tuple[int, int], set[str]] = {}
+
+        # 공간 인덱스 : bucket_size x bucket_size 셀 단위 격자 버킷
+        # 셀을 훑지 않고 버킷에 든 NPC만 확인한다.
+        self.bucket_size = bucket_size
+        self._buckets: dict[tuple[int, int], set[str]] = {}
+        self._npc_coords: dict[str, tuple[int, int]] = {}
+
     def has_npc(self, npc_id: str) -> bool:
         return npc_id in self.npc_dict
 
@@ -42,6 +54,8 @@ class NPCManager(QObject):
         if not npc:
             return
 
+        self.unindex_npc(npc_id)
+
         npc.start = None
         npc.close()  # 또는 필요 시 npc.reset()
         g_logger.log_debug(f"[NPCManager] npc({npc_id}) 제거 완료")
@@ -55,6 +69,10 @@ class NPCManager(QObject):
             except Exception as e:
                 g_logger.log_debug(f"[NPCManager] npc({npc_id}) 초기화 실패: {e}")
 
+        self._buckets.clear()
+        self._block_npcs.clear()
+        self._npc_coords.clear()
+
     def attach_npc(self, npc: NPC):
         """
         외부에서 생성된 NPC를 이 매니저에 등록하고 위치 정보를 설정한다.
@@ -74,6 +92,106 @@ class NPCManager(QObject):
         npc_id = npc.id
 
         self.npc_dict.pop(npc_id, None)
+        self.unindex_npc(npc_id)
 
         npc.start = None  # 위치 초기화
         g_logger.log_debug(f"[NPCManager] npc({npc_id}) 연결 해제 완료")
+
+    # ───── 공간 인덱스 ─────
+    def _bucket_of(self, coord: tuple[int, int]) -> tuple[int, int]:
+        return (coord[0] // self.bucket_size, coord[1] // self.bucket_size)
+
+    def _block_of(self, coord: tuple[int, int]) -> tuple[int, int]:
+        bs = self.block_size
+        return ((coord[0] // bs) * bs, (coord[1] // bs) * bs)
+
+    def update_npc_coord(self, npc_id: str, coord: tuple[int, int] | None):
+        """NPC가 셀에 배치되거나 이동했을 때 인덱스를 갱신한다. None이면 제거"""
+        if coord is None:
+            self.unindex_npc(npc_id)
+            return
+
+        coord = (coord[0], coord[1])
+        old = self._npc_coords.get(npc_id)
+        if old == coord:
+            return
+
+        if old is not None:
+            self._move_in(self._buckets, self._bucket_of(old),
+                          self._bucket_of(coord), npc_id)
+            self._move_in(self._block_npcs, self._block_of(old),
+                          self._block_of(coord), npc_id)
+        else:
+            self._buckets.setdefault(self._bucket_of(coord), set()).add(npc_id)
+            self._block_npcs.setdefault(self._block_of(coord), set()).add(npc_id)
+        self._npc_coords[npc_id] = coord
+
+    def unindex_npc(self, npc_id: str):
+        coord = self._npc_coords.pop(npc_id, None)
+        if coord is not None:
+            self._discard_from(self._buckets, self._bucket_of(coord), npc_id)
+            self._discard_from(self._block_npcs, self._block_of(coord), npc_id)
+
+    @staticmethod
+    def _move_in(index: dict, old_key: tuple, new_key: tuple, npc_id: str):
+        if old_key != new_key:
+            NPCManager._discard_from(index, old_key, npc_id)
+            index.setdefault(new_key, set()).add(npc_id)
+
+    @staticmethod
+    def _discard_from(index: dict, key: tuple, npc_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(npc_id)
+            if not ids:
+                del index[key]
+
+    def get_npc_ids_in_block(self, block_key: tuple[int, int]) -> set[str]:
+        """블럭 원점 block_key의 셀에 배치된 npc_id들 (복사본)"""
+        return set(self._block_npcs.get(block_key, ()))
+
+    def is_npc_in_block(self, npc_id: str, block_key: tuple[int, int]) -> bool:
+        return npc_id in self._block_npcs.get(block_key, ())
+
+    def get_npc_coord(self, npc_id: str) -> tuple[int, int] | None:
+        """인덱스에 기록된 NPC의 셀 좌표"""
+        return self._npc_coords.get(npc_id)
+
+    def get_npcs_in_rect(self, rect: QRect) -> set[NPC]:
+        """rect(경계 포함) 안의 셀에 배치된 NPC들"""
+        x0, x1 = rect.left(), rect.right()
+        y0, y1 = rect.top(), rect.bottom()
+        return self._query(x0, y0, x1, y1,
+                           lambda c: x0 <= c[0] <= x1 and y0 <= c[1] <= y1)
+
+    def get_npcs_in_radius(self, center: tuple[int, int],
+                           radius: float) -> set[NPC]:
+        """center에서 유클리드 거리 radius 이내의 셀에 배치된 NPC들"""
+        cx, cy = center
+        r = int(radius)
+        r2 = radius * radius
+        return self._query(cx - r, cy - r, cx + r, cy + r,
+                           lambda c: (c[0] - cx) ** 2 + (c[1] - cy) ** 2 <= r2)
+
+    def _query(self, x0: int, y0: int, x1: int, y1: int, inside) -> set[NPC]:
+        bx0, by0 = self._bucket_of((x0, y0))
+        bx1, by1 = self._bucket_of((x1, y1))
+
+        result = set()
+        buckets = self._buckets
+        # 버킷 수보다 NPC가 적으면 NPC를 직접 훑는 쪽이 빠르다.
+        if (bx1 - bx0 + 1) * (by1 - by0 + 1) > len(buckets):
+            candidates = (ids for ids in buckets.values())
+        else:
+            candidates = (buckets[b] for b in (
+                (bx, by) for by in range(by0, by1 + 1)
+                for bx in range(bx0, bx1 + 1)) if b in buckets)
+
+        coords = self._npc_coords
+        for ids in candidates:
+            for npc_id in ids:
+                if inside(coords[npc_id]):
+                    npc = self.npc_dict.get(npc_id)
+                    if npc:
+                        result.add(npc)
+        return result
@@ -1,9 +1,32 @@
 # Base classes for route engines
+import threading
+import time
+from enum import IntEnum
 from typing import Callable, Any, Optional
 from map import c_map
 
+class RoutePriority(IntEnum):
+    """Lower value is served first."""
+    SELECTED = 0    # NPC selected by the user
+    VISIBLE = 1     # NPC inside the viewport
+    BACKGROUND = 2  # everything else
+
 class RouteRequest:
-    """Common request parameters for different route engines."""
+    """
+    Common request parameters for different route engines.
+
+    map is owned by the request for its whole lifetime and is treated as
+    read-only by the engines. Pass an immutable snapshot
+    (ObstacleMapSet.snapshot) rather than a map the main thread keeps
+    updating, so concurrent searches never see each other's state.
+
+    priority is a RoutePriority. Engines that schedule by priority age
+    waiting requests so background requests are not starved.
+
+    blocked lists extra coords (other NPCs near the start) that are
+    blocked for this request only. The shared snapshot holds terrain
+    obstacles; the engine lays blocked over a private copy of it.
+    """
 
     def __init__(self,
                 #  map_ptr: Any,
@@ -20,7 +43,9 @@ class RouteRequest:
                  cost_func_name: str = "default",
                  heuristic_func_name: str = "euclidean",
                  userdata: Any = None,
-                 on_real_route_found_cb: Optional[Callable] = None):
+                 on_real_route_found_cb: Optional[Callable] = None,
+                 priority: int = RoutePriority.BACKGROUND,
+                 blocked: tuple = ()):
         # self.map_ptr = map_ptr
         self.map = map
         self.npc_id = npc_id
@@ -36,8 +61,87 @@ class RouteRequest:
         self.heuristic_func_name = heuristic_func_name
         self.userdata = userdata
         self.on_real_route_found_cb = on_real_route_found_cb
+        self.priority = priority
+        self.blocked = tuple(blocked)
+        self.submit_time = time.monotonic()
+
+        # Filled in by the engine on submit().
+        self.handle: Optional['RouteHandle'] = None
+        self.cache_key: Optional[tuple] = None
+        self.cache_generation: Optional[int] = None
+
+    def cancelled(self) -> bool:
+        return self.handle is not None and self.handle.cancelled()
 
 class RouteResult:
     def __init__(self, npc_id: str, route: 'c_route'):
         self.npc_id = npc_id
         self.route = route
+
+class RouteBatch:
+    """
+    Several requests that share one map and run in a single worker call.
+
+    on_batch_found_cb receives a list of RouteResult once the whole batch
+    is done; results of cancelled requests are left out. When it is None,
+    each request's own on_route_found_cb is used instead.
+    """
+
+    def __init__(self,
+                 map: c_map,
+                 requests: list[RouteRequest],
+                 on_batch_found_cb: Optional[Callable] = None,
+                 priority: int = RoutePriority.BACKGROUND):
+        self.map = map
+        self.requests = requests
+        self.on_batch_found_cb = on_batch_found_cb
+        self.priority = priority
+        self.submit_time = time.monotonic()
+
+    def cancelled(self) -> bool:
+        return all(r.cancelled() for r in self.requests)
+
+class RouteHandle:
+    """
+    Future-like handle returned by route engine submit().
+
+    cancel() keeps a queued request from running and drops the result of
+    a search that is already running (the search itself cannot be
+    interrupted). The callback is never invoked for a cancelled request.
+    """
+
+    def __init__(self, npc_id: str):
+        self.npc_id = npc_id
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._cancelled = False
+        self._result: Optional[RouteResult] = None
+
+    def cancel(self) -> bool:
+        """Returns False if the result was already delivered."""
+        with self._lock:
+            if self._done.is_set():
+                return self._cancelled
+            self._cancelled = True
+            self._done.set()
+            return True
+
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[RouteResult]:
+        """Waits for the result. None if cancelled or timed out."""
+        self._done.wait(timeout)
+        return self._result
+
+    def set_result(self, result: RouteResult) -> bool:
+        """Marks the handle finished. False if it was cancelled first."""
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self._result = result
+            self._done.set()
+            return True
@@ -1,18 +1,80 @@
 from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from queue import Queue
 import threading
 from typing import Callable
+from ffi_core import ffi
 from coord import c_coord
 from map import c_map
 from dstar_lite import c_dstar_lite
+from route import c_route
 from utils.log_to_panel import g_logger
 
 from route_finder_common import g_RouteFinderCommon
 
 from .common import RouteRequest, RouteResult
 
+class DslSession:
+    """
+    NPC 하나의 영속 D* Lite 상태.
+
+    map은 스냅샷을 복사한 이 세션 전용 맵이다. 메인 쓰레드는 바뀐 좌표를
+    changes에 넣기만 하고, 맵과 dsl은 워커 쓰레드에서 lock을 잡고서만
+    만진다.
+    """
+
+    def __init__(self, npc_id: str, movement_class, goal: tuple,
+                 max_retry: int, cost_func_name: str,
+                 heuristic_func_name: str):
+        self.npc_id = npc_id
+        self.movement_class = movement_class
+        self.goal = goal
+        self.max_retry = max_retry
+        self.cost_func_name = cost_func_name
+        self.heuristic_func_name = heuristic_func_name
+
+        self.map: c_map | None = None
+        self.dsl: c_dstar_lite | None = None
+        self.last_start: tuple | None = None
+
+        # (coord, blocked) : 메인 쓰레드가 넣고 워커가 꺼낸다.
+        self.changes: deque[tuple[tuple, bool]] = deque()
+        # 경로 근처의 블럭이 로딩/축출되었으면 처음부터 다시 찾는다.
+        # (메인 쓰레드에서만 켜고 끈다)
+        self.stale = False
+        self.repair_scheduled = False
+        # 현재 경로의 좌표와 경계 상자 (메인 쓰레드에서 관련 여부 판단용,
+        # 워커가 통째로 교체한다)
+        self.route_cells: frozenset = frozenset()
+        self.route_bbox: tuple | None = None
+        self.closed = False
+
+        self.lock = threading.Lock()
+
+    def touches(self, x0: int, y0: int, x1: int, y1: int) -> bool:
+        """경로의 경계 상자(+1칸)가 [x0, x1] x [y0, y1]과 겹치는가"""
+        bbox = self.route_bbox
+        if bbox is None:
+            return True  # 아직 경로가 없다. (처음 찾는 중)
+        bx0, by0, bx1, by1 = bbox
+        return bx0 - 1 <= x1 and x0 <= bx1 + 1 and by0 - 1 <= y1 and y0 <= by1 + 1
+
 class DslEngine:
-    def __init__(self, max_workers: int = 8):
+    """
+    D* Lite 길찾기 엔진.
+
+    - submit() : 예전 방식. find_loop()가 move_cb로 NPC를 직접 움직인다.
+    - plan() / repair() : 증분 재탐색. NPC마다 DslSession을 두고,
+      장애물이 바뀌면 처음부터 찾지 않고 바뀐 좌표만 update_vertex()로
+      고친 뒤 compute_shortest_route()를 다시 돌린다.
+      (D* Lite는 목표에서 거꾸로 계산하므로 시작점이 움직여도 km만
+      늘리면 된다)
+
+    결과 콜백은 워커 쓰레드에서 불린다. 찾지 못했거나 오류가 나도
+    실패한 경로(is_success() False)로 한 번은 부른다.
+    """
+
+    def __init__(self, max_workers: int = 8, max_changes: int = 1024):
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.task_queue = Queue()
         self.running = True
@@ -20,6 +82,13 @@ class DslEngine:
             target=self._dispatcher_loop, daemon=True)
         self.dispatcher.start()
 
+        # npc_id -> DslSession (메인 쓰레드에서만 추가/삭제)
+        self.sessions: dict[str, DslSession] = {}
+        # 세션에 이보다 많은 변경이 쌓이면 하나씩 고치지 않고 처음부터 찾는다.
+        self.max_changes = max_changes
+        self.full_count = 0
+        self.repair_count = 0
+
     def submit(self,
                map: c_map,
                npc_id: str,
@@ -33,9 +102,8 @@ class DslEngine:
                heuristic_func_name: str = "dstar_lite",
                userdata: any = None,
                on_real_route_found_cb: Callable = None):
-        map_ptr = map.ptr()
         request = RouteRequest(
-            map_ptr=map_ptr,
+            map=map,
             npc_id=npc_id,
             start=start,
             goal=goal,
@@ -50,8 +118,102 @@ class DslEngine:
         )
         self.task_queue.put(request)
 
+    def plan(self,
+             map: c_map,
+             npc_id: str,
+             movement_class,
+             start: tuple,
+             goal: tuple,
+             on_route_found_cb: Callable,
+             max_retry: int = 10000,
+             cost_func_name: str = "dstar_lite",
+             heuristic_func_name: str = "dstar_lite"):
+        """
+        npc_id의 세션을 새로 만들고 처음부터 찾는다.
+        map은 스냅샷이다. 세션은 그 복사본을 들고 이후 변경을 직접 반영한다.
+        """
+        self.drop(npc_id)
+        session = DslSession(npc_id, movement_class, tuple(goal), max_retry,
+                             cost_func_name, heuristic_func_name)
+        self.sessions[npc_id] = session
+        session.repair_scheduled = True
+        self.executor.submit(self._run_session, session, tuple(start), map,
+                             on_route_found_cb)
+
+    def record_change(self, movement_class, coord: tuple, blocked: bool,
+                      ignore=()) -> list[str]:
+        """
+        장애물 변경을 같은 이동 등급의 세션들에 알린다. (메인 쓰레드)
+        ignore의 npc_id는 제외한다. (자기 자신이 서 있는 셀)
+        경로가 바뀐 좌표나 그 이웃을 지나는 세션의 npc_id 목록을 반환한다.
+        """
+        x, y = coord
+        near = [(x + dx, y + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+        affected = []
+        for npc_id, session in self.sessions.items():
+            if session.movement_class != movement_class or npc_id in ignore:
+                continue
+            # stale이면 다음 repair가 새 스냅샷으로 처음부터 찾으므로 쌓지 않는다.
+            if not session.stale:
+                if len(session.changes) >= self.max_changes:
+                    session.stale = True
+                    session.changes.clear()
+                else:
+                    session.changes.append((tuple(coord), blocked))
+            cells = session.route_cells
+            if any(c in cells for c in near):
+                affected.append(npc_id)
+        return affected
+
+    def mark_stale(self, rect: tuple | None = None, movement_class=None):
+        """
+        블럭 로딩/축출 등으로 맵이 크게 바뀌었다. 다음 repair는 처음부터 찾는다.
+        rect = (x0, y0, x1, y1)을 주면 경로가 그 영역에 닿는 세션만 표시한다.
+        """
+        for session in self.sessions.values():
+            if movement_class is not None and session.movement_class != movement_class:
+                continue
+            if rect is not None and not session.touches(*rect):
+                continue
+            session.stale = True
+
+    def repair(self, npc_id: str, start: tuple,
+               snapshot_fn: Callable[[], c_map],
+               on_route_found_cb: Callable) -> bool:
+        """
+        쌓인 변경을 반영해서 경로를 고친다. 이미 예약되어 있으면 그 작업이
+        변경을 함께 처리하므로 다시 넣지 않는다.
+        snapshot_fn은 처음부터 찾아야 할 때(stale이거나 dsl이 없을 때)만
+        불러서 새 스냅샷을 얻는다.
+        """
+        session = self.sessions.get(npc_id)
+        if session is None:
+            return False
+        if session.repair_scheduled:
+            return True
+        map = None
+        if session.stale or session.dsl is None:
+            # 스냅샷에 지금까지의 변경이 모두 들어 있다.
+            map = snapshot_fn()
+            session.stale = False
+            session.changes.clear()
+        session.repair_scheduled = True
+        self.executor.submit(self._run_session, session, tuple(start), map,
+                             on_route_found_cb)
+        return True
+
+    def drop(self, npc_id: str):
+        session = self.sessions.pop(npc_id, None)
+        if session is not None:
+            session.closed = True
+
+    def clear(self):
+        for npc_id in list(self.sessions):
+            self.drop(npc_id)
+
     def shutdown(self):
         self.running = False
+        self.clear()
         self.task_queue.put(None)
         self.executor.shutdown(wait=True)
 
@@ -66,27 +228,24 @@ class DslEngine:
         try:
             g_logger.log_debug_threadsafe(f"[{request.npc_id}] 경로 요청 시작")
 
-            map_obj = c_map(raw_ptr=request.map_ptr, own=False)
-
-            finder = c_dstar_lite(map_obj, c_coord.from_tuple(request.start))
-            finder.set_goal(c_coord.from_tuple(request.goal))
-            finder.set_route_capacity(100)
-            finder.set_max_retry(request.max_retry)
             cost_fn = g_RouteFinderCommon.get_cost_func(request.cost_func_name)
             heuristic_fn = g_RouteFinderCommon.get_heuristic_func(
                 request.heuristic_func_name)
-            
-            finder.set_cost_func(cost_fn)
-            finder.set_heuristic_func(heuristic_fn)
+
+            finder = c_dstar_lite(request.map,
+                                  c_coord.from_tuple(request.start),
+                                  cost_fn=cost_fn, heuristic_fn=heuristic_fn)
+            finder.set_goal(c_coord.from_tuple(request.goal))
+            finder.compute_max_retry = request.max_retry
 
             # if isinstance(request.userdata, (int, float, str)):
             #     finder.set_userdata(request.userdata)
 
             # 핵심 콜백 + 타이밍
-            # finder.set_move_func(lambda coord_c: 
+            # finder.set_move_func(lambda coord_c:
             #                          self._handle_move_cb(request, coord_c))
             finder.set_move_func(request.move_cb)
-            
+
             finder.set_interval_msec(request.interval_msec)
 
             # D* Lite 내부적으로 move_cb 호출됨
@@ -106,3 +265,90 @@ class DslEngine:
         except Exception as e:
             g_logger.log_debug_threadsafe(f"[{request.npc_id}] 오류 발생: {e}")
 
+    def _run_session(self, session: DslSession, start: tuple,
+                     map: c_map | None, on_route_found_cb: Callable):
+        """map이 있으면 처음부터, 없으면 쌓인 변경만 반영해서 찾는다."""
+        route = None
+        try:
+            with session.lock:
+                # 여기서부터 들어오는 변경은 다음 repair가 처리한다.
+                session.repair_scheduled = False
+                if session.closed:
+                    return
+                if map is not None:
+                    route = self._full_search(session, start, map)
+                elif session.dsl is not None:
+                    route = self._repair(session, start)
+                if route is not None:
+                    cells = [c.to_tuple() for c in route.coords().to_list()]
+                    session.route_cells = frozenset(cells)
+                    if cells:
+                        xs = [c[0] for c in cells]
+                        ys = [c[1] for c in cells]
+                        session.route_bbox = (min(xs), min(ys),
+                                              max(xs), max(ys))
+        except Exception as e:
+            g_logger.log_debug_threadsafe(
+                f"[{session.npc_id}] D* Lite 세션 오류: {e}")
+            route = None
+
+        if session.closed:
+            return
+        if route is None:
+            # 기다리는 쪽(NPC._segment_pending)이 풀리도록 실패로 알린다.
+            route = c_route()
+        on_route_found_cb(RouteResult(session.npc_id, route))
+
+    def _full_search(self, session: DslSession, start: tuple, map: c_map):
+        # 스냅샷은 공유되므로 세션 전용 복사본을 만든다.
+        # (쌓여 있던 변경은 스냅샷을 뜰 때 메인 쓰레드에서 비웠다)
+        session.map = map.copy()
+
+        cost_fn = g_RouteFinderCommon.get_cost_func(session.cost_func_name)
+        heuristic_fn = g_RouteFinderCommon.get_heuristic_func(
+            session.heuristic_func_name)
+        dsl = c_dstar_lite(session.map, c_coord.from_tuple(start),
+                           cost_fn=cost_fn, heuristic_fn=heuristic_fn,
+                           own=True)
+        dsl.set_goal(c_coord.from_tuple(session.goal))
+        dsl.compute_max_retry = session.max_retry
+        dsl.init()
+        dsl.compute_shortest_route()
+
+        session.dsl = dsl
+        session.last_start = start
+        self.full_count += 1
+        return dsl.reconstruct_route()
+
+    def _repair(self, session: DslSession, start: tuple):
+        dsl = session.dsl
+        m = session.map
+
+        if start != session.last_start:
+            # 시작점이 움직인 만큼 키 보정값 km을 늘린다.
+            heuristic_fn = g_RouteFinderCommon.get_heuristic_func(
+                session.heuristic_func_name)
+            last = c_coord.from_tuple(session.last_start)
+            now = c_coord.from_tuple(start)
+            dsl.set_km(dsl.get_km() + heuristic_fn(last.ptr(), now.ptr(),
+                                                   ffi.NULL))
+            dsl.set_start(now)
+            session.last_start = start
+
+        changed = 0
+        while session.changes:
+            coord, blocked = session.changes.popleft()
+            if m.is_blocked(*coord) == blocked:
+                continue
+            if blocked:
+                m.block(*coord)
+            else:
+                m.unblock(*coord)
+            # 바뀐 셀과 이웃 셀의 rhs를 다시 계산한다.
+            dsl.update_vertex_range(c_coord.from_tuple(coord), 1)
+            changed += 1
+
+        if changed:
+            dsl.compute_shortest_route()
+        self.repair_count += 1
+        return dsl.reconstruct_route()
@@ -0,0 +1,370 @@
+import heapq
+
+import numpy as np
+
+from grid.grid_block_manager import GridBlockManager
+from grid.grid_cell import TerrainType
+
+from utils.log_to_panel import g_logger
+
+from .obstacle_map import MovementClass, movement_class, passable_terrain_mask
+
+# 8방향 이동 한 칸의 비용이 1인 거리 (체비쇼프)
+def _chebyshev(a: tuple, b: tuple) -> int:
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+def distance_field(passable: np.ndarray, source: tuple[int, int]) -> np.ndarray:
+    """
+    passable(size x size, [y, x]) 안에서 source(로컬 x, y)로부터의
+    8방향 최단 거리. 닿지 않는 셀은 -1.
+    한 칸씩 번지는 파면(wavefront)을 배열 연산으로 넓힌다.
+    """
+    sx, sy = source
+    dist = np.full(passable.shape, -1, dtype=np.int32)
+    if not passable[sy, sx]:
+        return dist
+
+    front = np.zeros(passable.shape, dtype=bool)
+    front[sy, sx] = True
+    seen = front.copy()
+    dist[sy, sx] = 0
+
+    d = 0
+    while front.any():
+        d += 1
+        # 세로로 한 칸, 다시 가로로 한 칸 번지면 8방향 이웃이 된다.
+        grown = front.copy()
+        grown[1:, :] |= front[:-1, :]
+        grown[:-1, :] |= front[1:, :]
+        wide = grown.copy()
+        wide[:, 1:] |= grown[:, :-1]
+        wide[:, :-1] |= grown[:, 1:]
+
+        wide &= passable
+        wide &= ~seen
+        dist[wide] = d
+        seen |= wide
+        front = wide
+    return dist
+
+class _BlockNodes:
+    """한 블럭의 추상 노드(경계 입구 셀)와 노드 사이 거리 (블럭 안 경로)"""
+    __slots__ = ("coords", "index", "cost", "partners")
+
+    def __init__(self, coords: list[tuple], cost: np.ndarray,
+                 partners: dict[tuple, list[tuple]]):
+        self.coords = coords
+        self.index = {c: i for i, c in enumerate(coords)}
+        self.cost = cost            # (n, n) int32, -1 = 연결 안 됨
+        self.partners = partners    # 노드 -> 이웃 블럭의 짝 노드
+
+class HierarchicalPlanner:
+    """
+    블럭 단위 2단계 길찾기 (HPA* 방식)
+
+    추상 그래프
+    - 노드 : 이웃한 두 블럭의 경계에서 양쪽 모두 지나갈 수 있는 구간(run)마다
+      고른 입구 셀. 구간이 entrance_split 이상이면 양 끝 두 개를 쓴다.
+    - 블럭 사이 간선 : 경계를 마주 보는 두 입구 셀 (비용 1)
+    - 블럭 안 간선 : 같은 블럭의 입구끼리 terrain만 본 8방향 최단 거리.
+      블럭마다 한 번 계산해서 캐시한다.
+
+    로드되지 않은 블럭은 모든 셀을 지나갈 수 있다고 보고
+    (c_map이 모르는 좌표를 빈칸으로 보는 것과 같다) 거리는 체비쇼프
+    거리로 어림한다. 그래서 중간 블럭이 아직 없어도 계획은 나온다.
+
+    plan()은 추상 그래프를 먼저 찾고, 블럭마다 들어가는 입구 셀을
+    중간 목표(waypoint)로 돌려준다. 셀 단위 경로는 NPC가 다음 구간만
+    AlgoEngine으로 찾는다.
+
+    캐시는 (이동 등급, 블럭) 단위이며 블럭 로딩/축출과 terrain 변경
+    (update_coord)때 그 블럭과 이웃 블럭의 것만 지운다.
+    NPC 위치는 추상 그래프에 넣지 않는다. (곧 바뀌는 값이다)
+    메인 쓰레드에서만 쓴다.
+    """
+
+    def __init__(self, block_mgr: GridBlockManager,
+                 entrance_split: int = 6,
+                 search_margin: int = 2,
+                 max_expansions: int = 20000):
+        self.block_mgr = block_mgr
+        self.entrance_split = entrance_split
+        self.search_margin = search_margin
+        self.max_expansions = max_expansions
+
+        # (이동 등급, 블럭) -> 이동 가능 마스크 [y, x]
+        self._passable: dict[tuple[MovementClass, tuple], np.ndarray] = {}
+        # (이동 등급, 블럭, 이웃 블럭) -> [(블럭 쪽 셀, 이웃 쪽 셀), ...]
+        self._borders: dict[tuple, list[tuple[tuple, tuple]]] = {}
+        # (이동 등급, 블럭) -> _BlockNodes
+        self._nodes: dict[tuple[MovementClass, tuple], _BlockNodes] = {}
+
+        self.plan_count = 0
+        self.node_builds = 0
+
+    def plan(self, start: tuple, goal: tuple,
+             movable_terrain) -> list[tuple] | None:
+        """
+        start에서 goal까지 블럭을 건너가는 중간 목표 목록. 마지막은 goal.
+        start와 goal이 같은 블럭이거나 이웃 블럭이면 나눌 필요가 없으므로
+        [goal], 추상 경로가 없으면 None.
+        """
+        start = tuple(start)
+        goal = tuple(goal)
+        cls = movement_class(movable_terrain)
+        s_key = self.block_mgr.get_origin(start)
+        g_key = self.block_mgr.get_origin(goal)
+        size = self.block_mgr.block_size
+        if _chebyshev(s_key, g_key) <= size:
+            return [goal]
+
+        self.plan_count += 1
+        bounds = self._search_bounds(s_key, g_key)
+
+        s_nodes = self._block_nodes(cls, s_key)
+        g_nodes = self._block_nodes(cls, g_key)
+        from_start = self._costs_from(cls, s_key, s_nodes, start)
+        to_goal = self._costs_from(cls, g_key, g_nodes, goal)
+
+        # 추상 그래프 A* (start, goal은 임시 노드)
+        open_heap = []
+        g_score: dict[tuple, int] = {}
+        came_from: dict[tuple, tuple] = {}
+        for coord, cost in from_start.items():
+            g_score[coord] = cost
+            came_from[coord] = start
+            heapq.heappush(open_heap, (cost + _chebyshev(coord, goal), cost, coord))
+
+        expansions = 0
+        reached = False
+        while open_heap and expansions < self.max_expansions:
+            _, cost, node = heapq.heappop(open_heap)
+            if node == goal:
+                reached = True
+                break
+            if cost > g_score.get(node, cost):
+                continue
+            expansions += 1
+
+            key = self.block_mgr.get_origin(node)
+            nodes = self._block_nodes(cls, key)
+            for nxt, step in self._neighbors(cls, key, nodes, node,
+                                             to_goal if key == g_key else None,
+                                             goal, bounds):
+                new_cost = cost + step
+                if new_cost < g_score.get(nxt, new_cost + 1):
+                    g_score[nxt] = new_cost
+                    came_from[nxt] = node
+                    heapq.heappush(open_heap,
+                                   (new_cost + _chebyshev(nxt, goal), new_cost, nxt))
+
+        if not reached:
+            g_logger.log_debug(
+                f'[HierarchicalPlanner] 추상 경로 없음 {start} -> {goal} '
+                f'(확장 {expansions})')
+            return None
+
+        path = [goal]
+        while path[-1] != start:
+            path.append(came_from[path[-1]])
+        path.reverse()
+
+        # 블럭에 들어가는 셀만 중간 목표로 쓴다.
+        # (나가는 셀과 들어가는 셀은 한 칸 차이라서 구간 하나에 포함된다)
+        # 블럭 모서리를 스치면 입구가 한 칸 간격으로 이어지는데,
+        # 그런 것은 다음 입구 하나로 합친다.
+        waypoints = [goal]
+        get_origin = self.block_mgr.get_origin
+        for prev, cur in reversed(list(zip(path, path[1:]))):
+            if cur == goal or get_origin(prev) == get_origin(cur):
+                continue
+            if _chebyshev(cur, waypoints[-1]) > 2:
+                waypoints.append(cur)
+        waypoints.reverse()
+        return waypoints
+
+    def on_block_changed(self, key: tuple):
+        """블럭이 로딩/축출되었다. 이 블럭과 이웃 블럭의 캐시를 지운다."""
+        self._invalidate(key, include_neighbors=True)
+
+    def update_coord(self, coord: tuple):
+        """셀 하나가 바뀌었다. terrain 통과 여부가 바뀐 경우만 다시 계산한다."""
+        key = self.block_mgr.get_origin(coord)
+        block = self.block_mgr.block_cache.get(key)
+        if block is None:
+            return
+
+        cols = block.columns
+        lx = coord[0] - key[0]
+        ly = coord[1] - key[1]
+        terrain = int(cols.terrain[cols.index_of(coord[0], coord[1])])
+        for (cls, k), passable in list(self._passable.items()):
+            if k != key:
+                continue
+            now = terrain in cls and terrain != TerrainType.FORBIDDEN.value
+            if bool(passable[ly, lx]) != now:
+                self._invalidate(key, include_neighbors=self._on_edge(lx, ly))
+                return
+
+    def clear(self):
+        self._passable.clear()
+        self._borders.clear()
+        self._nodes.clear()
+
+    def _on_edge(self, lx: int, ly: int) -> bool:
+        last = self.block_mgr.block_size - 1
+        return lx in (0, last) or ly in (0, last)
+
+    def _invalidate(self, key: tuple, include_neighbors: bool):
+        keys = {key}
+        if include_neighbors:
+            keys.update(self._adjacent(key))
+        self._passable = {k: v for k, v in self._passable.items()
+                          if k[1] != key}
+        self._borders = {k: v for k, v in self._borders.items()
+                         if k[1] not in keys and k[2] not in keys}
+        self._nodes = {k: v for k, v in self._nodes.items()
+                       if k[1] not in keys}
+
+    def _adjacent(self, key: tuple) -> list[tuple]:
+        size = self.block_mgr.block_size
+        x0, y0 = key
+        return [(x0 + size, y0), (x0 - size, y0),
+                (x0, y0 + size), (x0, y0 - size)]
+
+    def _search_bounds(self, s_key: tuple, g_key: tuple) -> tuple:
+        size = self.block_mgr.block_size
+        margin = self.search_margin * size
+        return (min(s_key[0], g_key[0]) - margin,
+                min(s_key[1], g_key[1]) - margin,
+                max(s_key[0], g_key[0]) + margin,
+                max(s_key[1], g_key[1]) + margin)
+
+    def _get_passable(self, cls: MovementClass, key: tuple) -> np.ndarray | None:
+        """로드된 블럭의 이동 가능 마스크. 로드되지 않았으면 None"""
+        mask = self._passable.get((cls, key))
+        if mask is not None:
+            return mask
+        block = self.block_mgr.block_cache.get(key)
+        if block is None:
+            return None
+        size = self.block_mgr.block_size
+        mask = passable_terrain_mask(block.columns, cls).reshape(size, size)
+        self._passable[(cls, key)] = mask
+        return mask
+
+    def _border(self, cls: MovementClass, key: tuple,
+                other: tuple) -> list[tuple[tuple, tuple]]:
+        """key 블럭과 other 블럭 경계의 입구들 [(key 쪽 셀, other 쪽 셀)]"""
+        cached = self._borders.get((cls, key, other))
+        if cached is not None:
+            return cached
+
+        size = self.block_mgr.block_size
+        dx = (other[0] - key[0]) // size
+        dy = (other[1] - key[1]) // size
+        a = self._get_passable(cls, key)
+        b = self._get_passable(cls, other)
+
+        # 경계를 따라 마주 보는 두 줄 (로드되지 않은 쪽은 모두 통과 가능)
+        if dx:
+            a_line = a[:, -1 if dx > 0 else 0] if a is not None else None
+            b_line = b[:, 0 if dx > 0 else -1] if b is not None else None
+        else:
+            a_line = a[-1 if dy > 0 else 0, :] if a is not None else None
+            b_line = b[0 if dy > 0 else -1, :] if b is not None else None
+        open_line = np.ones(size, dtype=bool)
+        if a_line is not None:
+            open_line &= a_line
+        if b_line is not None:
+            open_line &= b_line
+
+        entrances = []
+        for begin, end in self._runs(open_line):
+            if end - begin >= self.entrance_split:
+                offsets = (begin, end - 1)
+            else:
+                offsets = ((begin + end - 1) // 2,)
+            for t in offsets:
+                if dx:
+                    ax = key[0] + (size - 1 if dx > 0 else 0)
+                    a_cell = (ax, key[1] + t)
+                    b_cell = (ax + dx, key[1] + t)
+                else:
+                    ay = key[1] + (size - 1 if dy > 0 else 0)
+                    a_cell = (key[0] + t, ay)
+                    b_cell = (key[0] + t, ay + dy)
+                entrances.append((a_cell, b_cell))
+
+        self._borders[(cls, key, other)] = entrances
+        self._borders[(cls, other, key)] = [(b_, a_) for a_, b_ in entrances]
+        return entrances
+
+    @staticmethod
+    def _runs(line: np.ndarray) -> list[tuple[int, int]]:
+        """True가 이어지는 구간 [begin, end) 목록"""
+        padded = np.concatenate(([False], line, [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+    def _block_nodes(self, cls: MovementClass, key: tuple) -> _BlockNodes:
+        nodes = self._nodes.get((cls, key))
+        if nodes is not None:
+            return nodes
+
+        partners: dict[tuple, list[tuple]] = {}
+        for other in self._adjacent(key):
+            for a_cell, b_cell in self._border(cls, key, other):
+                partners.setdefault(a_cell, []).append(b_cell)
+        coords = list(partners)
+
+        n = len(coords)
+        cost = np.full((n, n), -1, dtype=np.int32)
+        passable = self._get_passable(cls, key)
+        for i, c in enumerate(coords):
+            if passable is None:
+                for j, d in enumerate(coords):
+                    cost[i, j] = _chebyshev(c, d)
+                continue
+            field = distance_field(passable, (c[0] - key[0], c[1] - key[1]))
+            for j, d in enumerate(coords):
+                cost[i, j] = field[d[1] - key[1], d[0] - key[0]]
+
+        nodes = _BlockNodes(coords, cost, partners)
+        self._nodes[(cls, key)] = nodes
+        self.node_builds += 1
+        return nodes
+
+    def _costs_from(self, cls: MovementClass, key: tuple, nodes: _BlockNodes,
+                    coord: tuple) -> dict[tuple, int]:
+        """블럭 안의 coord와 그 블럭 입구들 사이 거리 (닿는 입구만)"""
+        passable = self._get_passable(cls, key)
+        if passable is None:
+            return {c: _chebyshev(coord, c) for c in nodes.coords}
+        field = distance_field(passable, (coord[0] - key[0], coord[1] - key[1]))
+        costs = {}
+        for c in nodes.coords:
+            d = int(field[c[1] - key[1], c[0] - key[0]])
+            if d >= 0:
+                costs[c] = d
+        return costs
+
+    def _neighbors(self, cls: MovementClass, key: tuple, nodes: _BlockNodes,
+                   node: tuple, to_goal: dict | None, goal: tuple,
+                   bounds: tuple):
+        i = nodes.index.get(node)
+        if i is None:
+            return
+        row = nodes.cost[i]
+        for j, other in enumerate(nodes.coords):
+            if j != i and row[j] >= 0:
+                yield other, int(row[j])
+
+        if to_goal is not None and node in to_goal:
+            yield goal, to_goal[node]
+
+        x0, y0, x1, y1 = bounds
+        for partner in nodes.partners.get(node, ()):
+            pkey = self.block_mgr.get_origin(partner)
+            if x0 <= pkey[0] <= x1 and y0 <= pkey[1] <= y1:
+                yield partner, 1
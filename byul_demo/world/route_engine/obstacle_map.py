@@ -0,0 +1,195 @@
+import numpy as np
+
+from map import c_map
+
+from grid.cell_columns import CellColumns
+from grid.grid_cell import TerrainType
+from grid.grid_block_manager import GridBlockManager
+
+from utils.log_to_panel import g_logger
+
+from .route_cache import RouteCache
+
+# 이동 가능한 terrain 값들의 집합이 곧 이동 등급(movement class)이다.
+MovementClass = frozenset
+
+def movement_class(movable_terrain) -> MovementClass:
+    """NPC.movable_terrain (TerrainType 목록)을 이동 등급으로 바꾼다."""
+    return frozenset(TerrainType(t).value for t in movable_terrain)
+
+def passable_terrain_mask(cols: CellColumns,
+                          movable: MovementClass) -> np.ndarray:
+    """terrain만 보고 이동 가능한 셀을 bool 배열로 계산한다. (NPC는 무시)"""
+    movable_values = np.fromiter(
+        movable - {TerrainType.FORBIDDEN.value}, dtype=np.uint8)
+    return np.isin(cols.terrain, movable_values)
+
+def blocked_mask(cols: CellColumns, movable: MovementClass) -> np.ndarray:
+    """
+    블럭 전체의 terrain 장애물 여부를 bool 배열로 계산한다.
+    (FORBIDDEN, 이동 불가 terrain)
+    NPC가 서 있는 셀은 넣지 않는다. NPC는 매 스텝 움직이므로
+    요청마다 따로 얹는다. (World.npc_overlay)
+    """
+    return ~passable_terrain_mask(cols, movable)
+
+class ObstacleMapSet:
+    """
+    이동 등급별 c_map을 로드된 블럭의 terrain 열로 미리 만들어 둔다.
+    NPC가 서 있는 셀은 맵에 넣지 않는다. 넣으면 NPC가 한 칸 움직일 때마다
+    맵 버전이 올라 스냅샷을 다시 복사하고 캐시가 무효화된다.
+
+    c_map의 장애물 좌표 집합(blocked_coords)에 장애물을 넣어 두고
+    is_coord_blocked 콜백 없이 길찾기를 돌리므로, 탐색 중에 파이썬으로
+    돌아오지 않는다.
+
+    - 블럭 로딩/축출 때 해당 블럭의 장애물만 block/unblock 한다.
+    - terrain이 바뀌면 update_coord()로 그 좌표만 다시 계산한다.
+    - 메인 쓰레드에서만 갱신한다.
+
+    길찾기 쓰레드에는 get_map()의 원본이 아니라 snapshot()을 넘긴다.
+    스냅샷은 map_copy()로 만든 불변 복사본이며, 원본이 바뀌지 않았으면
+    같은 스냅샷을 여러 요청이 함께 쓴다. (copy-on-write)
+
+    route_cache가 있으면 블럭 로딩/축출 때 블럭 영역과 겹치는 캐시된 경로를
+    지운다. 셀 하나의 편집에 따른 무효화는 World.add_changed_coord()가
+    update_coord()의 반환값으로 한다.
+
+    on_cell_changed(cls, coord, blocked)가 있으면 update_coord()로
+    장애물 여부가 바뀔 때마다 부른다. (증분 재탐색용)
+    """
+
+    def __init__(self, block_mgr: GridBlockManager,
+                 route_cache: RouteCache | None = None):
+        self.block_mgr = block_mgr
+        self.route_cache = route_cache
+        self.on_cell_changed = None
+        self._maps: dict[MovementClass, c_map] = {}
+        # (이동 등급, 블럭 원점) -> 해당 블럭의 장애물 마스크
+        self._masks: dict[tuple[MovementClass, tuple], np.ndarray] = {}
+
+        # 이동 등급별 변경 횟수와 마지막 스냅샷 (version, c_map)
+        self._versions: dict[MovementClass, int] = {}
+        self._snapshots: dict[MovementClass, tuple[int, c_map]] = {}
+        self.snapshot_count = 0
+
+    def get_map(self, movable_terrain) -> c_map:
+        """이동 등급의 장애물 맵. 처음 요청되면 로드된 블럭으로 만든다."""
+        cls = movement_class(movable_terrain)
+        m = self._maps.get(cls)
+        if m is None:
+            m = c_map(own=True)
+            self._maps[cls] = m
+            for key in list(self.block_mgr.block_cache):
+                self._add_block(cls, m, key)
+            g_logger.log_debug(
+                f"[ObstacleMapSet] 이동 등급 {sorted(cls)} 맵 생성 "
+                f"(블럭 {len(self.block_mgr.block_cache)}개)")
+        return m
+
+    def snapshot(self, movable_terrain) -> c_map:
+        """
+        길찾기 요청에 넘길 장애물 맵의 불변 복사본.
+        마지막 스냅샷 이후 바뀐 것이 없으면 그 스냅샷을 그대로 돌려준다.
+        돌려받은 맵은 절대 수정하지 마라. (다른 요청과 공유된다)
+        """
+        cls = movement_class(movable_terrain)
+        m = self.get_map(movable_terrain)
+        version = self._versions.get(cls, 0)
+
+        cached = self._snapshots.get(cls)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        snap = m.copy()
+        self._snapshots[cls] = (version, snap)
+        self.snapshot_count += 1
+        return snap
+
+    def _touch(self, cls: MovementClass):
+        self._versions[cls] = self._versions.get(cls, 0) + 1
+
+    def on_block_loaded(self, key: tuple):
+        for cls, m in self._maps.items():
+            self._add_block(cls, m, key)
+        self._invalidate_block(key)
+
+    def on_block_evicted(self, key: tuple):
+        for cls, m in self._maps.items():
+            mask = self._masks.pop((cls, key), None)
+            if mask is None:
+                continue
+            indices = np.flatnonzero(mask)
+            if indices.size:
+                self._apply(key, indices, m.unblock_many)
+                self._touch(cls)
+        self._invalidate_block(key)
+
+    def update_coord(self, coord: tuple) -> list[tuple[MovementClass, bool]]:
+        """
+        셀의 terrain이 바뀌었을 때 모든 이동 등급의 장애물 여부를 다시 계산한다.
+        장애물 여부가 바뀐 (이동 등급, 막혔는가) 목록을 반환한다.
+        """
+        changed = []
+        key = self.block_mgr.get_origin(coord)
+        block = self.block_mgr.block_cache.get(key)
+        if block is None:
+            return changed
+
+        cols = block.columns
+        index = cols.index_of(coord[0], coord[1])
+        terrain = int(cols.terrain[index])
+
+        for cls, m in self._maps.items():
+            mask = self._masks.get((cls, key))
+            if mask is None:
+                continue
+            blocked = (terrain not in cls or
+                       terrain == TerrainType.FORBIDDEN.value)
+            if blocked == bool(mask[index]):
+                continue
+            mask[index] = blocked
+            self._touch(cls)
+            if blocked:
+                m.block(coord[0], coord[1])
+            else:
+                m.unblock(coord[0], coord[1])
+            changed.append((cls, blocked))
+            if self.on_cell_changed is not None:
+                self.on_cell_changed(cls, tuple(coord), blocked)
+        return changed
+
+    def clear(self):
+        # 스냅샷은 진행 중인 요청이 들고 있을 수 있으므로 닫지 않는다.
+        # (참조가 모두 사라지면 해제된다)
+        for m in self._maps.values():
+            m.close()
+        self._maps.clear()
+        self._masks.clear()
+        self._versions.clear()
+        self._snapshots.clear()
+
+    def _invalidate_block(self, key: tuple):
+        if self.route_cache is None:
+            return
+        size = self.block_mgr.block_size
+        self.route_cache.invalidate_rect(
+            key[0], key[1], key[0] + size - 1, key[1] + size - 1)
+
+    def _add_block(self, cls: MovementClass, m: c_map, key: tuple):
+        block = self.block_mgr.block_cache.get(key)
+        if block is None or (cls, key) in self._masks:
+            return
+        mask = blocked_mask(block.columns, cls)
+        self._masks[(cls, key)] = mask
+        indices = np.flatnonzero(mask)
+        if indices.size:
+            self._apply(key, indices, m.block_many)
+            self._touch(cls)
+
+    def _apply(self, key: tuple, indices: np.ndarray, fn):
+        # libbyul에 묶음 API가 없어서 C 호출은 좌표마다 하지만,
+        # 좌표 계산은 NumPy로 한 번에 하고 호출 루프는 c_map 안에서 돈다.
+        size = self.block_mgr.block_size
+        dy, dx = np.divmod(indices, size)
+        fn((dx + key[0]).tolist(), (dy + key[1]).tolist())
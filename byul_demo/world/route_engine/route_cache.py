@@ -0,0 +1,226 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Hashable
+
+class _RouteEntry:
+    __slots__ = ("route", "coords", "bbox", "buckets", "movement_class")
+
+    def __init__(self, route, coords: frozenset, bbox: tuple,
+                 buckets: list, movement_class):
+        self.route = route
+        self.coords = coords
+        self.bbox = bbox
+        self.buckets = buckets
+        self.movement_class = movement_class
+
+    def hit_by(self, x: int, y: int, nearby: bool) -> bool:
+        if (x, y) in self.coords:
+            return True
+        if nearby:
+            x0, y0, x1, y1 = self.bbox
+            return x0 - 1 <= x <= x1 + 1 and y0 - 1 <= y <= y1 + 1
+        return False
+
+    def overlaps(self, x0: int, y0: int, x1: int, y1: int) -> bool:
+        ex0, ey0, ex1, ey1 = self.bbox
+        return ex0 <= x1 and x0 <= ex1 and ey0 <= y1 and y0 <= ey1
+
+    def affected_by(self, movement_class) -> bool:
+        return movement_class is None or movement_class == self.movement_class
+
+class RouteCache:
+    """
+    길찾기 결과 캐시 (LRU, max_entries개까지)
+
+    키는 (algotype, 이동 등급, start, goal, cost 이름, heuristic 이름)이다.
+    make_key()로 만든다.
+
+    무효화는 좌표 단위로 한다.
+    - 경로가 지나는 좌표가 막히면 그 경로는 쓸 수 없다.
+    - 경로의 경계 상자(bbox) 근처가 바뀌면 더 짧은 경로가 생겼을 수 있다.
+    경로는 bucket_size 격자 버킷에 bbox 단위로 등록해 두고,
+    바뀐 좌표의 버킷에 든 경로만 확인한다.
+
+    쓰레드 안전하다. 요청 시점의 세대(generation())를 put()에 넘기면
+    탐색 도중 그 경로에 영향을 주는 변경이 있었을 때 저장하지 않는다.
+    (최근 변경 change_log_size개를 기록해 두고 비교한다)
+
+    캐시된 c_route는 여러 요청이 공유하므로 읽기 전용으로만 써야 한다.
+    """
+
+    def __init__(self, max_entries: int = 1024, bucket_size: int = 32,
+                 change_log_size: int = 4096):
+        self.max_entries = max(1, max_entries)
+        self.bucket_size = bucket_size
+
+        self._entries: OrderedDict[Hashable, _RouteEntry] = OrderedDict()
+        self._buckets: dict[tuple[int, int], set[Hashable]] = {}
+
+        # 변경마다 1씩 오르는 세대와 최근 변경 기록
+        # (generation, movement_class, kind, args)
+        self._generation = 0
+        self._changes: deque[tuple] = deque(maxlen=change_log_size)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(algotype, movement_class, start: tuple, goal: tuple,
+                 cost_func_name: str, heuristic_func_name: str) -> tuple:
+        return (algotype, movement_class, tuple(start), tuple(goal),
+                cost_func_name, heuristic_func_name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def generation(self) -> int:
+        """요청 시점의 세대. put()에 그대로 넘긴다."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Hashable, avoid=()):
+        """avoid의 좌표를 지나는 경로는 없는 것으로 본다. (다른 NPC 위치)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (avoid and not entry.coords.isdisjoint(avoid)):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.route
+
+    def put(self, key: Hashable, route, coords: list[tuple],
+            generation: int | None = None) -> bool:
+        """
+        경로를 저장한다. generation이 주어졌고 그 뒤에 이 경로에
+        영향을 주는 변경이 있었으면 저장하지 않고 False
+        """
+        if not coords:
+            return False
+
+        movement_class = key[1]
+        xs = [c[0] for c in coords]
+        ys = [c[1] for c in coords]
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+        buckets = self._buckets_in(bbox[0] - 1, bbox[1] - 1,
+                                   bbox[2] + 1, bbox[3] + 1)
+        entry = _RouteEntry(route, frozenset(map(tuple, coords)), bbox,
+                            buckets, movement_class)
+
+        with self._lock:
+            if generation is not None and self._changed_since(entry, generation):
+                return False
+
+            self._remove(key)
+            self._entries[key] = entry
+            for b in buckets:
+                self._buckets.setdefault(b, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def invalidate_coord(self, coord: tuple, movement_class=None,
+                         nearby: bool = True) -> int:
+        """
+        coord가 바뀌었을 때 영향을 받는 경로를 지운다.
+        nearby=False면 coord를 지나는 경로만, True면 bbox가 coord를
+        포함하는 경로까지 지운다. movement_class가 None이면 모든 등급.
+        지운 개수를 반환한다.
+        """
+        x, y = coord[0], coord[1]
+        bucket = (x // self.bucket_size, y // self.bucket_size)
+
+        with self._lock:
+            self._log(movement_class, "coord", (x, y, nearby))
+            keys = self._buckets.get(bucket)
+            if not keys:
+                return 0
+
+            stale = [key for key in keys
+                     if self._entries[key].affected_by(movement_class) and
+                     self._entries[key].hit_by(x, y, nearby)]
+
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def invalidate_rect(self, x0: int, y0: int, x1: int, y1: int,
+                        movement_class=None) -> int:
+        """bbox가 [x0, x1] x [y0, y1]과 겹치는 경로를 지운다. (블럭 로딩/축출)"""
+        with self._lock:
+            self._log(movement_class, "rect", (x0, y0, x1, y1))
+            stale = set()
+            for b in self._buckets_in(x0, y0, x1, y1):
+                for key in self._buckets.get(b, ()):
+                    entry = self._entries[key]
+                    if (entry.affected_by(movement_class) and
+                            entry.overlaps(x0, y0, x1, y1)):
+                        stale.add(key)
+
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._log(None, "all", ())
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    def _log(self, movement_class, kind: str, args: tuple):
+        self._generation += 1
+        self._changes.append((self._generation, movement_class, kind, args))
+
+    def _changed_since(self, entry: _RouteEntry, generation: int) -> bool:
+        if generation >= self._generation:
+            return False
+        changes = self._changes
+        # 기록이 잘려서 그 사이 변경을 다 알 수 없으면 바뀐 것으로 본다.
+        if not changes or changes[0][0] > generation + 1:
+            return True
+
+        for gen, movement_class, kind, args in reversed(changes):
+            if gen <= generation:
+                break
+            if not entry.affected_by(movement_class):
+                continue
+            if kind == "all":
+                return True
+            if kind == "coord" and entry.hit_by(*args):
+                return True
+            if kind == "rect" and entry.overlaps(*args):
+                return True
+        return False
+
+    def _buckets_in(self, x0: int, y0: int, x1: int, y1: int) -> list:
+        bs = self.bucket_size
+        return [(bx, by)
+                for by in range(y0 // bs, y1 // bs + 1)
+                for bx in range(x0 // bs, x1 // bs + 1)]
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for b in entry.buckets:
+            keys = self._buckets.get(b)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[b]
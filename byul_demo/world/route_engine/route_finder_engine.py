@@ -1,7 +1,8 @@
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
 from typing import Callable
 import threading
+import time
 
 from route import c_route
 from map import c_map
@@ -11,35 +12,207 @@ from coord import c_coord
 
 from utils.log_to_panel import g_logger
 
-from .common import RouteRequest, RouteResult
+from .common import (RouteRequest, RouteResult, RouteHandle, RouteBatch,
+                     RoutePriority)
+from .route_cache import RouteCache
 
 class AlgoEngine:
-    def __init__(self, max_workers: int = 4):
+    """
+    길찾기 요청을 쓰레드 풀에서 처리한다.
+
+    route_cache가 있으면 movement_class를 준 요청은 결과를 캐시한다.
+    캐시에 있으면 탐색 없이 submit() 안에서 바로 콜백을 부른다.
+    request.blocked(근처 NPC)가 있는 요청은 워커에서 스냅샷을 복사해 그 좌표를
+    막고 찾는다. 그 결과는 잠깐의 NPC 배치에 맞춘 우회로라서 캐시하지 않는다.
+    그 밖의 콜백은 워커 쓰레드에서 불리므로 Qt 쪽은 시그널로 넘겨받아라.
+
+    같은 npc_id로 새 요청이 들어오면 이전 요청은 취소된다. (supersede)
+    - 아직 대기 중이면 탐색하지 않고 버린다.
+    - 이미 탐색 중이면 끝까지 돌지만 결과를 콜백으로 넘기지 않는다.
+    submit()은 RouteHandle을 돌려주며 cancel()로 직접 취소할 수도 있다.
+
+    요청은 우선순위(RoutePriority)별 대기열에 들어가고, 쓰레드가 비었을
+    때만 하나씩 꺼낸다. 꺼낼 때의 유효 우선순위는
+        priority - 대기 시간 / aging_sec
+    이라서 오래 기다린 요청은 점점 앞으로 온다. (기아 방지)
+    우선순위별 지연 시간(submit부터 콜백까지)은 get_latency_stats()로 본다.
+    """
+
+    def __init__(self, max_workers: int = 4,
+                 route_cache: RouteCache | None = None,
+                 aging_sec: float = 1.0,
+                 latency_window: int = 1024):
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.task_queue = Queue()
+        self.route_cache = route_cache
+        self.aging_sec = aging_sec
+        self.latency_window = latency_window
         self.running = True
+
+        # 우선순위별 FIFO 대기열. 같은 대기열 안에서는 앞쪽이 가장 오래 기다렸다.
+        self._queues: dict[int, deque[RouteRequest]] = {
+            int(p): deque() for p in RoutePriority}
+        self._pending = 0
+        self._cv = threading.Condition()
+        # 쓰레드 수만큼만 executor에 넘긴다. (넘긴 뒤에는 순서를 못 바꾼다)
+        self._slots = threading.Semaphore(max_workers)
+
+        self._latencies: dict[int, deque[float]] = {
+            int(p): deque(maxlen=self.latency_window) for p in RoutePriority}
+
+        # npc_id -> 가장 최근 요청의 핸들
+        # _latest_lock은 아래 두 카운터도 보호한다. (여러 워커 쓰레드에서 올린다)
+        self._latest: dict[str, RouteHandle] = {}
+        self._latest_lock = threading.Lock()
+        self.cancelled_count = 0
+        self.stale_count = 0
         threading.Thread(target=self._dispatcher_loop, daemon=True).start()
 
     def _dispatcher_loop(self):
-        while self.running:
-            request: RouteRequest = self.task_queue.get()
-            if request is None:
-                break
-            self.executor.submit(self._process_request, request)
+        while True:
+            self._slots.acquire()
+            with self._cv:
+                request = None
+                while self.running and request is None:
+                    request = self._pop_next()
+                    if request is None:
+                        self._cv.wait()
+                if not self.running:
+                    self._slots.release()
+                    break
+            self.executor.submit(self._run_request, request)
+
+    def _pop_next(self) -> RouteRequest | RouteBatch | None:
+        """유효 우선순위가 가장 높은 요청을 꺼낸다. (_cv 안에서 호출)"""
+        now = time.monotonic()
+        best = None
+        best_score = None
+        for priority, queue in self._queues.items():
+            # 취소된 요청은 여기서 버린다.
+            while queue and queue[0].cancelled():
+                queue.popleft()
+                self._pending -= 1
+                self._count_cancelled()
+            if not queue:
+                continue
+            waited = now - queue[0].submit_time
+            score = priority - waited / self.aging_sec
+            if best_score is None or score < best_score:
+                best = priority
+                best_score = score
+
+        if best is None:
+            return None
+        self._pending -= 1
+        return self._queues[best].popleft()
+
+    def _count_cancelled(self):
+        with self._latest_lock:
+            self.cancelled_count += 1
+
+    def _run_request(self, item: RouteRequest | RouteBatch):
+        try:
+            if isinstance(item, RouteBatch):
+                self._process_batch(item)
+            else:
+                self._process_request(item)
+        finally:
+            self._slots.release()
 
     def _process_request(self, request: RouteRequest):
+        if request.cancelled():
+            self._count_cancelled()
+            return
+
         g_logger.log_debug_threadsafe('before 길찾기')
 
+        # 요청마다 자기 finder를 쓴다. (쓰레드끼리 공유하지 않는다)
+        overlay = self._overlay_map(request, request.map)
+        route_finder = self._new_finder(request, overlay or request.map)
+        route: 'c_route' = route_finder.find()
+        g_logger.log_debug_threadsafe('after 길찾기')
+
+        result = self._finish(request, route)
+        if result is not None:
+            request.on_route_found_cb(result)
+
+    def _process_batch(self, batch: RouteBatch):
+        """
+        한 쓰레드에서 배치의 요청들을 차례로 찾는다.
+        설정(type, cost, heuristic, max_retry...)이 같으면 finder와
+        start/goal 좌표를 재사용하고 start/goal만 바꿔서 다시 찾는다.
+        """
+        t0 = time.monotonic()
+        route_finder = None
+        finder_key = None
+        start = c_coord(0, 0)
+        goal = c_coord(0, 0)
+
+        results = []
+        for request in batch.requests:
+            if request.cancelled():
+                self._count_cancelled()
+                continue
+
+            overlay = self._overlay_map(request, batch.map)
+            if overlay is not None:
+                # 근처 NPC를 막은 자기 맵이 있으므로 finder를 공유하지 않는다.
+                route = self._new_finder(request, overlay).find()
+                result = self._finish(request, route)
+                if result is not None:
+                    results.append((request, result))
+                continue
+
+            key = (request.type, request.cost_func_name,
+                   request.heuristic_func_name, request.max_retry,
+                   request.visited_logging, self._safe_userdata(request))
+            if route_finder is None or key != finder_key:
+                route_finder = self._new_finder(request, batch.map)
+                finder_key = key
+
+            start.x, start.y = request.start
+            goal.x, goal.y = request.goal
+            route_finder.set_start(start)
+            route_finder.set_goal(goal)
+
+            route: 'c_route' = route_finder.find()
+            result = self._finish(request, route)
+            if result is not None:
+                results.append((request, result))
+
+        g_logger.log_debug_threadsafe(
+            f'[AlgoEngine] 배치 길찾기 {len(batch.requests)}건 '
+            f'({(time.monotonic() - t0) * 1000:.1f} ms)')
+
+        if batch.on_batch_found_cb is not None:
+            if results:
+                batch.on_batch_found_cb([result for _, result in results])
+        else:
+            for request, result in results:
+                request.on_route_found_cb(result)
+
+    @staticmethod
+    def _safe_userdata(request: RouteRequest):
         # userdata는 C 쪽에서 직접 쓰지 않고 복제해서 넘겨라
-        safe_userdata = request.userdata if isinstance(
+        return request.userdata if isinstance(
             request.userdata, (int, float, str)) else None
-        
+
+    @staticmethod
+    def _overlay_map(request: RouteRequest, map: c_map) -> c_map | None:
+        """request.blocked를 막은 map의 복사본. 없으면 None (워커 쓰레드)"""
+        if not request.blocked:
+            return None
+        overlay = map.copy()
+        overlay.block_many([c[0] for c in request.blocked],
+                           [c[1] for c in request.blocked])
+        return overlay
+
+    def _new_finder(self, request: RouteRequest, map: c_map) -> c_route_finder:
         cost_func = g_RouteFinderCommon.get_cost_func(request.cost_func_name)
         heuristic_func = g_RouteFinderCommon.get_heuristic_func(
             request.heuristic_func_name)
-        
-        self.route_finder = c_route_finder(
-            map=request.map,
+
+        return c_route_finder(
+            map=map,
             type=request.type,
             start=c_coord.from_tuple(request.start),
             goal=c_coord.from_tuple(request.goal),
@@ -47,13 +220,34 @@ class AlgoEngine:
             heuristic_fn=heuristic_func,
             max_retry=request.max_retry,
             visited_logging=request.visited_logging,
-            userdata=safe_userdata
+            userdata=self._safe_userdata(request)
         )
 
-        route: 'c_route' = self.route_finder.find()
-        g_logger.log_debug_threadsafe('after 길찾기')
+    def _finish(self, request: RouteRequest,
+                route: 'c_route') -> RouteResult | None:
+        """
+        결과를 캐시에 넣고 핸들을 완료한다.
+        그 사이 요청이 취소되었으면 None (콜백을 부르지 않는다)
+        """
+        cache_key = request.cache_key
+        if (cache_key is not None and not request.blocked and
+                route is not None and route.is_success()):
+            coords = [c.to_tuple() for c in route.coords().to_list()]
+            # 취소된 요청의 결과도 경로 자체는 유효하므로 캐시에는 넣는다.
+            self.route_cache.put(cache_key, route, coords,
+                                 request.cache_generation)
+
+        handle: RouteHandle = request.handle
+        self._forget(handle)
         result = RouteResult(request.npc_id, route)
-        request.on_route_found_cb(result)
+        if not handle.set_result(result):
+            with self._latest_lock:
+                self.stale_count += 1
+            g_logger.log_debug_threadsafe(
+                f'[AlgoEngine] 지난 요청의 결과를 버림 npc_id : {request.npc_id}')
+            return None
+        self._record_latency(request.priority, request.submit_time)
+        return result
 
     def submit(self,
                map: c_map,
@@ -66,7 +260,18 @@ class AlgoEngine:
                visited_logging: bool = False,
                cost_func_name: str = "default",
                heuristic_func_name: str = "euclidean",
-               userdata: any = None):
+               userdata: any = None,
+               movement_class=None,
+               supersede: bool = True,
+               priority: int = RoutePriority.BACKGROUND,
+               blocked: tuple = ()) -> RouteHandle:
+        """
+        movement_class: 맵의 이동 등급. 주면 결과를 route_cache에
+        캐시한다. (같은 등급의 맵은 같은 장애물을 가진다는 전제)
+        supersede: 같은 npc_id의 이전 요청을 취소한다.
+        priority: RoutePriority. 값이 작을수록 먼저 처리한다.
+        blocked: 이 요청에서만 막을 좌표 (근처 NPC)
+        """
         request = RouteRequest(
             map=map,
             npc_id=npc_id,
@@ -78,12 +283,149 @@ class AlgoEngine:
             visited_logging=visited_logging,
             cost_func_name=cost_func_name,
             heuristic_func_name=heuristic_func_name,
-            userdata=userdata
+            userdata=userdata,
+            priority=int(priority),
+            blocked=blocked
         )
-        self.task_queue.put(request)
+        cached = self._prepare(request, movement_class, supersede)
+        if cached is not None:
+            on_route_found_cb(cached)
+        else:
+            self._enqueue(request)
+        return request.handle
+
+    def submit_batch(self,
+                     requests: list[RouteRequest],
+                     on_batch_found_cb: Callable | None = None,
+                     movement_class=None,
+                     supersede: bool = True,
+                     batch_size: int = 64) -> list[RouteHandle]:
+        """
+        여러 요청을 묶어서 처리한다. 같은 map(스냅샷)과 우선순위를 가진
+        요청끼리 batch_size개씩 RouteBatch로 묶어 쓰레드 한 번에 찾는다.
+
+        on_batch_found_cb: 배치마다 RouteResult 목록으로 한 번 불린다.
+        None이면 요청마다 on_route_found_cb를 부른다.
+        캐시에 있는 요청의 결과는 submit_batch() 안에서 한 번에 넘긴다.
+        """
+        hits = []
+        groups: dict[tuple, list[RouteRequest]] = {}
+        for request in requests:
+            request.priority = int(request.priority)
+            cached = self._prepare(request, movement_class, supersede)
+            if cached is not None:
+                hits.append((request, cached))
+                continue
+            groups.setdefault(
+                (id(request.map), request.priority), []).append(request)
+
+        if hits:
+            if on_batch_found_cb is not None:
+                on_batch_found_cb([result for _, result in hits])
+            else:
+                for request, result in hits:
+                    request.on_route_found_cb(result)
+
+        batch_size = max(1, batch_size)
+        for (_, priority), group in groups.items():
+            for i in range(0, len(group), batch_size):
+                chunk = group[i:i + batch_size]
+                self._enqueue(RouteBatch(
+                    chunk[0].map, chunk, on_batch_found_cb, priority))
+
+        return [request.handle for request in requests]
+
+    def _prepare(self, request: RouteRequest, movement_class,
+                 supersede: bool) -> RouteResult | None:
+        """핸들을 붙이고 이전 요청을 취소한다. 캐시에 있으면 그 결과"""
+        handle = RouteHandle(request.npc_id)
+        request.handle = handle
+        if supersede:
+            self._supersede(handle)
+
+        if self.route_cache is None or movement_class is None:
+            return None
+
+        request.cache_key = RouteCache.make_key(
+            request.type, movement_class, request.start, request.goal,
+            request.cost_func_name, request.heuristic_func_name)
+        route = self.route_cache.get(request.cache_key, avoid=request.blocked)
+        if route is None:
+            request.cache_generation = self.route_cache.generation()
+            return None
+
+        self._forget(handle)
+        result = RouteResult(request.npc_id, route)
+        handle.set_result(result)
+        self._record_latency(request.priority, request.submit_time)
+        return result
+
+    def _enqueue(self, item: RouteRequest | RouteBatch):
+        with self._cv:
+            self._queues.setdefault(item.priority, deque()).append(item)
+            self._pending += 1
+            self._cv.notify()
+
+    @property
+    def pending_count(self) -> int:
+        return self._pending
+
+    def _record_latency(self, priority: int, submit_time: float):
+        window = self._latencies.setdefault(
+            priority, deque(maxlen=self.latency_window))
+        window.append(time.monotonic() - submit_time)
+
+    def get_latency_stats(self) -> dict:
+        """
+        우선순위별 최근 지연 시간 통계 (밀리초)
+        {이름: {"count", "pending", "p50_ms", "p90_ms", "p99_ms", "max_ms"}}
+        """
+        stats = {}
+        with self._cv:
+            pending = {p: len(q) for p, q in self._queues.items()}
+        for priority, window in self._latencies.items():
+            samples = sorted(window)
+            try:
+                name = RoutePriority(priority).name
+            except ValueError:
+                name = str(priority)
+            entry = {"count": len(samples), "pending": pending.get(priority, 0)}
+            for label, q in (("p50_ms", 0.50), ("p90_ms", 0.90),
+                             ("p99_ms", 0.99), ("max_ms", 1.0)):
+                if samples:
+                    index = min(len(samples) - 1, int(q * len(samples)))
+                    entry[label] = samples[index] * 1000.0
+                else:
+                    entry[label] = 0.0
+            stats[name] = entry
+        return stats
+
+    def cancel(self, npc_id: str) -> bool:
+        """npc_id의 대기 중이거나 진행 중인 요청을 취소한다."""
+        with self._latest_lock:
+            handle = self._latest.pop(npc_id, None)
+        return handle is not None and handle.cancel()
+
+    def _supersede(self, handle: RouteHandle):
+        with self._latest_lock:
+            prev = self._latest.get(handle.npc_id)
+            self._latest[handle.npc_id] = handle
+        if prev is not None:
+            prev.cancel()
+
+    def _forget(self, handle: RouteHandle):
+        with self._latest_lock:
+            if self._latest.get(handle.npc_id) is handle:
+                del self._latest[handle.npc_id]
 
     def shutdown(self):
         self.running = False
-        self.task_queue.put(None)
+        with self._latest_lock:
+            handles = list(self._latest.values())
+            self._latest.clear()
+        for handle in handles:
+            handle.cancel()
+        with self._cv:
+            self._cv.notify_all()
         self.executor.shutdown(wait=True)
 
@@ -1,15 +1,22 @@
-from PySide6.QtCore import Qt, QRect, QObject, Slot, Signal, QTimer
+from PySide6.QtCore import Qt, QRect, QPoint, QObject, Slot, Signal, QTimer
 
 from collections import deque, OrderedDict
 
 from grid.grid_cell import GridCell, CellFlag, TerrainType
 from world.village.village import Village
 from grid.grid_block_manager import GridBlockManager
+from grid.block_executor import ProcessBlockExecutor
 
 from coord import c_coord
 from map import c_map
 from world.route_engine.route_finder_engine import AlgoEngine
+from world.route_engine.obstacle_map import ObstacleMapSet, movement_class
+from world.route_engine.route_cache import RouteCache
+from world.route_engine.hierarchical_planner import HierarchicalPlanner
+from world.route_engine.dsl_engine import DslEngine
+from world.route_engine.common import RoutePriority, RouteRequest
 from world.npc.npc_animator_engine import AnimatorEngine
+from world.world_simulator import WorldSimulator
 
 from world.npc.npc import NPC
 from world.npc.npc_manager import NPCManager
@@ -29,7 +36,25 @@ class World(QObject):
 
     grid_unit_m_changed = Signal(float)
 
-    def __init__(self, block_size=100, grid_unit_m=1.0, parent=None):
+    # 배치 길찾기 결과 (list[RouteResult]). 메인 쓰레드로 넘겨받는다.
+    route_batch_found = Signal(object)
+    # 단건 길찾기 결과 (RouteResult). 메인 쓰레드로 넘겨받는다.
+    route_found = Signal(object)
+    # 증분 재탐색(D* Lite) 결과 (RouteResult, 고친 경로인가)
+    dsl_route_found = Signal(object, bool)
+    # 한 프레임에 한 칸 이동을 마친 NPC들 (list[NPC])
+    npcs_arrived = Signal(object)
+    # 블럭이 캐시에서 축출되기 직전 (블럭 원점)
+    block_evicted = Signal(tuple)
+
+    def __init__(self, block_size=100, grid_unit_m=1.0, 
+                 block_workers: int | None = None, route_workers: int = 4,
+                 parent=None):
+        """
+        block_workers: 블럭 생성 워커 프로세스 수 (None이면 CPU 코어 수)
+        route_workers: 동시에 실행할 길찾기 수. 요청마다 맵 스냅샷을
+            들고 가므로 늘려도 안전하다.
+        """
         super().__init__()
         self.parent = parent
         self.selected_village = None
@@ -40,16 +65,45 @@ class World(QObject):
         # cmap(rawptr=self.map_ptr) 이런식으로...
         # self.map_ptr = self.map.ptr()
 
-        self.route_finder_engine = AlgoEngine()
+        # 같은 이동 등급/출발/도착 요청은 맵이 바뀌기 전까지 결과를 재사용한다.
+        self.route_cache = RouteCache()
+        self.route_finder_engine = AlgoEngine(
+            max_workers=route_workers, route_cache=self.route_cache)
+        # 모든 NPC 애니메이션은 step_animations()가 프레임마다 한 번에 진행한다.
         self.animator_engine = AnimatorEngine()
         self.grid_unit_m = grid_unit_m
         self.set_grid_unit_m(grid_unit_m)
 
-        self.block_mgr = GridBlockManager(block_size)
-        self.npc_mgr = NPCManager(self)
+        self.block_mgr = GridBlockManager(
+            block_size, executor=ProcessBlockExecutor(block_workers))
+        self.npc_mgr = NPCManager(self, block_size=block_size)
+        # 이동 등급별 장애물 맵 (길찾기가 파이썬 콜백 없이 C에서만 돈다)
+        self.obstacle_maps = ObstacleMapSet(
+            self.block_mgr, route_cache=self.route_cache)
+        # 블럭 경계 입구로 만든 추상 그래프 (먼 목표용)
+        self.route_planner = HierarchicalPlanner(self.block_mgr)
+        # NPC.incremental_replan인 NPC의 D* Lite 세션
+        self.dsl_engine = DslEngine(max_workers=2)
+        self.obstacle_maps.on_cell_changed = self._on_obstacle_changed
+        self.dsl_route_found.connect(self._on_dsl_route_found)
         self.block_mgr.on_after_block_loaded = self.on_after_block_loaded
         self.block_mgr.on_before_block_evicted = self.on_before_block_evicted
         
+        # 길찾기 때 이 거리 안의 다른 NPC만 장애물로 얹는다. (먼 NPC는 그새 움직인다)
+        self.npc_block_radius = 3
+
+        # 사용자가 선택한 NPC. 길찾기를 가장 먼저 처리한다.
+        self.focus_npc_id: str | None = None
+
+        # 한 이벤트 루프 동안 모인 길찾기 요청을 배치로 보낸다.
+        self._find_pending: dict[str, NPC] = {}
+        self._find_scheduled = False
+        self.route_batch_found.connect(self._on_route_batch_found)
+        self.route_found.connect(self._on_route_found)
+
+        # 모든 NPC를 고정 간격으로 진행한다. (화면과 무관, start()는 쓰는 쪽에서)
+        self.simulator = WorldSimulator(self)
+
         self.villages: dict[str, Village] = {}
 
         # 기본 마을 생성
@@ -80,12 +134,22 @@ class World(QObject):
 
     def reset(self):
         self.map.clear()
+        self.obstacle_maps.clear()
+        self.route_cache.clear()
+        self.route_planner.clear()
+        self.dsl_engine.clear()
+        self.animator_engine.clear()
+        self.simulator.reset()
         self.block_mgr.reset()
         self.npc_mgr.reset()
 
     def close(self):
+        self.simulator.stop()
         self.route_finder_engine.shutdown()
+        self.dsl_engine.shutdown()
         self.animator_engine.shutdown()
+        self.block_mgr.shutdown()
+        self.obstacle_maps.clear()
         self.map.close()
 
     def create_village(self, name: str, 
@@ -151,9 +215,8 @@ class World(QObject):
         new_cell = self.block_mgr.get_cell(coord)
         if new_cell and npc.is_movable(new_cell):
             new_cell.add_flag(CellFlag.START)
-            npc.start = coord
+            self.place_npc_to_cell(npc, coord)
             npc.goal = coord
-            self.place_npc_to_cell(npc)
         else:
             g_logger.log_always(f'{coord}는 npc가 이동할 수 없는 테란타입이다.')
 
@@ -179,6 +242,130 @@ class World(QObject):
         npc.append_goal(coord)
         self.find_proto(npc)
 
+    def set_focus_npc(self, npc: NPC | None):
+        self.focus_npc_id = npc.id if npc else None
+
+    def route_priority(self, npc: NPC) -> RoutePriority:
+        """선택된 NPC > 화면 안 NPC > 나머지 순으로 길찾기를 처리한다."""
+        if npc.id == self.focus_npc_id:
+            return RoutePriority.SELECTED
+        viewport = self.block_mgr.viewport
+        if viewport is not None and npc.start is not None and \
+                viewport.contains(QPoint(*npc.start)):
+            return RoutePriority.VISIBLE
+        return RoutePriority.BACKGROUND
+
+    def plan_waypoints(self, npc: NPC, start: tuple,
+                       goal: tuple) -> list[tuple] | None:
+        """
+        먼 목표를 블럭 단위 중간 목표로 나눈다. (마지막은 goal)
+        가까우면 [goal], 추상 경로가 없으면 None
+        """
+        return self.route_planner.plan(start, goal, npc.movable_terrain)
+
+    def step_animations(self, elapsed_sec: float) -> list[NPC]:
+        """
+        실행 중인 모든 NPC 애니메이션을 한 번에 진행한다. (메인 쓰레드, 프레임당 1회)
+        한 칸 이동을 마친 NPC의 완료 콜백을 부르고 그 목록을 반환한다.
+        """
+        arrived = self.animator_engine.step(elapsed_sec)
+        if not arrived:
+            return []
+        for animator in arrived:
+            # 메인 쓰레드에서 부르므로 한 NPC의 오류가 프레임 전체를 멈추지 않게 한다.
+            try:
+                animator.finish()
+            except Exception as e:
+                g_logger.log_always(
+                    f'[{animator.npc.id}] 이동 완료 처리 오류: {e}')
+        npcs = [animator.npc for animator in arrived]
+        self.npcs_arrived.emit(npcs)
+        return npcs
+
+    def request_find(self, npc: NPC):
+        """
+        npc의 다음 길찾기를 예약한다. 같은 틱에 예약된 요청들은
+        이동 등급별로 묶어서 submit_batch()로 한 번에 보낸다.
+        """
+        self._find_pending[npc.id] = npc
+        if not self._find_scheduled:
+            self._find_scheduled = True
+            QTimer.singleShot(0, self._flush_find_requests)
+
+    def _flush_find_requests(self):
+        self._find_scheduled = False
+        npcs = list(self._find_pending.values())
+        self._find_pending.clear()
+
+        groups: dict[frozenset, list[RouteRequest]] = {}
+        for npc in npcs:
+            if not self.npc_mgr.has_npc(npc.id):
+                continue
+            if npc.incremental_replan:
+                npc.find()
+                continue
+            request = npc.make_route_request()
+            if request is None:
+                continue
+            groups.setdefault(
+                movement_class(npc.movable_terrain), []).append(request)
+
+        for cls, requests in groups.items():
+            self.route_finder_engine.submit_batch(
+                requests, self.route_batch_found.emit, movement_class=cls)
+
+    @Slot(object)
+    def _on_route_batch_found(self, results: list):
+        for result in results:
+            self._on_route_found(result)
+
+    @Slot(object)
+    def _on_route_found(self, result):
+        if not self.npc_mgr.has_npc(result.npc_id):
+            return
+        self.npc_mgr.get_npc(result.npc_id).on_proto_found(result)
+
+    def plan_incremental(self, npc: NPC, start: tuple, goal: tuple):
+        """npc의 D* Lite 세션을 새로 만들어 start -> goal을 찾는다."""
+        self.dsl_engine.plan(
+            self.obstacle_maps.snapshot(npc.movable_terrain),
+            npc.id, movement_class(npc.movable_terrain), start, goal,
+            lambda result: self.dsl_route_found.emit(result, False),
+            max_retry=npc.max_retry)
+
+    def _on_obstacle_changed(self, cls, coord: tuple, blocked: bool):
+        """
+        장애물이 바뀌면 D* Lite 세션에 알리고, 경로가 그 근처를 지나는
+        NPC만 고친다. 그 셀에 서 있는 NPC 자신의 세션은 제외한다.
+        """
+        if not self.dsl_engine.sessions:
+            return
+        cell = self.block_mgr.get_cell(coord)
+        occupants = set(cell.npc_ids) if cell else set()
+        for npc_id in self.dsl_engine.record_change(cls, coord, blocked,
+                                                     ignore=occupants):
+            npc = self.npc_mgr.get_npc(npc_id)
+            if npc is None:
+                continue
+            self.repair_incremental(npc)
+
+    def repair_incremental(self, npc: NPC):
+        """npc의 D* Lite 세션에 쌓인 변경을 지금 위치에서 반영해 경로를 고친다."""
+        self.dsl_engine.repair(
+            npc.id, npc.start,
+            lambda: self.obstacle_maps.snapshot(npc.movable_terrain),
+            lambda result: self.dsl_route_found.emit(result, True))
+
+    @Slot(object, bool)
+    def _on_dsl_route_found(self, result, repaired: bool):
+        if not self.npc_mgr.has_npc(result.npc_id):
+            return
+        npc = self.npc_mgr.get_npc(result.npc_id)
+        if repaired:
+            npc.on_route_repaired(result)
+        else:
+            npc.on_proto_found(result)
+
     def find_proto(self, npc: NPC):
         if g_logger.debug_mode:
             t0 = time.time()
@@ -209,18 +396,22 @@ class World(QObject):
 
 
     def place_npc_to_cell(self, npc: NPC, coord:tuple):
-        # npc가 기존에 있던 셀에서 제거한다.
-        key = self.block_mgr.get_origin(npc.start)
-        cell = self.block_mgr.get_cell(npc.start)
-        cell.remove_npc_id(npc.id)
-        cell.remove_flag(CellFlag.START)
+        old_coord = npc.start
 
-        self.block_mgr.set_cell(key, cell)
+        # npc가 기존에 있던 셀에서 제거한다. (블럭이 축출되었으면 없다)
+        cell = self.block_mgr.get_cell(old_coord) if old_coord else None
+        if cell:
+            key = self.block_mgr.get_origin(old_coord)
+            cell.remove_npc_id(npc.id)
+            cell.remove_flag(CellFlag.START)
+            self.block_mgr.set_cell(key, cell)
 
         # 새로운 위체의 셀에 npc를 추가한다.
         npc.start = coord
         cell = self.block_mgr.get_cell(coord)
         if cell:
+            self.npc_mgr.update_npc_coord(npc.id, coord)
+
             if cell.terrain not in npc.movable_terrain:
                 if cell.terrain != TerrainType.FORBIDDEN:
                     npc.movable_terrain.append(cell.terrain)
@@ -239,6 +430,10 @@ class World(QObject):
 
             key = self.block_mgr.get_origin(coord)
             self.block_mgr.set_cell(key, cell)
+        else:
+            # 어느 셀에도 배치되지 않았다.
+            self.npc_mgr.unindex_npc(npc.id)
+        # NPC 위치는 장애물 맵에 넣지 않는다. (요청마다 npc_overlay()로 얹는다)
 
     @Slot(tuple)
     def on_anim_to_arrived(self, npc: NPC, coord: tuple):
@@ -248,35 +443,36 @@ class World(QObject):
 
     def get_npcs_in_rect(self, rect: QRect) -> set[NPC]:
         """
-        셀 구조를 기반으로 rect 범위 내의 NPC 객체들을 반환한다.
-        None은 포함하지 않는다.
+        rect 범위 내의 셀에 배치된 NPC 객체들을 반환한다.
+        셀을 훑지 않고 NPCManager의 공간 인덱스로 찾는다.
         """
-        result = set()
-
-        x0, x1 = rect.left(), rect.right()
-        y0, y1 = rect.top(), rect.bottom()
+        return self.npc_mgr.get_npcs_in_rect(rect)
 
-        for x in range(x0, x1):
-            for y in range(y0, y1):
-                cell = self.block_mgr.get_cell((x, y))
-                if not cell or not cell.npc_ids:
-                    continue
+    def get_npcs_in_radius(self, center: tuple, radius: float) -> set[NPC]:
+        return self.npc_mgr.get_npcs_in_radius(center, radius)
 
-                for npc_id in cell.npc_ids:
-                    npc = self.npc_mgr.get_npc(npc_id)
-                    if npc:
-                        result.add(npc)
-
-        return result
+    def npc_overlay(self, npc: NPC, start: tuple, goal: tuple) -> tuple:
+        """
+        npc의 길찾기 요청에서만 막을 좌표. start 근처(npc_block_radius)에
+        서 있는 다른 NPC들이다. 공유 장애물 맵에는 terrain만 들어 있다.
+        """
+        coords = []
+        for other in self.get_npcs_in_radius(start, self.npc_block_radius):
+            coord = other.start
+            if other is npc or coord is None or coord in (start, goal):
+                continue
+            coords.append(coord)
+        return tuple(coords)
 
     def spawn_npc(self, npc_id, start:tuple):
         if not self.npc_mgr.has_npc(npc_id):
             self.npc_mgr.create_npc(npc_id, start)
-        
-        npc = self.npc_mgr.get_npc(npc_id)
+            npc = self.npc_mgr.get_npc(npc_id)
+            # 새로 만들 때 한 번만 연결한다. (다시 부르면 콜백이 중복된다)
+            npc.anim_to_arrived_sig.connect(lambda coord, n=npc:
+                self.place_npc_to_cell(n, coord))
 
-        npc.anim_to_arrived_sig.connect(lambda coord, n=npc: 
-            self.place_npc_to_cell(n, coord))
+        npc = self.npc_mgr.get_npc(npc_id)
 
         cell = self.block_mgr.get_cell(start)
         if cell:
@@ -309,6 +505,11 @@ class World(QObject):
 
         # npc 객체 추출
         npc: NPC = self.npc_mgr.npc_dict.pop(npc_id)
+        self.npc_mgr.unindex_npc(npc_id)
+        # 진행 중인 길찾기 결과는 더 이상 받을 곳이 없다.
+        self.route_finder_engine.cancel(npc_id)
+        self.dsl_engine.drop(npc_id)
+        npc.animator.stop()
 
         # 현재 위치 기준 셀에서 npc 제거
         key = self.block_mgr.get_origin(npc.start)
@@ -327,7 +528,15 @@ class World(QObject):
         # 시그널 전파
         self.npc_deleted.emit(npc_id)
 
+    def _block_rect(self, block_key: tuple) -> tuple:
+        size = self.block_mgr.block_size
+        return (block_key[0], block_key[1],
+                block_key[0] + size - 1, block_key[1] + size - 1)
+
     def on_after_block_loaded(self, block_key: tuple):
+        self.obstacle_maps.on_block_loaded(block_key)
+        self.route_planner.on_block_changed(block_key)
+        self.dsl_engine.mark_stale(rect=self._block_rect(block_key))
         if block_key not in self._block_load_queue:
             self._block_load_queue.append(block_key)
         if not self._loading_scheduled:
@@ -344,12 +553,19 @@ class World(QObject):
                 continue
 
             pending_npcs: list[tuple[str, tuple]] = []
-            for cell in block.cells.values():
-                for npc_id in cell.npc_ids:
+            for coord, npc_ids in block.npc_cells():
+                for npc_id in list(npc_ids):
                     if npc_id in self.queued_despawn_ids:
                         del self.queued_despawn_ids[npc_id]
                         g_logger.log_debug(f"[Spawn:{block_key}] 디스폰 예약 취소됨: {npc_id}")
-                    pending_npcs.append((npc_id, (cell.x, cell.y)))
+                    # 살아 있는 NPC는 다시 생성하지 않는다. 생성된 블럭을 떠나
+                    # 다른 곳에 있으면 다시 만들어진 셀의 옛 id만 지운다.
+                    if self.npc_mgr.has_npc(npc_id):
+                        placed = self.npc_mgr.get_npc_coord(npc_id)
+                        if placed is not None and placed != coord:
+                            block.cell_at(*coord).remove_npc_id(npc_id)
+                        continue
+                    pending_npcs.append((npc_id, coord))
                     if len(pending_npcs) >= batch_size:
                         self.pending_spawn_batches.append(pending_npcs)
                         pending_npcs = []
@@ -389,6 +605,10 @@ class World(QObject):
 
 
     def on_before_block_evicted(self, block_key: tuple, interval_msec=50):
+        self.obstacle_maps.on_block_evicted(block_key)
+        self.route_planner.on_block_changed(block_key)
+        self.dsl_engine.mark_stale(rect=self._block_rect(block_key))
+        self.block_evicted.emit(block_key)
         if block_key not in self._block_evict_queue:
             self._block_evict_queue.append(block_key)
         if not self._evicting_scheduled:
@@ -400,10 +620,8 @@ class World(QObject):
 
         while self._block_evict_queue:
             block_key = self._block_evict_queue.popleft()
-            for npc_id, npc in self.npc_mgr.npc_dict.items():
-                npc_block_key = self.block_mgr.get_origin(npc.start)
-                if npc_block_key == block_key:
-                    self.queued_despawn_ids[npc_id] = None
+            for npc_id in self.npc_mgr.get_npc_ids_in_block(block_key):
+                self.queued_despawn_ids[npc_id] = None
 
         self._schedule_despawn()
 
@@ -432,7 +650,13 @@ class World(QObject):
         run_batch()
 
     def add_changed_coord(self, coord_c: tuple):
+        """맵 편집(장애물 추가/제거)으로 바뀐 좌표. 캐시된 경로도 여기서만 지운다."""
         self._changed_q.put(coord_c)
+        for cls, blocked in self.obstacle_maps.update_coord(coord_c):
+            # 막히면 그 좌표를 지나는 경로만, 풀리면 더 짧은 길이 생겼을 수
+            # 있으므로 근처 경로까지 지운다.
+            self.route_cache.invalidate_coord(coord_c, cls, nearby=not blocked)
+        self.route_planner.update_coord(coord_c)
 
     def clear_changed_coords(self):
         try:
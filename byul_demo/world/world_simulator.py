@@ -0,0 +1,244 @@
+import math
+import time
+from enum import IntEnum
+
+from PySide6.QtCore import QObject, QCoreApplication, QTimer, Signal, Slot
+
+from utils.log_to_panel import g_logger
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from world.world import World
+
+def ensure_headless_app() -> QCoreApplication:
+    """
+    창 없이 돌릴 때 쓸 QCoreApplication. 이미 있으면 그것을 돌려준다.
+    (QTimer와 쓰레드 간 Signal 전달에 이벤트 루프가 필요하다)
+    """
+    app = QCoreApplication.instance()
+    if app is None:
+        app = QCoreApplication([])
+    return app
+
+class SimLevel(IntEnum):
+    """NPC 시뮬레이션 상세 수준"""
+    FULL = 0      # 화면 안 : 칸 사이를 애니메이션으로 보간
+    COARSE = 1    # 화면 근처 : 보간 없이 한 칸씩
+    DISTANT = 2   # 그 밖 : 낮은 빈도로 경로 위 위치만 계산
+
+class WorldSimulator(QObject):
+    """
+    NPCManager의 모든 NPC를 고정 시간 간격(timestep_sec)으로 진행한다.
+
+    한 스텝(step)은
+      1. 모든 NPC의 on_tick() (길찾기 요청, 다음 칸 애니메이션 시작)
+      2. World.step_animations() (모든 애니메이션을 한 번에 진행)
+    이다. GridCanvas와 무관하게 돌고, 캔버스는 결과 상태를 그리기만 한다.
+
+    lod_enabled면 NPC마다 SimLevel을 나눠서 진행한다.
+    - FULL : 화면(block_mgr.viewport) 안과 선택된 NPC. NPC.on_tick()
+    - COARSE : 화면에서 near_margin 셀 이내. NPC.on_tick_coarse()
+    - DISTANT : 나머지. distant_interval_sec 동안 한 번씩 돌아가며
+      NPC.on_tick_distant() (스텝마다 전체의 일부만 처리해서 비용을 고르게 나눈다)
+    화면이 없으면(viewport None) 선택된 NPC 말고는 모두 DISTANT다.
+
+    - start() : QTimer로 실시간 진행. 실제 흐른 시간 * time_scale 만큼
+      스텝을 쌓아 두었다가 고정 간격으로 소비한다. 한 번에 max_steps_per_tick
+      을 넘으면 남은 시간은 버린다. (느린 프레임이 계속 밀리지 않도록)
+    - run_for() : 타이머 없이 시뮬레이션 시간 sim_sec을 최대한 빨리 돈다.
+      (실시간보다 빠른 일괄 실험용)
+
+    길찾기는 워커 쓰레드에서 돌고 결과는 이벤트 루프로 넘어오므로
+    QCoreApplication이 있어야 한다. 창이나 QApplication은 필요 없다.
+    (ensure_headless_app() 또는 QT_QPA_PLATFORM=offscreen)
+    """
+
+    # 스텝 하나가 끝날 때 (시뮬레이션 시각)
+    stepped = Signal(float)
+
+    def __init__(self, world: 'World', timestep_sec: float = 1 / 30,
+                 time_scale: float = 1.0, max_steps_per_tick: int = 5,
+                 lod_enabled: bool = True, near_margin: int = 32,
+                 distant_interval_sec: float = 1.0, parent=None):
+        super().__init__(parent)
+        self.world = world
+        self.timestep_sec = timestep_sec
+        self.time_scale = time_scale
+        self.max_steps_per_tick = max(1, max_steps_per_tick)
+        self.lod_enabled = lod_enabled
+        self.near_margin = near_margin
+        self.distant_interval_sec = distant_interval_sec
+
+        self.sim_time = 0.0
+        self.step_count = 0
+        self.dropped_sec = 0.0
+        self._accum_sec = 0.0
+        self._last_time: float | None = None
+
+        # npc_id -> 마지막으로 진행한 시뮬레이션 시각
+        self._updated_at: dict[str, float] = {}
+        # DISTANT 순회 목록과 위치
+        self._distant_ids: list[str] = []
+        self._distant_cursor = 0
+        # 마지막 스텝에서 SimLevel별로 진행한 NPC 수
+        self.level_counts: dict[SimLevel, int] = {l: 0 for l in SimLevel}
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._on_timer)
+
+    def is_running(self) -> bool:
+        return self.timer.isActive()
+
+    def start(self, interval_msec: int | None = None):
+        """interval_msec을 안 주면 timestep_sec 간격으로 깨어난다."""
+        if interval_msec is None:
+            interval_msec = int(self.timestep_sec * 1000)
+        self.timer.setInterval(max(0, interval_msec))
+        self._last_time = None
+        self._accum_sec = 0.0
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self._last_time = None
+
+    @Slot(float)
+    def set_time_scale(self, time_scale: float):
+        self.time_scale = max(0.0, time_scale)
+
+    def reset(self):
+        self.sim_time = 0.0
+        self.step_count = 0
+        self.dropped_sec = 0.0
+        self._accum_sec = 0.0
+        self._last_time = None
+        self._updated_at.clear()
+        self._distant_ids = []
+        self._distant_cursor = 0
+
+    def _on_timer(self):
+        now = time.monotonic()
+        if self._last_time is None:
+            self._last_time = now
+            return
+        self._accum_sec += (now - self._last_time) * self.time_scale
+        self._last_time = now
+
+        steps = 0
+        while (self._accum_sec >= self.timestep_sec and
+               steps < self.max_steps_per_tick):
+            self.step()
+            self._accum_sec -= self.timestep_sec
+            steps += 1
+
+        if self._accum_sec >= self.timestep_sec:
+            self.dropped_sec += self._accum_sec
+            self._accum_sec = 0.0
+
+    def step(self, dt: float | None = None):
+        """모든 NPC를 dt(기본 timestep_sec)만큼 진행한다."""
+        dt = self.timestep_sec if dt is None else dt
+        world = self.world
+        now = self.sim_time + dt
+
+        if self.lod_enabled:
+            full, near = self._classify()
+            for npc in full:
+                self._tick(npc, SimLevel.FULL, now, dt)
+            for npc in near:
+                self._tick(npc, SimLevel.COARSE, now, dt)
+            skip = {npc.id for npc in full}
+            skip.update(npc.id for npc in near)
+            distant = self._tick_distant(skip, now, dt)
+            self.level_counts = {SimLevel.FULL: len(full),
+                                 SimLevel.COARSE: len(near),
+                                 SimLevel.DISTANT: distant}
+        else:
+            # on_tick 안에서 NPC가 삭제될 수 있으므로 복사해서 돈다.
+            npcs = list(world.npc_mgr.npc_dict.values())
+            for npc in npcs:
+                self._tick(npc, SimLevel.FULL, now, dt)
+            self.level_counts = {SimLevel.FULL: len(npcs),
+                                 SimLevel.COARSE: 0, SimLevel.DISTANT: 0}
+        world.step_animations(dt)
+
+        self.sim_time = now
+        self.step_count += 1
+        self.stepped.emit(self.sim_time)
+
+    def _classify(self) -> tuple[set, set]:
+        """(FULL, COARSE) NPC 집합. 공간 인덱스로 찾는다."""
+        world = self.world
+        full, near = set(), set()
+        viewport = world.block_mgr.viewport
+        if viewport is not None:
+            full = world.get_npcs_in_rect(viewport)
+            m = self.near_margin
+            if m > 0:
+                near = world.get_npcs_in_rect(
+                    viewport.adjusted(-m, -m, m, m)) - full
+
+        if world.focus_npc_id is not None:
+            focus = world.npc_mgr.get_npc(world.focus_npc_id)
+            if focus is not None:
+                full.add(focus)
+                near.discard(focus)
+        return full, near
+
+    def _tick(self, npc, level: SimLevel, now: float, dt: float):
+        if npc.start is None:
+            return
+        # 낮은 수준에서 올라온 NPC는 그동안 흐른 시간을 한 번에 받는다.
+        elapsed = now - self._updated_at.get(npc.id, now - dt)
+        self._updated_at[npc.id] = now
+        if level == SimLevel.FULL:
+            npc.on_tick(elapsed)
+        elif level == SimLevel.COARSE:
+            npc.on_tick_coarse(elapsed)
+        else:
+            npc.on_tick_distant(elapsed)
+
+    def _tick_distant(self, skip: set[str], now: float, dt: float) -> int:
+        npc_dict = self.world.npc_mgr.npc_dict
+        if self._distant_cursor >= len(self._distant_ids):
+            self._distant_ids = list(npc_dict)
+            self._distant_cursor = 0
+            # 삭제된 NPC의 기록을 정리한다.
+            for npc_id in [i for i in self._updated_at if i not in npc_dict]:
+                del self._updated_at[npc_id]
+
+        groups = max(1, round(self.distant_interval_sec / dt)) if dt > 0 else 1
+        chunk = max(1, math.ceil(len(self._distant_ids) / groups))
+        begin = self._distant_cursor
+        self._distant_cursor = begin + chunk
+
+        count = 0
+        for npc_id in self._distant_ids[begin:begin + chunk]:
+            if npc_id in skip:
+                continue
+            npc = npc_dict.get(npc_id)
+            if npc is None:
+                continue
+            self._tick(npc, SimLevel.DISTANT, now, dt)
+            count += 1
+        return count
+
+    def run_for(self, sim_sec: float, process_events: bool = True) -> float:
+        """
+        시뮬레이션 시간 sim_sec만큼 쉬지 않고 진행한다.
+        process_events면 스텝마다 이벤트 루프를 한 번 돌려 배치 길찾기
+        요청과 결과를 주고받는다. 걸린 실제 시간(초)을 반환한다.
+        """
+        app = QCoreApplication.instance() if process_events else None
+        t0 = time.perf_counter()
+        end = self.sim_time + sim_sec
+        while self.sim_time + 1e-9 < end:
+            self.step()
+            if app is not None:
+                app.processEvents()
+
+        elapsed = time.perf_counter() - t0
+        g_logger.log_debug(
+            f"[WorldSimulator] {sim_sec:.2f}초 진행 ({self.step_count} 스텝), "
+            f"실제 {elapsed:.3f}초")
+        return elapsed
@@ -179,6 +179,16 @@ class c_map:
     def unblock(self, x, y):
         return bool(C.map_unblock_coord(self._c, x, y))
 
+    def block_many(self, xs, ys):
+        """여러 좌표를 한 번에 막는다. 막은 좌표 수를 반환한다."""
+        fn, ptr = C.map_block_coord, self._c
+        return sum(1 for x, y in zip(xs, ys) if fn(ptr, x, y))
+
+    def unblock_many(self, xs, ys):
+        """여러 좌표를 한 번에 푼다. 푼 좌표 수를 반환한다."""
+        fn, ptr = C.map_unblock_coord, self._c
+        return sum(1 for x, y in zip(xs, ys) if fn(ptr, x, y))
+
     def is_blocked(self, x, y):
         # bool is_coord_blocked_map(const void* context,
         #     int x, int y, void* userdata);
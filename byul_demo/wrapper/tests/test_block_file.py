@@ -0,0 +1,114 @@
+from pathlib import Path
+import sys
+
+g_root_path = Path(__file__).resolve().parents[2]
+wrapper_path = g_root_path / Path("wrapper/modules")
+
+sys.path.insert(0, str(g_root_path))
+sys.path.insert(0, str(wrapper_path.resolve()))
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from grid.block_file import (
+    BlockFileError, block_file_path, columns_from_bytes, columns_to_bytes,
+    read_columns_file, write_columns_file)
+from grid.block_generator import generate_block_columns
+from grid.grid_block import (
+    GridBlock, convert_block_file_to_json, convert_json_to_block_file)
+from grid.grid_cell import CellFlag
+
+_PERSISTENT = ("terrain", "status", "light_level", "timestamp",
+               "zone_code", "effect_code", "event_code")
+
+class TestBlockFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name)
+        self.cols = generate_block_columns(-16, 32, 16, world_seed=11)
+        self.cols.custom_data[5] = {"hp": 3}
+        self.cols.owner_npc_id[6] = "npc_owner"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertSameColumns(self, a, b):
+        self.assertEqual((a.x0, a.y0, a.size), (b.x0, b.y0, b.size))
+        for name in _PERSISTENT:
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+        self.assertEqual(a.strings, b.strings)
+        self.assertEqual(a.npc_ids, b.npc_ids)
+        self.assertEqual(a.items, b.items)
+        self.assertEqual(a.owner_npc_id, b.owner_npc_id)
+        self.assertEqual(a.custom_data, b.custom_data)
+
+    def test_bytes_roundtrip(self):
+        loaded = columns_from_bytes(columns_to_bytes(self.cols))
+        self.assertSameColumns(self.cols, loaded)
+        self.assertFalse(loaded.is_dirty())
+
+    def test_flags_are_not_stored(self):
+        self.cols.flags[:] = CellFlag.ROUTE.value
+        loaded = columns_from_bytes(columns_to_bytes(self.cols))
+        self.assertFalse(np.any(loaded.flags))
+
+    def test_file_roundtrip_mmap(self):
+        path = write_columns_file(
+            self.cols, block_file_path(self.folder, -16, 32))
+        self.assertEqual(path.name, "block_-16_32.byb")
+        for mmap in (True, False):
+            loaded = read_columns_file(path, mmap=mmap)
+            self.assertSameColumns(self.cols, loaded)
+            self.assertFalse(loaded.is_dirty())
+            loaded.close()
+
+    def test_mmap_is_copy_on_write(self):
+        path = write_columns_file(
+            self.cols, block_file_path(self.folder, -16, 32))
+        before = path.read_bytes()
+
+        block = GridBlock.from_file(path)
+        self.assertIsInstance(block.columns.terrain, np.memmap)
+        block.cell_at(-16, 32).light_level = 0.0
+        block.columns.terrain[:] = 0
+        block.close()
+
+        self.assertEqual(path.read_bytes(), before)
+
+    def test_bad_header(self):
+        raw = bytearray(columns_to_bytes(self.cols))
+        with self.assertRaises(BlockFileError):
+            columns_from_bytes(bytes(raw[:8]))
+
+        bad_magic = bytearray(raw)
+        bad_magic[:4] = b"NOPE"
+        with self.assertRaises(BlockFileError):
+            columns_from_bytes(bytes(bad_magic))
+
+        bad_version = bytearray(raw)
+        bad_version[4:6] = (99).to_bytes(2, "little")
+        with self.assertRaises(BlockFileError):
+            columns_from_bytes(bytes(bad_version))
+
+    def test_json_conversion_roundtrip(self):
+        path = GridBlock(-16, 32, 16, columns=self.cols).to_file(self.folder)
+        json_path = convert_block_file_to_json(path, self.folder / "json")
+        self.assertTrue(json_path.exists())
+
+        back = convert_json_to_block_file(json_path, self.folder / "byb")
+        loaded = read_columns_file(back, mmap=False)
+        for name in ("terrain", "status"):
+            np.testing.assert_array_equal(getattr(self.cols, name),
+                                          getattr(loaded, name))
+        # JSON은 문자열로 저장하므로 코드는 달라질 수 있다.
+        self.assertEqual(
+            [self.cols.string_at(int(c)) for c in self.cols.zone_code],
+            [loaded.string_at(int(c)) for c in loaded.zone_code])
+        np.testing.assert_allclose(self.cols.light_level, loaded.light_level)
+        self.assertEqual(self.cols.npc_ids, loaded.npc_ids)
+        self.assertEqual(self.cols.items, loaded.items)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+from pathlib import Path
+import sys
+
+g_root_path = Path(__file__).resolve().parents[2]
+wrapper_path = g_root_path / Path("wrapper/modules")
+
+sys.path.insert(0, str(g_root_path))
+sys.path.insert(0, str(wrapper_path.resolve()))
+
+import unittest
+
+import numpy as np
+
+from grid.block_generator import generate_block_columns
+from grid.grid_cell import CellStatus, TerrainType
+
+_COLUMNS = ("terrain", "status", "light_level", "zone_code",
+            "effect_code", "event_code")
+
+class TestBlockGenerator(unittest.TestCase):
+    def assertSameColumns(self, a, b):
+        for name in _COLUMNS:
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+        self.assertEqual(a.strings, b.strings)
+        self.assertEqual(a.npc_ids, b.npc_ids)
+        self.assertEqual(a.items, b.items)
+
+    def test_same_seed_same_block(self):
+        a = generate_block_columns(100, -200, 20, world_seed=7)
+        b = generate_block_columns(100, -200, 20, world_seed=7)
+        self.assertSameColumns(a, b)
+
+    def test_seed_and_origin_change_block(self):
+        base = generate_block_columns(0, 0, 20, world_seed=1)
+        other_seed = generate_block_columns(0, 0, 20, world_seed=2)
+        other_origin = generate_block_columns(20, 0, 20, world_seed=1)
+        self.assertFalse(np.array_equal(base.terrain, other_seed.terrain))
+        self.assertFalse(np.array_equal(base.terrain, other_origin.terrain))
+
+    def test_origin_cell_is_walkable_and_empty(self):
+        cols = generate_block_columns(-10, -10, 20, world_seed=3,
+                                      npc_chance=1.0,
+                                      terrain_ratio_normal=0.0,
+                                      terrain_ratio_water=0.0,
+                                      terrain_ratio_forest=0.0,
+                                      terrain_ratio_mountain=0.0,
+                                      terrain_ratio_forbidden=1.0)
+        index = cols.index_of(0, 0)
+        self.assertEqual(cols.terrain[index], TerrainType.NORMAL.value)
+        self.assertEqual(cols.status[index], CellStatus.EMPTY.value)
+        self.assertNotIn(index, cols.npc_ids)
+
+    def test_npcs_match_status(self):
+        cols = generate_block_columns(0, 0, 30, world_seed=5, npc_chance=0.2)
+        npc_indices = set(np.flatnonzero(cols.status == CellStatus.NPC.value))
+        self.assertEqual(npc_indices, set(cols.npc_ids))
+        forbidden = cols.terrain == TerrainType.FORBIDDEN.value
+        self.assertFalse(np.any(forbidden[list(npc_indices)]))
+
+    def test_generated_block_is_clean(self):
+        cols = generate_block_columns(0, 0, 10)
+        self.assertFalse(cols.is_dirty())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+from pathlib import Path
+import sys
+
+g_root_path = Path(__file__).resolve().parents[2]
+wrapper_path = g_root_path / Path("wrapper/modules")
+
+sys.path.insert(0, str(g_root_path))
+sys.path.insert(0, str(wrapper_path.resolve()))
+
+import unittest
+
+import numpy as np
+
+from grid.block_generator import generate_block_columns
+from grid.block_spill_cache import BlockSpillCache
+
+class TestBlockSpillCache(unittest.TestCase):
+    def make(self, x0, y0=0):
+        return generate_block_columns(x0, y0, 16, world_seed=4)
+
+    def test_put_and_take(self):
+        cache = BlockSpillCache()
+        cols = self.make(0)
+        self.assertTrue(cache.put((0, 0), cols))
+        self.assertIn((0, 0), cache)
+        self.assertGreater(cache.raw_bytes, cache.used_bytes)
+
+        back = cache.take((0, 0))
+        np.testing.assert_array_equal(cols.terrain, back.terrain)
+        self.assertEqual(cols.items, back.items)
+        self.assertFalse(back.is_dirty())
+        self.assertNotIn((0, 0), cache)
+        self.assertEqual(cache.used_bytes, 0)
+        self.assertEqual(cache.raw_bytes, 0)
+        self.assertIsNone(cache.take((0, 0)))
+
+    def test_dirty_comes_back_dirty(self):
+        cache = BlockSpillCache()
+        cache.put((0, 0), self.make(0), dirty=True)
+        self.assertTrue(cache.take((0, 0)).is_dirty())
+
+    def test_budget_drops_oldest(self):
+        probe = BlockSpillCache()
+        probe.put((0, 0), self.make(0))
+        one = probe.used_bytes
+
+        cache = BlockSpillCache(max_bytes=one * 2 + one // 2)
+        for i in range(4):
+            cache.put((i * 16, 0), self.make(i * 16))
+        self.assertLessEqual(cache.used_bytes, cache.max_bytes)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.dropped_count, 2)
+        self.assertNotIn((0, 0), cache)
+        self.assertIn((48, 0), cache)
+
+    def test_shrink_on_budget_change(self):
+        cache = BlockSpillCache()
+        for i in range(3):
+            cache.put((i * 16, 0), self.make(i * 16))
+        cache.set_max_bytes(0)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.used_bytes, 0)
+        self.assertFalse(cache.put((0, 0), self.make(0)))
+
+    def test_too_large_is_rejected(self):
+        cache = BlockSpillCache(max_bytes=16)
+        self.assertFalse(cache.put((0, 0), self.make(0)))
+        self.assertEqual(len(cache), 0)
+
+    def test_replace_same_key(self):
+        cache = BlockSpillCache()
+        cache.put((0, 0), self.make(0))
+        used = cache.used_bytes
+        cache.put((0, 0), self.make(0))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.used_bytes, used)
+
+if __name__ == "__main__":
+    unittest.main()
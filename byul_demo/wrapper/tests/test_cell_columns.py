@@ -0,0 +1,142 @@
+from pathlib import Path
+import sys
+
+g_root_path = Path(__file__).resolve().parents[2]
+wrapper_path = g_root_path / Path("wrapper/modules")
+
+sys.path.insert(0, str(g_root_path))
+sys.path.insert(0, str(wrapper_path.resolve()))
+
+import unittest
+
+import numpy as np
+
+from grid.cell_columns import CellColumns, NO_STRING
+from grid.grid_block import GridBlock
+from grid.grid_cell import CellFlag, CellStatus, TerrainType
+
+class TestCellColumnsLayout(unittest.TestCase):
+    def setUp(self):
+        self.cols = CellColumns(10, 20, 4)
+
+    def test_index_roundtrip(self):
+        self.assertEqual(len(self.cols), 16)
+        index = self.cols.index_of(12, 23)
+        self.assertEqual(index, 3 * 4 + 2)
+        self.assertEqual(self.cols.coord_of(index), (12, 23))
+
+    def test_contains(self):
+        self.assertTrue(self.cols.contains(10, 20))
+        self.assertTrue(self.cols.contains(13, 23))
+        self.assertFalse(self.cols.contains(14, 20))
+        self.assertFalse(self.cols.contains(10, 19))
+
+    def test_intern(self):
+        code = self.cols.intern("forest")
+        self.assertEqual(self.cols.intern("forest"), code)
+        self.assertEqual(self.cols.string_at(code), "forest")
+        self.assertEqual(self.cols.intern(None), NO_STRING)
+        self.assertIsNone(self.cols.string_at(NO_STRING))
+
+    def test_grid_is_view(self):
+        grid = self.cols.grid(self.cols.terrain)
+        grid[1, 2] = TerrainType.WATER.value
+        self.assertEqual(self.cols.terrain[1 * 4 + 2], TerrainType.WATER.value)
+
+class TestCellColumnsTracking(unittest.TestCase):
+    def setUp(self):
+        self.block = GridBlock(0, 0, 4)
+        self.cols = self.block.columns
+        self.cols.take_render_dirty()  # 처음 그리기는 전체
+
+    def test_new_block_is_clean(self):
+        self.assertFalse(self.block.is_dirty())
+
+    def test_cell_write_marks_dirty(self):
+        cell = self.block.cell_at(1, 2)
+        cell.terrain = TerrainType.FOREST
+        self.assertTrue(self.block.is_dirty())
+        self.assertEqual(self.cols.dirty_cells, {self.cols.index_of(1, 2)})
+        self.assertEqual(self.cols.dirty_row_range(), (2, 2))
+        self.assertEqual(self.cols.take_render_dirty(),
+                         {self.cols.index_of(1, 2)})
+
+    def test_flags_are_render_only(self):
+        cell = self.block.cell_at(0, 0)
+        cell.add_flag(CellFlag.ROUTE)
+        self.assertFalse(self.block.is_dirty())
+        self.assertEqual(self.cols.take_render_dirty(), {0})
+
+        version = self.cols.terrain_version
+        self.block.remove_flag_all(CellFlag.ROUTE)
+        self.assertFalse(cell.has_flag(CellFlag.ROUTE))
+        self.assertFalse(self.block.is_dirty())
+        self.assertEqual(self.cols.terrain_version, version)
+        self.assertEqual(self.cols.take_render_dirty(), {0})
+
+    def test_npc_ids_are_persistent(self):
+        cell = self.block.cell_at(3, 3)
+        cell.add_npc_id("npc_a")
+        self.assertEqual(cell.status, CellStatus.NPC)
+        self.assertTrue(self.block.is_dirty())
+
+        self.cols.clear_dirty()
+        cell.remove_npc_id("npc_a")
+        self.assertEqual(cell.status, CellStatus.EMPTY)
+        self.assertEqual(cell.npc_ids, [])
+        self.assertTrue(self.block.is_dirty())
+
+    def test_mark_all_dirty(self):
+        version = self.cols.terrain_version
+        self.cols.mark_all_dirty()
+        self.assertTrue(self.cols.dirty_all)
+        self.assertEqual(self.cols.terrain_version, version + 1)
+        self.assertIsNone(self.cols.take_render_dirty())
+        self.assertEqual(self.cols.dirty_row_range(), (0, 3))
+
+    def test_size_changed_notifies_once(self):
+        calls = []
+        self.cols.on_size_changed = lambda: calls.append(1)
+        self.block.cell_at(0, 1).items = ["sword"]
+        self.block.cell_at(0, 2).items = ["shield"]
+        self.assertEqual(len(calls), 1)
+
+        self.cols.size_changed = False
+        self.block.cell_at(0, 3).items = ["bow"]
+        self.assertEqual(len(calls), 2)
+
+    def test_estimate_grows_with_sparse_tables(self):
+        base = self.cols.estimate_nbytes()
+        self.block.cell_at(1, 1).items = ["sword"]
+        self.block.cell_at(1, 1).custom_data = {"hp": 10}
+        self.assertGreater(self.cols.estimate_nbytes(), base)
+
+class TestCellColumnsCopy(unittest.TestCase):
+    def test_copy_is_independent(self):
+        block = GridBlock(0, 0, 4)
+        cell = block.cell_at(2, 2)
+        cell.terrain = TerrainType.MOUNTAIN
+        cell.items = ["gem"]
+        cell.zone_id = "village"
+
+        snapshot = block.columns.copy()
+        cell.terrain = TerrainType.NORMAL
+        cell.items = ["rock"]
+
+        index = snapshot.index_of(2, 2)
+        self.assertEqual(snapshot.terrain[index], TerrainType.MOUNTAIN.value)
+        self.assertEqual(snapshot.items[index], ["gem"])
+        self.assertEqual(snapshot.string_at(int(snapshot.zone_code[index])),
+                         "village")
+        self.assertEqual(snapshot.dirty_cells, {index})
+
+    def test_close_releases_columns(self):
+        cols = CellColumns(0, 0, 4)
+        cols.items[0] = ["gem"]
+        cols.close()
+        self.assertEqual(cols.size, 0)
+        self.assertEqual(cols.terrain.size, 0)
+        self.assertEqual(cols.items, {})
+
+if __name__ == "__main__":
+    unittest.main()
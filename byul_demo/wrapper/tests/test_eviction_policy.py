@@ -0,0 +1,79 @@
+from pathlib import Path
+import sys
+
+g_root_path = Path(__file__).resolve().parents[2]
+wrapper_path = g_root_path / Path("wrapper/modules")
+
+sys.path.insert(0, str(g_root_path))
+sys.path.insert(0, str(wrapper_path.resolve()))
+
+import unittest
+
+from PySide6.QtCore import QRect
+
+from grid.eviction_policy import (
+    DirectionalEvictionPolicy, LRUEvictionPolicy,
+    ViewportDistanceEvictionPolicy)
+
+BLOCK_SIZE = 10
+# 중심 블럭이 (0, 0)인 화면
+VIEWPORT = QRect(-5, -5, 20, 20)
+
+class _Detector:
+    def __init__(self, heading):
+        self.heading = heading
+
+    def get_heading(self):
+        return self.heading
+
+class TestLRUEvictionPolicy(unittest.TestCase):
+    def test_oldest_first(self):
+        policy = LRUEvictionPolicy()
+        keys = [(30, 0), (0, 0), (10, 0)]
+        self.assertEqual(policy.select(keys, VIEWPORT, BLOCK_SIZE), (30, 0))
+        self.assertIsNone(policy.select([], VIEWPORT, BLOCK_SIZE))
+
+class TestViewportDistanceEvictionPolicy(unittest.TestCase):
+    def test_far_block_goes_first(self):
+        policy = ViewportDistanceEvictionPolicy(recency_weight=0.0)
+        keys = [(10, 0), (-50, 0), (0, 20)]
+        self.assertEqual(policy.select(keys, VIEWPORT, BLOCK_SIZE), (-50, 0))
+
+    def test_recency_breaks_ties(self):
+        policy = ViewportDistanceEvictionPolicy()
+        keys = [(20, 0), (-20, 0)]  # 같은 거리, 앞쪽이 더 오래되었다.
+        self.assertEqual(policy.select(keys, VIEWPORT, BLOCK_SIZE), (20, 0))
+
+    def test_weights(self):
+        keys = [(10, 0), (80, 0)]  # 오래된 것이 가깝다.
+        recency = ViewportDistanceEvictionPolicy(1.0, 0.0)
+        distance = ViewportDistanceEvictionPolicy(0.0, 1.0)
+        self.assertEqual(recency.select(keys, VIEWPORT, BLOCK_SIZE), (10, 0))
+        self.assertEqual(distance.select(keys, VIEWPORT, BLOCK_SIZE), (80, 0))
+
+    def test_no_viewport_falls_back_to_lru(self):
+        policy = ViewportDistanceEvictionPolicy()
+        self.assertEqual(policy.select([(80, 0), (0, 0)], None, BLOCK_SIZE),
+                         (80, 0))
+
+class TestDirectionalEvictionPolicy(unittest.TestCase):
+    def test_keeps_blocks_ahead(self):
+        # 오른쪽(+x)으로 가는 중 : 같은 거리면 왼쪽(뒤) 블럭을 내보낸다.
+        policy = DirectionalEvictionPolicy(_Detector((1.0, 0.0)),
+                                           recency_weight=0.0)
+        keys = [(30, 0), (-30, 0)]
+        self.assertEqual(policy.select(keys, VIEWPORT, BLOCK_SIZE), (-30, 0))
+
+    def test_ahead_survives_even_if_farther(self):
+        policy = DirectionalEvictionPolicy(_Detector((1.0, 0.0)),
+                                           recency_weight=0.0)
+        keys = [(60, 0), (-20, 0)]
+        self.assertEqual(policy.select(keys, VIEWPORT, BLOCK_SIZE), (-20, 0))
+
+    def test_stopped_is_distance_based(self):
+        policy = DirectionalEvictionPolicy(_Detector(None), recency_weight=0.0)
+        keys = [(60, 0), (-20, 0)]
+        self.assertEqual(policy.select(keys, VIEWPORT, BLOCK_SIZE), (60, 0))
+
+if __name__ == "__main__":
+    unittest.main()
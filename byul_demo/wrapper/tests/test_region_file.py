@@ -0,0 +1,116 @@
+from pathlib import Path
+import sys
+
+g_root_path = Path(__file__).resolve().parents[2]
+wrapper_path = g_root_path / Path("wrapper/modules")
+
+sys.path.insert(0, str(g_root_path))
+sys.path.insert(0, str(wrapper_path.resolve()))
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from grid.block_generator import generate_block_columns
+from grid.region_file import (
+    RegionFile, RegionStore, locate_block, read_region_columns,
+    region_file_path)
+
+BLOCK_SIZE = 8
+REGION_BLOCKS = 4
+
+class TestLocateBlock(unittest.TestCase):
+    def test_positive_and_negative(self):
+        self.assertEqual(locate_block(0, 0, 8, 4), (0, 0, 0, 0))
+        self.assertEqual(locate_block(40, 8, 8, 4), (1, 0, 1, 1))
+        self.assertEqual(locate_block(-8, -40, 8, 4), (-1, -2, 3, 3))
+
+class TestRegionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name)
+        self.store = RegionStore(self.folder, BLOCK_SIZE, REGION_BLOCKS,
+                                 max_open=2)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def make(self, x0, y0, seed=0):
+        return generate_block_columns(x0, y0, BLOCK_SIZE, world_seed=seed)
+
+    def test_write_and_read(self):
+        cols = self.make(8, -16)
+        self.assertFalse(self.store.has_block(8, -16))
+        self.store.save_columns(cols)
+        self.assertTrue(self.store.has_block(8, -16))
+
+        loaded = self.store.load_columns(8, -16)
+        np.testing.assert_array_equal(cols.terrain, loaded.terrain)
+        self.assertEqual(cols.npc_ids, loaded.npc_ids)
+        self.assertIsNone(self.store.load_columns(0, 0))
+
+    def test_many_blocks_share_one_file(self):
+        for by in range(REGION_BLOCKS):
+            for bx in range(REGION_BLOCKS):
+                self.store.save_columns(
+                    self.make(bx * BLOCK_SIZE, by * BLOCK_SIZE))
+        files = list(self.folder.glob("region_*"))
+        self.assertEqual(len(files), 1)
+
+    def test_read_without_store(self):
+        cols = self.make(16, 24)
+        self.store.save_columns(cols)
+        loaded = read_region_columns(self.folder, 16, 24, BLOCK_SIZE,
+                                     REGION_BLOCKS)
+        np.testing.assert_array_equal(cols.light_level, loaded.light_level)
+        self.assertIsNone(read_region_columns(self.folder, 0, 0, BLOCK_SIZE,
+                                              REGION_BLOCKS))
+        self.assertIsNone(read_region_columns(self.folder, 1000, 1000,
+                                              BLOCK_SIZE, REGION_BLOCKS))
+
+    def test_delete(self):
+        self.store.save_columns(self.make(0, 0))
+        self.store.delete_block(0, 0)
+        self.assertFalse(self.store.has_block(0, 0))
+        self.assertIsNone(self.store.load_columns(0, 0))
+        self.store.delete_block(0, 0)  # 없는 블럭은 무시
+
+    def test_overwrite_and_compact(self):
+        self.store.save_columns(self.make(0, 0, seed=1))
+        self.store.save_columns(self.make(8, 0, seed=1))
+        newest = self.make(0, 0, seed=2)
+        self.store.save_columns(newest)
+        self.store.close()  # 한 리전 파일을 두 객체가 동시에 열지 않는다.
+
+        path = region_file_path(self.folder, 0, 0)
+        region = RegionFile(path, REGION_BLOCKS)
+        self.assertGreater(region.dead_bytes, 0)
+        size = region.file_size()
+        region.compact()
+        self.assertEqual(region.dead_bytes, 0)
+        self.assertLess(region.file_size(), size)
+        region.close()
+
+        store = RegionStore(self.folder, BLOCK_SIZE, REGION_BLOCKS)
+        np.testing.assert_array_equal(
+            store.load_columns(0, 0).terrain, newest.terrain)
+        self.assertTrue(store.has_block(8, 0))
+        store.close()
+
+    def test_block_size_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.store.save_columns(generate_block_columns(0, 0, 4))
+
+    def test_reopen_after_lru_eviction(self):
+        # max_open=2 : 세 번째 리전을 열면 첫 리전 파일은 닫힌다.
+        stride = BLOCK_SIZE * REGION_BLOCKS
+        keys = [(0, 0), (stride, 0), (0, stride)]
+        for x0, y0 in keys:
+            self.store.save_columns(self.make(x0, y0))
+        for x0, y0 in keys:
+            self.assertTrue(self.store.has_block(x0, y0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+from pathlib import Path
+import sys
+
+g_root_path = Path(__file__).resolve().parents[2]
+wrapper_path = g_root_path / Path("wrapper/modules")
+
+sys.path.insert(0, str(g_root_path))
+sys.path.insert(0, str(wrapper_path.resolve()))
+
+import unittest
+
+from world.route_engine.route_cache import RouteCache
+
+WALK = "walk"
+SWIM = "swim"
+
+def _key(start, goal, cls=WALK):
+    return RouteCache.make_key("astar", cls, start, goal,
+                               "default", "euclidean")
+
+def _line(x0, x1, y=0):
+    return [(x, y) for x in range(x0, x1 + 1)]
+
+class TestRouteCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RouteCache(max_entries=4, bucket_size=8)
+
+    def test_hit_and_miss(self):
+        key = _key((0, 0), (5, 0))
+        self.assertIsNone(self.cache.get(key))
+        self.assertTrue(self.cache.put(key, "route", _line(0, 5)))
+        self.assertEqual(self.cache.get(key), "route")
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_empty_route_is_not_cached(self):
+        self.assertFalse(self.cache.put(_key((0, 0), (0, 0)), "route", []))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_bound(self):
+        keys = [_key((i, 0), (i, 9)) for i in range(5)]
+        for i, key in enumerate(keys):
+            if i == 4:
+                self.cache.get(keys[0])  # 0번을 최근으로
+            self.cache.put(key, i, [(i, y) for y in range(10)])
+        self.assertEqual(len(self.cache), 4)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+
+    def test_avoid_is_a_miss(self):
+        key = _key((0, 0), (5, 0))
+        self.cache.put(key, "route", _line(0, 5))
+        self.assertIsNone(self.cache.get(key, avoid=((3, 0),)))
+        self.assertEqual(self.cache.get(key, avoid=((3, 1),)), "route")
+        self.assertEqual(len(self.cache), 1)
+
+    def test_invalidate_on_route(self):
+        key = _key((0, 0), (20, 0))
+        self.cache.put(key, "route", _line(0, 20))
+        self.assertEqual(self.cache.invalidate_coord((12, 0), nearby=False), 1)
+        self.assertIsNone(self.cache.get(key))
+
+    def test_invalidate_nearby(self):
+        key = _key((0, 0), (20, 0))
+        self.cache.put(key, "route", _line(0, 20))
+        # 경로 밖이면 nearby=False로는 지우지 않는다.
+        self.assertEqual(self.cache.invalidate_coord((10, 1), nearby=False), 0)
+        self.assertEqual(self.cache.invalidate_coord((10, 1), nearby=True), 1)
+
+    def test_invalidate_far_away_keeps_route(self):
+        key = _key((0, 0), (20, 0))
+        self.cache.put(key, "route", _line(0, 20))
+        self.assertEqual(self.cache.invalidate_coord((10, 30)), 0)
+        self.assertEqual(self.cache.get(key), "route")
+
+    def test_invalidate_by_movement_class(self):
+        walk = _key((0, 0), (5, 0), WALK)
+        swim = _key((0, 0), (5, 0), SWIM)
+        self.cache.put(walk, "walk", _line(0, 5))
+        self.cache.put(swim, "swim", _line(0, 5))
+        self.cache.invalidate_coord((2, 0), SWIM)
+        self.assertEqual(self.cache.get(walk), "walk")
+        self.assertIsNone(self.cache.get(swim))
+
+        self.cache.invalidate_coord((2, 0))  # None이면 모든 등급
+        self.assertIsNone(self.cache.get(walk))
+
+    def test_invalidate_rect(self):
+        inside = _key((0, 0), (5, 0))
+        outside = _key((0, 50), (5, 50))
+        self.cache.put(inside, "a", _line(0, 5))
+        self.cache.put(outside, "b", _line(0, 5, y=50))
+        self.assertEqual(self.cache.invalidate_rect(0, -5, 9, 9), 1)
+        self.assertIsNone(self.cache.get(inside))
+        self.assertEqual(self.cache.get(outside), "b")
+
+    def test_put_rejects_stale_generation(self):
+        key = _key((0, 0), (5, 0))
+        generation = self.cache.generation()
+        self.cache.invalidate_coord((3, 0))  # 탐색 도중 경로 위가 바뀌었다.
+        self.assertFalse(self.cache.put(key, "route", _line(0, 5), generation))
+        self.assertIsNone(self.cache.get(key))
+
+    def test_put_accepts_unrelated_change(self):
+        key = _key((0, 0), (5, 0))
+        generation = self.cache.generation()
+        self.cache.invalidate_coord((100, 100))
+        self.cache.invalidate_coord((3, 0), SWIM)
+        self.assertTrue(self.cache.put(key, "route", _line(0, 5), generation))
+
+    def test_put_rejects_after_truncated_log(self):
+        cache = RouteCache(change_log_size=2)
+        generation = cache.generation()
+        for i in range(3):
+            cache.invalidate_coord((100 + i, 100))
+        self.assertFalse(cache.put(_key((0, 0), (5, 0)), "route",
+                                   _line(0, 5), generation))
+
+    def test_clear(self):
+        key = _key((0, 0), (5, 0))
+        generation = self.cache.generation()
+        self.cache.put(key, "route", _line(0, 5))
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertFalse(self.cache.put(key, "route", _line(0, 5), generation))
+
+if __name__ == "__main__":
+    unittest.main()